@@ -1,104 +1,100 @@
-from flask import Flask, request, jsonify
-from kafka import KafkaProducer # Assuming you will use this later
-from datetime import datetime
-import json
-import threading
+from flask import Flask, g, request, jsonify
+import sys
 from flask_cors import CORS
-from flask_sqlalchemy import SQLAlchemy
 from dotenv import load_dotenv
-from urllib.parse import quote_plus
 import os
-from werkzeug.security import generate_password_hash, check_password_hash
 
 load_dotenv()
 
+# The schema and pooled engine live with the backend so both servers share them
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+from sqlalchemy import bindparam, select  # noqa: E402
+from config import config  # noqa: E402
+from database.schema import get_engine, users  # noqa: E402
+from routes.auth import require_auth  # noqa: E402
+from services.ingest_queue import get_ingest_broker, get_pending_requests, make_request, request_topic  # noqa: E402
+from services.rate_limiter import AdmissionError  # noqa: E402
+
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "*"}})
 
 # --- Database Configuration ---
-# It's good practice to ensure required environment variables exist.
-db_user = os.getenv('DB_USERNAME')
-db_password = quote_plus(os.getenv('DB_PASSWORD', ''))
-db_host = os.getenv('DB_HOST')
-db_port = os.getenv('DB_PORT')
-db_name = os.getenv('DB_NAME')
-
-if not all([db_user, db_password, db_host, db_port, db_name]):
-    raise ValueError("One or more database environment variables are not set.")
-
-app.config['SQLALCHEMY_DATABASE_URI'] = f"mysql+pymysql://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}"
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# The engine is built from the backend's config (see database.schema.database_url);
+# DB_PASSWORD may legitimately be empty, the rest may not.
+_missing = [name for name in ('DB_USERNAME', 'DB_HOST', 'DB_PORT', 'DB_NAME') if not getattr(config, name, None)]
+if _missing:
+    raise ValueError(f"Database settings missing from config: {', '.join(_missing)}")
+
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
-db = SQLAlchemy(app)
-
-# --- Many-to-Many Association Table ---
-# This is the standard SQLAlchemy way to define a many-to-many relationship.
-# It links users to companies they have "read".
-read_association = db.Table('read',
-    db.Column('user_id', db.Integer, db.ForeignKey('user.id'), primary_key=True),
-    db.Column('company_id', db.Integer, db.ForeignKey('company.id'), primary_key=True)
-)
-
-
-# --- Database Models ---
-
-class Admin(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(50), unique=True, nullable=False)
-    # SECURITY FIX: Store password hashes, not plain text. Increased length for the hash.
-    password_hash = db.Column(db.String(256), nullable=False)
-
-    def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
-
-    def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
-
-class User(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(50), unique=True, nullable=False)
-    password_hash = db.Column(db.String(256), nullable=False)
-
-    # IMPROVEMENT: Define the relationship to Company.
-    # This allows you to easily access user.companies.
-    companies = db.relationship(
-        'Company',
-        secondary=read_association,
-        back_populates='users',
-        lazy='dynamic' # Useful for querying
-    )
-
-    def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
-
-    def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
-
-class Company(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
-    ctc = db.Column(db.Float, nullable=False)
-    tier = db.Column(db.Integer, nullable=False)
-    # Using db.Text is more flexible for potentially long URLs
-    form_link = db.Column(db.Text, nullable=False)
-    mode = db.Column(db.String(50), nullable=False)
-    last_date = db.Column(db.Date, nullable=False)
-    
-    # IMPROVEMENT: Define the back-reference for the relationship.
-    users = db.relationship(
-        'User',
-        secondary=read_association,
-        back_populates='companies',
-        lazy='dynamic'
-    )
+
+# Users, companies (string tiers; see database.schema.tier_label/tier_number for
+# the integer form) and read marks are the backend's tables, reached through
+# the one pooled engine this process creates on first use.
+
+# Compiled once, then served from the engine's statement cache
+USER_EXISTS = select(users.c.id).where(users.c.id == bindparam('user_id'))
+
+
+def user_exists(user_id):
+    with get_engine().connect() as conn:
+        return conn.execute(USER_EXISTS, {'user_id': user_id}).first() is not None
+
+
+# --- Ingestion Pipeline ---
+# process_text requests go to the broker configured by INGEST_BROKER_URL, on the
+# same topics the Socket.IO path uses, and are handled by the consumer-group
+# workers in backend/services/ingest_worker.py, so this endpoint returns at once.
+
+
+@app.route('/process_text', methods=['POST'])
+@require_auth
+def process_text():
+    data = request.get_json() or {}
+    text = (data.get('text') or '').strip()
+    # The user comes from the verified token, never from the body
+    user_id = g.user['user_id']
+
+    if not text:
+        return jsonify({'message': 'text is required'}), 400
+
+    try:
+        if not user_exists(user_id):
+            return jsonify({'message': 'Unknown user'}), 404
+    except Exception as e:
+        print(f"User lookup error: {e}")
+        return jsonify({'message': 'Could not verify user'}), 503
+
+    broker = get_ingest_broker()
+    if broker is None:
+        return jsonify({'message': 'Ingestion is not configured'}), 503
+
+    # REST submissions are single pastes, so they take the interactive lane
+    message = make_request(user_id, text)
+    pending = get_pending_requests()
+    try:
+        pending.acquire(user_id, message['request_id'])
+    except AdmissionError as e:
+        response = jsonify({'message': str(e), 'retry_after': e.retry_after})
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, 503
+    try:
+        # Keyed by user so one user's requests stay ordered within a partition; 202 only once acknowledged
+        broker.send(request_topic(message), user_id, message)
+    except Exception as e:
+        pending.release(user_id, message['request_id'])
+        print(f"Process text error: {e}")
+        return jsonify({'message': 'Could not queue request'}), 503
+
+    return jsonify({'message': 'Request queued for processing', 'request_id': message['request_id']}), 202
+
 
 # --- Main Execution Block ---
 if __name__ == "__main__":
-    # FIX: Create tables within the application context BEFORE running the app.
-    # This block should ideally only be run once for initial setup.
-    # For future changes, a tool like Flask-Migrate is recommended.
-    with app.app_context():
-        db.create_all()
-        print("Database tables created (if they didn't exist).")
+    if get_ingest_broker() is None:
+        raise SystemExit("INGEST_BROKER_URL is not configured")
+    # Creates missing tables from the shared schema and applies pending migrations
+    from database.migrate import run_migrations
+    run_migrations()
+    print("Database schema is up to date.")
 
     app.run(debug=True, host="0.0.0.0", port=5501)
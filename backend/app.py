@@ -1,4 +1,9 @@
-from flask import Flask, request, jsonify, render_template_string
+# Must run before any other import so sockets/locks are patched in green modes
+from async_support import ASYNC_MODE, monkey_patch
+monkey_patch()
+
+import time
+from flask import Flask, Response, g, request, jsonify, render_template_string
 from flask_socketio import SocketIO
 from flask_cors import CORS
 import logging
@@ -6,8 +11,15 @@ from datetime import datetime
 
 # Import your existing modules
 from routes.auth import auth_bp
+from routes.companies import companies_bp
 from database.connection import init_db
 from websocket.events import register_websocket_events  # Fixed import path
+from websocket.pubsub import create_client_manager
+from services.stats_service import StatsReconciler
+from services.ingest_worker import start_embedded_workers
+from services.health_service import create_health_monitor
+from config import config
+import metrics
 
 # Configure logging
 logging.basicConfig(
@@ -19,6 +31,8 @@ logger = logging.getLogger(__name__)
 # Initialize Flask app
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key-here'  # Change this in production
+# Larger uploads are spooled to disk by Werkzeug, this only caps their size
+app.config['MAX_CONTENT_LENGTH'] = getattr(config, 'UPLOAD_MAX_BYTES', 50 * 1024 * 1024)
 
 # Enable CORS
 CORS(app, resources={
@@ -29,6 +43,9 @@ CORS(app, resources={
 # Initialize SocketIO
 socketio = SocketIO(
     app, 
+    async_mode=ASYNC_MODE,
+    # Shared pub/sub so emits reach sockets held by other instances
+    client_manager=create_client_manager(getattr(config, 'SOCKETIO_MESSAGE_QUEUE', None)),
     cors_allowed_origins="*", 
     logger=True, 
     engineio_logger=False  # Set to True for more detailed logs
@@ -64,6 +81,7 @@ HTML_TEMPLATE = """
     
     <!-- Quick WebSocket Test -->
     <h2>🧪 Quick WebSocket Test</h2>
+    <input id="token" placeholder="JWT from /api/auth/login" size="60">
     <button onclick="testConnection()">Test Connection</button>
     <button onclick="sendTestMessage()">Send Test Message</button>
     <button onclick="clearLog()">Clear Log</button>
@@ -74,8 +92,15 @@ HTML_TEMPLATE = """
     <ul>
         <li><strong>GET /</strong> - This status page</li>
         <li><strong>GET /health</strong> - Health check endpoint</li>
+        <li><strong>GET /health/ready</strong> - Readiness with per-dependency detail (?deep=1 to re-check now)</li>
+        <li><strong>GET /metrics</strong> - Prometheus metrics</li>
         <li><strong>POST /api/auth/register</strong> - User registration</li>
         <li><strong>POST /api/auth/login</strong> - User login</li>
+        <li><strong>GET /api/companies</strong> - Paginated company list (cursor, page_size, tier, industry, location, read_status, created_after, created_before)</li>
+        <li><strong>GET /api/companies/stats</strong> - Company counters for a user</li>
+        <li><strong>POST /api/companies/read</strong> - Mark companies as read</li>
+        <li><strong>POST /api/companies/unread</strong> - Mark companies as unread</li>
+        <li><strong>POST /api/companies/upload</strong> - Import a .txt, .csv or .eml export (results stream over the socket)</li>
     </ul>
     
     <h2>🔌 WebSocket Connection</h2>
@@ -99,7 +124,9 @@ HTML_TEMPLATE = """
             }
             
             log('🔄 Connecting to WebSocket...');
-            socket = io('http://localhost:5000');
+            socket = io('http://localhost:5000', {
+                auth: { token: document.getElementById('token').value }
+            });
             
             socket.on('connect', () => {
                 log('✅ Connected successfully!');
@@ -128,7 +155,6 @@ HTML_TEMPLATE = """
                 type: 'process_text',
                 data: {
                     text: 'Google is hiring software engineers in San Francisco',
-                    user_id: 'test_user',
                     timestamp: new Date().toISOString()
                 }
             };
@@ -147,9 +173,23 @@ HTML_TEMPLATE = """
 
 # Register blueprints
 app.register_blueprint(auth_bp, url_prefix='/api/auth')
+app.register_blueprint(companies_bp, url_prefix='/api/companies')
 
 # Register WebSocket events
-register_websocket_events(socketio)
+job_manager = register_websocket_events(socketio)
+# Upload routes queue their work on the same pool
+app.extensions['job_manager'] = job_manager
+
+# Consume process_text requests in-process when using the in-memory ingest broker
+ingest_workers = start_embedded_workers()
+
+# Dependency checks run in the background; probes only read the snapshot
+health_monitor = create_health_monitor(job_manager)
+health_monitor.start()
+
+# Periodically rebuild pre-aggregated company stats to correct drift
+stats_reconciler = StatsReconciler(interval=getattr(config, 'STATS_RECONCILE_INTERVAL', 3600))
+stats_reconciler.start()
 
 @app.route('/')
 def index():
@@ -159,27 +199,59 @@ def index():
         current_time=datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     )
 
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_time(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        # Labelled by endpoint name, not path, to keep the series count bounded
+        metrics.REQUEST_SECONDS.labels(endpoint=request.endpoint or 'unmatched').observe(
+            time.perf_counter() - started
+        )
+    return response
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus scrape endpoint"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/health')
 def health_check():
-    """Health check endpoint"""
-    try:
-        # Test database connection
-        from database.connection import get_db_connection
-        conn = get_db_connection()
-        conn.close()
-        db_status = "connected"
-    except Exception as e:
-        logger.error(f"Database connection failed: {e}")
-        db_status = "disconnected"
+    """Liveness probe, answered from the background health snapshot"""
+    snapshot = health_monitor.snapshot()
+    database = snapshot['checks'].get('database', {})
     
     return jsonify({
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
-        'database': db_status,
+        'database': 'connected' if database.get('status') == 'healthy' else 'disconnected',
+        'dependencies': snapshot['status'],
+        'checked_at': snapshot['checked_at'],
         'websocket': 'enabled',
         'version': '1.0.0'
     })
 
+@app.route('/health/ready')
+def readiness_check():
+    """Readiness probe with per-dependency detail; ?deep=1 re-runs every check now"""
+    if request.args.get('deep') in ('1', 'true'):
+        health_monitor.refresh()
+    snapshot = health_monitor.snapshot()
+    stale = health_monitor.is_stale(snapshot)
+    ready = health_monitor.is_ready(snapshot)
+    
+    return jsonify({
+        'ready': ready,
+        'status': snapshot['status'],
+        'stale': stale,
+        'checked_at': snapshot['checked_at'],
+        'age_seconds': snapshot['age_seconds'],
+        'checks': snapshot['checks']
+    }), 200 if ready else 503
+
 # Error handlers
 @app.errorhandler(404)
 def not_found_error(error):
@@ -189,8 +261,10 @@ def not_found_error(error):
         'available_endpoints': [
             '/',
             '/health',
+            '/metrics',
             '/api/auth/login',
-            '/api/auth/register'
+            '/api/auth/register',
+            '/api/companies'
         ]
     }), 404
 
@@ -207,18 +281,22 @@ if __name__ == '__main__':
         init_db()
         logger.info("✅ Database connection verified")
         
-        logger.info("🚀 Starting PlaceBuddy server...")
+        logger.info(f"🚀 Starting PlaceBuddy server ({ASYNC_MODE} mode)...")
         logger.info("📡 Server will be available at: http://localhost:5000")
         logger.info("🔌 WebSocket endpoint: ws://localhost:5000/socket.io/")
         
         # Run the application with SocketIO
-        socketio.run(
-            app, 
-            host='0.0.0.0', 
-            port=5000, 
-            debug=True,
-            allow_unsafe_werkzeug=True  # Only for development
-        )
+        if ASYNC_MODE == 'threading':
+            socketio.run(
+                app, 
+                host='0.0.0.0', 
+                port=5000, 
+                debug=True,
+                allow_unsafe_werkzeug=True  # Only for development
+            )
+        else:
+            # eventlet/gevent serve with their own production WSGI servers
+            socketio.run(app, host='0.0.0.0', port=5000, debug=False)
         
     except Exception as e:
         logger.error(f"❌ Failed to start server: {e}")
@@ -0,0 +1,47 @@
+"""
+Server concurrency mode.
+
+SOCKETIO_ASYNC_MODE selects how the Socket.IO server runs:
+
+- ``threading`` (default): Werkzeug dev server, one OS thread per client.
+- ``eventlet`` / ``gevent``: cooperative green threads. Sockets, sleeps and
+  locks are monkey-patched so idle WebSocket clients and requests waiting on
+  MySQL or the LLM cost a greenlet instead of a thread.
+
+The mode is read from the environment rather than config because patching
+has to happen before anything else is imported.
+"""
+import os
+
+ASYNC_MODE = os.getenv('SOCKETIO_ASYNC_MODE', 'threading').lower()
+
+if ASYNC_MODE not in ('threading', 'eventlet', 'gevent'):
+    raise ValueError(f"Unsupported SOCKETIO_ASYNC_MODE: {ASYNC_MODE}")
+
+
+def is_cooperative():
+    return ASYNC_MODE != 'threading'
+
+
+def monkey_patch():
+    """Patch the standard library for the selected green-thread library"""
+    if ASYNC_MODE == 'eventlet':
+        import eventlet
+        eventlet.monkey_patch()
+    elif ASYNC_MODE == 'gevent':
+        from gevent import monkey
+        monkey.patch_all()
+
+
+def run_blocking(func, *args):
+    """
+    Run CPU-bound or C-extension work (bcrypt) without stalling the event
+    loop: on a real OS thread in green modes, inline otherwise.
+    """
+    if ASYNC_MODE == 'eventlet':
+        from eventlet import tpool
+        return tpool.execute(func, *args)
+    if ASYNC_MODE == 'gevent':
+        import gevent
+        return gevent.get_hub().threadpool.apply(func, args)
+    return func(*args)
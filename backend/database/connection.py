@@ -1,15 +1,107 @@
-import mysql.connector
-from config import config
+import logging
+import threading
+from contextlib import contextmanager
+
+import sqlalchemy.exc
+import metrics
+from database.schema import get_engine
+
+logger = logging.getLogger(__name__)
+
+
+class PoolExhaustedError(Exception):
+    """Raised when no pooled connection becomes available within the checkout timeout"""
+
+
+class ConnectionPool:
+    """
+    Connections for the models' hand-written SQL, borrowed from the shared
+    engine's pool (database.schema.get_engine) so Core queries and raw
+    cursors in one process draw on a single set of connections.
+
+    Borrowed connections proxy the mysql.connector connection; close()
+    rolls back any open transaction and returns it to the pool.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.size = engine.pool.size()
+        self.timeout = engine.pool.timeout()
+
+    def acquire(self):
+        """Borrow a healthy connection, opening a new one if the pool is not full"""
+        try:
+            return self.engine.raw_connection()
+        except sqlalchemy.exc.TimeoutError:
+            metrics.ERRORS.labels(stage='db_pool').inc()
+            raise PoolExhaustedError(
+                f"No database connection available after {self.timeout}s (pool size {self.size})"
+            ) from None
+
+    def close_all(self):
+        """Close every idle connection (checked-out ones close when returned)"""
+        self.engine.dispose()
+
+    def stats(self):
+        """Return a snapshot of pool usage"""
+        pool = self.engine.pool
+        idle, in_use = pool.checkedin(), pool.checkedout()
+        return {
+            'size': self.size,
+            'open': idle + in_use,
+            'in_use': in_use,
+            'idle': idle,
+        }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+DB_POOL = metrics.gauge('placebuddy_db_pool_connections', 'Database pool connections by state', ['state'])
+DB_POOL.set_function(lambda: _pool.stats() if _pool else {})
+
+
+def get_pool():
+    """Get the process-wide connection pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(get_engine())
+    return _pool
+
 
 def get_db_connection():
-    """Get database connection"""
-    return mysql.connector.connect(
-        host=config.DB_HOST,
-        user=config.DB_USERNAME,
-        password=config.DB_PASSWORD,
-        database=config.DB_NAME,
-        port=config.DB_PORT
-    )
+    """Get database connection (borrowed from the pool; close() returns it)"""
+    return get_pool().acquire()
+
+
+@contextmanager
+def db_cursor(dictionary=False, commit=False):
+    """
+    Borrow a pooled connection and yield a cursor on it.
+
+    Commits on success when ``commit`` is set, rolls back on error, and always
+    returns the connection to the pool.
+    """
+    conn = get_db_connection()
+    cursor = None
+    try:
+        cursor = conn.cursor(dictionary=dictionary)
+        yield cursor
+        if commit:
+            conn.commit()
+    except Exception:
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        raise
+    finally:
+        if cursor is not None:
+            cursor.close()
+        conn.close()
+
 
 def init_db():
     """Just test the connection - no table creation"""
@@ -19,4 +111,4 @@ def init_db():
         conn.close()
     except Exception as e:
         print(f"❌ Database connection failed: {e}")
-        raise e
\ No newline at end of file
+        raise e
@@ -0,0 +1,444 @@
+"""
+Schema migrations for the PlaceBuddy database.
+
+Run from the backend directory:
+
+    python -m database.migrate            # apply pending migrations
+    python -m database.migrate --status   # list applied / pending migrations
+
+Tables missing from the database are created from database.schema first;
+each migration then runs once and is recorded in the schema_migrations
+table.
+"""
+import argparse
+import json
+import logging
+
+from database.connection import get_db_connection
+from database.schema import get_engine, metadata
+from database.normalize import normalize_company_name
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def _column_exists(cursor, table, column):
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+    """, (table, column))
+    return cursor.fetchone()[0] > 0
+
+
+def _table_exists(cursor, table):
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.TABLES
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+    """, (table,))
+    return cursor.fetchone()[0] > 0
+
+
+def _index_exists(cursor, table, index):
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+    """, (table, index))
+    return cursor.fetchone()[0] > 0
+
+
+def add_company_name_normalized(conn):
+    """Add companies.name_normalized, backfill it, merge rows that collide and make it unique"""
+    cursor = conn.cursor()
+
+    if not _column_exists(cursor, 'companies', 'name_normalized'):
+        cursor.execute("ALTER TABLE companies ADD COLUMN name_normalized VARCHAR(255) NULL AFTER name")
+
+    # Backfill in id order; the first row for a key wins, later rows are merged into it
+    survivors = {}
+    cursor.execute("SELECT name_normalized, id FROM companies WHERE name_normalized IS NOT NULL")
+    survivors.update(cursor.fetchall())
+
+    last_id = 0
+    backfilled = 0
+    collisions = []
+    while True:
+        cursor.execute(
+            "SELECT id, name FROM companies WHERE id > %s AND name_normalized IS NULL ORDER BY id LIMIT %s",
+            (last_id, BACKFILL_BATCH_SIZE)
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            break
+
+        updates = []
+        for company_id, name in rows:
+            key = normalize_company_name(name)
+            if key in survivors:
+                collisions.append((company_id, name, survivors[key]))
+                continue
+            survivors[key] = company_id
+            updates.append((key, company_id))
+
+        if updates:
+            cursor.executemany("UPDATE companies SET name_normalized = %s WHERE id = %s", updates)
+        conn.commit()
+        backfilled += len(updates)
+        last_id = rows[-1][0]
+
+    logger.info(f"Backfilled name_normalized for {backfilled} companies")
+    if collisions:
+        _merge_duplicate_companies(cursor, collisions)
+        conn.commit()
+
+    if not _index_exists(cursor, 'companies', 'uq_companies_name_normalized'):
+        cursor.execute(
+            "ALTER TABLE companies ADD UNIQUE INDEX uq_companies_name_normalized (name_normalized)"
+        )
+    conn.commit()
+    cursor.close()
+
+
+# Filled on the surviving row when only the duplicate has them
+MERGED_COLUMNS = ('description', 'website', 'industry', 'location', 'funding_stage', 'employee_count', 'revenue')
+
+
+def _merge_duplicate_companies(cursor, collisions):
+    """
+    Fold each duplicate (id, name, survivor_id) into its survivor: fields,
+    read marks, then the row itself. The removed row is archived in
+    merged_companies, and a duplicate owned by another user is logged.
+    """
+    from database.models import StatsModel
+
+    has_read_status = _table_exists(cursor, 'read_status')
+    owners = set()
+    for company_id, name, survivor_id in collisions:
+        cursor.execute("SELECT * FROM companies WHERE id = %s", (company_id,))
+        duplicate = dict(zip([column[0] for column in cursor.description], cursor.fetchone()))
+        cursor.execute("SELECT created_by FROM companies WHERE id = %s", (survivor_id,))
+        survivor_owner = cursor.fetchone()[0]
+
+        assignments = ', '.join(f"s.{column} = COALESCE(s.{column}, d.{column})" for column in MERGED_COLUMNS)
+        cursor.execute(f"""
+            UPDATE companies s JOIN companies d ON d.id = %s
+            SET {assignments}
+            WHERE s.id = %s
+        """, (company_id, survivor_id))
+        if has_read_status:
+            cursor.execute("""
+                INSERT IGNORE INTO read_status (user_id, company_id, read_at)
+                SELECT user_id, %s, read_at FROM read_status WHERE company_id = %s
+            """, (survivor_id, company_id))
+            cursor.execute("DELETE FROM read_status WHERE company_id = %s", (company_id,))
+        cursor.execute(
+            "INSERT INTO merged_companies (company_id, survivor_id, created_by, data) VALUES (%s, %s, %s, %s)",
+            (company_id, survivor_id, duplicate['created_by'], json.dumps(duplicate, default=str))
+        )
+        owners.update(owner for owner in (duplicate['created_by'], survivor_owner) if owner is not None)
+        cursor.execute("DELETE FROM companies WHERE id = %s", (company_id,))
+        if duplicate['created_by'] != survivor_owner:
+            logger.warning(
+                f"Merged company {company_id} '{name}' of user {duplicate['created_by']} into company "
+                f"{survivor_id} of user {survivor_owner}; the removed row is kept in merged_companies"
+            )
+        else:
+            logger.warning(f"Merged company {company_id} '{name}' into company {survivor_id} (same normalized name)")
+
+    # Counters exist already when the table was created from database.schema
+    if _table_exists(cursor, 'company_stats'):
+        for user_id in owners:
+            StatsModel.rebuild_user(cursor, user_id)
+    logger.info(f"Merged {len(collisions)} duplicate companies")
+
+
+def add_company_fulltext_indexes(conn):
+    """FULLTEXT indexes for search: one combined index plus one per weighted field"""
+    cursor = conn.cursor()
+    indexes = {
+        'ft_companies_all': 'name, industry, description, location',
+        'ft_companies_name': 'name',
+        'ft_companies_industry': 'industry',
+        'ft_companies_description': 'description',
+        'ft_companies_location': 'location',
+    }
+    # InnoDB builds FULLTEXT indexes one ALTER at a time
+    for index, columns in indexes.items():
+        if not _index_exists(cursor, 'companies', index):
+            cursor.execute(f"ALTER TABLE companies ADD FULLTEXT INDEX {index} ({columns})")
+    conn.commit()
+    cursor.close()
+
+
+def add_company_listing_index(conn):
+    """Composite index serving per-user keyset pagination on (created_at, id)"""
+    cursor = conn.cursor()
+    if not _index_exists(cursor, 'companies', 'idx_companies_user_created'):
+        cursor.execute(
+            "ALTER TABLE companies ADD INDEX idx_companies_user_created (created_by, created_at, id)"
+        )
+    conn.commit()
+    cursor.close()
+
+
+def create_read_status_table(conn):
+    """Per-user read marks; the composite primary key serves page lookups"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS read_status (
+            user_id INT NOT NULL,
+            company_id INT NOT NULL,
+            read_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, company_id),
+            INDEX idx_read_status_company (company_id),
+            CONSTRAINT fk_read_status_user FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE,
+            CONSTRAINT fk_read_status_company FOREIGN KEY (company_id) REFERENCES companies (id) ON DELETE CASCADE
+        )
+    """)
+    conn.commit()
+    cursor.close()
+
+
+def create_company_stats_table(conn):
+    """Per-user pre-aggregated counters, backfilled from existing rows"""
+    from database.models import StatsModel
+
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS company_stats (
+            user_id INT NOT NULL,
+            dimension VARCHAR(20) NOT NULL,
+            bucket VARCHAR(100) NOT NULL,
+            count INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, dimension, bucket)
+        )
+    """)
+    cursor.execute("SELECT DISTINCT created_by FROM companies WHERE created_by IS NOT NULL")
+    for (user_id,) in cursor.fetchall():
+        StatsModel.rebuild_user(cursor, user_id)
+        conn.commit()
+    conn.commit()
+    cursor.close()
+
+
+def add_company_posting_columns(conn):
+    """Typed ctc/form_link/mode/last_date columns backfilled from extracted_data, indexed tier and last_date"""
+    from database.models import CompanyModel
+
+    cursor = conn.cursor()
+    columns = {
+        'ctc': 'FLOAT NULL',
+        'form_link': 'TEXT NULL',
+        'mode': 'VARCHAR(50) NULL',
+        'last_date': 'DATE NULL',
+    }
+    for column, definition in columns.items():
+        if not _column_exists(cursor, 'companies', column):
+            cursor.execute(f"ALTER TABLE companies ADD COLUMN {column} {definition} AFTER revenue")
+
+    conn.commit()
+
+    last_id = 0
+    backfilled = 0
+    while True:
+        cursor.execute(
+            "SELECT id, extracted_data FROM companies WHERE id > %s ORDER BY id LIMIT %s",
+            (last_id, BACKFILL_BATCH_SIZE)
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            break
+
+        updates = []
+        for company_id, extracted_data in rows:
+            try:
+                extracted = json.loads(extracted_data or '{}')
+            except ValueError:
+                continue
+            values = [CompanyModel.column_value(column, extracted.get(column)) for column in columns]
+            if any(value is not None for value in values):
+                updates.append((*values, company_id))
+
+        if updates:
+            cursor.executemany(
+                "UPDATE companies SET ctc = %s, form_link = %s, mode = %s, last_date = %s WHERE id = %s",
+                updates
+            )
+        conn.commit()
+        backfilled += len(updates)
+        last_id = rows[-1][0]
+    logger.info(f"Backfilled posting columns for {backfilled} companies")
+
+    indexes = {
+        'idx_companies_tier': 'tier',
+        'idx_companies_last_date': 'last_date',
+    }
+    for index, column in indexes.items():
+        if not _index_exists(cursor, 'companies', index):
+            cursor.execute(f"ALTER TABLE companies ADD INDEX {index} ({column})")
+    conn.commit()
+    cursor.close()
+
+
+def import_api_server_tables(conn):
+    """
+    Copy the rows api_server.py kept in its own tables (user, admin, company,
+    read) into the shared schema, in one transaction. Integer tiers become
+    labels and read marks follow the new user and company ids. Companies
+    whose normalized name already exists are matched, not duplicated; the
+    old tables are left in place.
+    """
+    from database.models import CompanyModel
+    from database.schema import tier_label
+
+    cursor = conn.cursor()
+    user_ids = {}
+    if _table_exists(cursor, 'user'):
+        cursor.execute("SELECT id, name, password_hash FROM `user` ORDER BY id")
+        for old_id, name, password_hash in cursor.fetchall():
+            username = name
+            cursor.execute("SELECT id FROM users WHERE username = %s", (username,))
+            if cursor.fetchone():
+                suffix = f"-{old_id}"
+                username = name[:50 - len(suffix)] + suffix
+                logger.warning(f"api_server user '{name}' clashes with an existing user; imported as '{username}'")
+            # The old schema had no e-mail; .invalid addresses can never be delivered to
+            cursor.execute(
+                "INSERT INTO users (username, email, password_hash) VALUES (%s, %s, %s)",
+                (username, f"legacy-user-{old_id}@placebuddy.invalid", password_hash)
+            )
+            user_ids[old_id] = cursor.lastrowid
+
+    if _table_exists(cursor, 'admin'):
+        cursor.execute("INSERT IGNORE INTO admins (name, password_hash) SELECT name, password_hash FROM `admin`")
+
+    company_ids = {}
+    if _table_exists(cursor, 'company'):
+        last_id = 0
+        while True:
+            cursor.execute(
+                "SELECT id, name, ctc, tier, form_link, mode, last_date FROM company WHERE id > %s ORDER BY id LIMIT %s",
+                (last_id, BACKFILL_BATCH_SIZE)
+            )
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            for old_id, name, ctc, tier, form_link, mode, last_date in rows:
+                key = normalize_company_name(name)
+                cursor.execute("SELECT id FROM companies WHERE name_normalized = %s", (key,))
+                existing = cursor.fetchone()
+                if existing:
+                    company_ids[old_id] = existing[0]
+                    continue
+                fields = {
+                    'name': name,
+                    'tier': tier_label(tier),
+                    'ctc': ctc,
+                    'form_link': form_link,
+                    'mode': mode,
+                    'last_date': last_date.isoformat() if last_date else None
+                }
+                cursor.execute("""
+                    INSERT INTO companies (name, name_normalized, tier, ctc, form_link, mode, last_date, extracted_data)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                """, (name, key, fields['tier'], CompanyModel.column_value('ctc', ctc), form_link, mode,
+                      last_date, json.dumps(fields)))
+                company_ids[old_id] = cursor.lastrowid
+            last_id = rows[-1][0]
+
+    if _table_exists(cursor, 'read'):
+        cursor.execute("SELECT user_id, company_id FROM `read`")
+        marks = [
+            (user_ids[user_id], company_ids[company_id])
+            for user_id, company_id in cursor.fetchall()
+            if user_id in user_ids and company_id in company_ids
+        ]
+        if marks:
+            cursor.executemany("INSERT IGNORE INTO read_status (user_id, company_id) VALUES (%s, %s)", marks)
+
+    conn.commit()
+    logger.info(f"Imported {len(user_ids)} users and {len(company_ids)} companies from the api_server tables")
+    cursor.close()
+
+
+def rekey_unnormalized_names(conn):
+    """Recompute name_normalized for a row keyed '' (names with no Latin letters or digits)"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT id, name FROM companies WHERE name_normalized = ''")
+    for company_id, name in cursor.fetchall():
+        cursor.execute(
+            "UPDATE companies SET name_normalized = %s WHERE id = %s",
+            (normalize_company_name(name), company_id)
+        )
+    conn.commit()
+    cursor.close()
+
+
+# Ordered list of (name, function); append new migrations at the end
+MIGRATIONS = [
+    ('0001_company_name_normalized', add_company_name_normalized),
+    ('0002_company_fulltext_indexes', add_company_fulltext_indexes),
+    ('0003_company_listing_index', add_company_listing_index),
+    ('0004_read_status_table', create_read_status_table),
+    ('0005_company_stats_table', create_company_stats_table),
+    ('0006_company_posting_columns', add_company_posting_columns),
+    ('0007_import_api_server_tables', import_api_server_tables),
+    ('0008_rekey_unnormalized_names', rekey_unnormalized_names),
+]
+
+
+def _ensure_migrations_table(conn):
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            name VARCHAR(100) PRIMARY KEY,
+            applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("SELECT name FROM schema_migrations")
+    applied = {row[0] for row in cursor.fetchall()}
+    conn.commit()
+    cursor.close()
+    return applied
+
+
+def run_migrations():
+    """Create missing tables from the shared schema, then apply every pending migration in order"""
+    metadata.create_all(get_engine())
+    conn = get_db_connection()
+    try:
+        applied = _ensure_migrations_table(conn)
+        for name, migration in MIGRATIONS:
+            if name in applied:
+                continue
+            logger.info(f"Applying migration {name}")
+            migration(conn)
+            cursor = conn.cursor()
+            cursor.execute("INSERT INTO schema_migrations (name) VALUES (%s)", (name,))
+            conn.commit()
+            cursor.close()
+        logger.info("Database schema is up to date")
+    finally:
+        conn.close()
+
+
+def print_status():
+    conn = get_db_connection()
+    try:
+        applied = _ensure_migrations_table(conn)
+    finally:
+        conn.close()
+    for name, _ in MIGRATIONS:
+        print(f"[{'x' if name in applied else ' '}] {name}")
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='Apply PlaceBuddy database migrations')
+    parser.add_argument('--status', action='store_true', help='list migrations without applying them')
+    args = parser.parse_args()
+
+    if args.status:
+        print_status()
+    else:
+        run_migrations()
@@ -1,119 +1,557 @@
+import base64
 import json
-from datetime import datetime
-from database.connection import get_db_connection
+import re
+from datetime import date, datetime
+from database.connection import db_cursor
+from database.normalize import normalize_company_name
+from database.schema import tier_label
 
 class UserModel:
     @staticmethod
     def find_by_username(username):
         """Find user by username"""
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        cursor.execute("SELECT * FROM users WHERE username = %s", (username,))
-        user = cursor.fetchone()
-        
-        cursor.close()
-        conn.close()
-        return user
-    
+        with db_cursor(dictionary=True) as cursor:
+            cursor.execute("SELECT * FROM users WHERE username = %s", (username,))
+            return cursor.fetchone()
+
     @staticmethod
     def find_by_username_or_email(username, email):
         """Check if user exists by username or email"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT id FROM users WHERE username = %s OR email = %s", (username, email))
-        result = cursor.fetchone()
-        
-        cursor.close()
-        conn.close()
-        return result is not None
-    
+        with db_cursor() as cursor:
+            cursor.execute("SELECT id FROM users WHERE username = %s OR email = %s", (username, email))
+            return cursor.fetchone() is not None
+
     @staticmethod
     def create_user(username, email, password_hash):
         """Create new user"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute(
-            "INSERT INTO users (username, email, password_hash) VALUES (%s, %s, %s)",
-            (username, email, password_hash)
-        )
-        user_id = cursor.lastrowid
-        conn.commit()
-        
-        cursor.close()
-        conn.close()
-        return user_id
+        with db_cursor(commit=True) as cursor:
+            cursor.execute(
+                "INSERT INTO users (username, email, password_hash) VALUES (%s, %s, %s)",
+                (username, email, password_hash)
+            )
+            return cursor.lastrowid
+
+    @staticmethod
+    def update_password_hash(user_id, password_hash):
+        """Replace a user's password hash (used for transparent rehashing)"""
+        with db_cursor(commit=True) as cursor:
+            cursor.execute("UPDATE users SET password_hash = %s WHERE id = %s", (password_hash, user_id))
 
 class CompanyModel:
+    INSERT_QUERY = """
+    INSERT INTO companies (name, name_normalized, description, website, industry, tier, location,
+                          funding_stage, employee_count, revenue, ctc, form_link, mode, last_date,
+                          extracted_data, created_by)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """
+
     @staticmethod
-    def find_by_name(name):
-        """Find company by name (case insensitive)"""
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        cursor.execute("SELECT * FROM companies WHERE LOWER(name) = LOWER(%s) LIMIT 1", (name,))
-        company = cursor.fetchone()
-        
-        cursor.close()
-        conn.close()
-        return company
-    
+    def column_value(column, value):
+        """Coerce an extracted value to the type of its column (None if it does not fit)"""
+        if value is None:
+            return None
+        if column == 'tier':
+            return tier_label(value)
+        if column == 'ctc':
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                return None
+        if column == 'last_date':
+            try:
+                return date.fromisoformat(str(value)[:10])
+            except ValueError:
+                return None
+        return value
+
     @staticmethod
-    def create_company(company_data, user_id):
-        """Create new company"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        query = """
-        INSERT INTO companies (name, description, website, industry, tier, location, 
-                              funding_stage, employee_count, revenue, extracted_data, created_by)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """
-       # edit later 
-        cursor.execute(query, (
+    def _insert_params(company_data, user_id):
+        return (
             company_data.get('name'),
+            normalize_company_name(company_data.get('name')),
             company_data.get('description'),
             company_data.get('website'),
             company_data.get('industry'),
-            company_data.get('tier', 'tier3'),
+            tier_label(company_data.get('tier')),
             company_data.get('location'),
             company_data.get('funding_stage'),
             company_data.get('employee_count'),
             company_data.get('revenue'),
+            CompanyModel.column_value('ctc', company_data.get('ctc')),
+            company_data.get('form_link'),
+            company_data.get('mode'),
+            CompanyModel.column_value('last_date', company_data.get('last_date')),
             json.dumps(company_data),
             user_id
-        ))
-        
-        company_id = cursor.lastrowid
-        conn.commit()
-        cursor.close()
-        conn.close()
-        
+        )
+
+    @staticmethod
+    def find_by_name(name):
+        """Find company by normalized name (uses the unique name_normalized index)"""
+        with db_cursor(dictionary=True) as cursor:
+            cursor.execute(
+                "SELECT * FROM companies WHERE name_normalized = %s LIMIT 1",
+                (normalize_company_name(name),)
+            )
+            return cursor.fetchone()
+
+    @staticmethod
+    def create_company(company_data, user_id):
+        """Create new company"""
+        company_id, _ = CompanyModel.insert_or_get(company_data, user_id)
         return company_id
-    
-    @staticmethod
-    def get_companies_by_user(user_id):
-        """Get all companies created by user"""
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        cursor.execute("""
-            SELECT id, name, description, tier, industry, location, website, 
-                   funding_stage, employee_count, revenue, created_at 
-            FROM companies 
-            WHERE created_by = %s 
-            ORDER BY created_at DESC
-        """, (user_id,))
-        
-        companies = cursor.fetchall()
-        
-        # Convert datetime to string
+
+    @staticmethod
+    def insert_or_get(company_data, user_id):
+        """
+        Atomically insert a company unless one with the same normalized name
+        exists. Returns (company_id, created).
+        """
+        # LAST_INSERT_ID(id) makes lastrowid point at the existing row on a duplicate
+        query = CompanyModel.INSERT_QUERY + " ON DUPLICATE KEY UPDATE id = LAST_INSERT_ID(id)"
+        with db_cursor(commit=True) as cursor:
+            cursor.execute(query, CompanyModel._insert_params(company_data, user_id))
+            # Affected rows: 1 for a fresh insert, 0 when the existing row was kept
+            created = cursor.rowcount == 1
+            company_id = cursor.lastrowid
+            if created:
+                StatsModel.apply_deltas(cursor, user_id, StatsModel.company_deltas(company_data, 1))
+            return company_id, created
+
+    @staticmethod
+    def get_company_names(after_id=0):
+        """Get (id, name) for every company with id > after_id, in id order"""
+        with db_cursor() as cursor:
+            cursor.execute("SELECT id, name FROM companies WHERE id > %s ORDER BY id", (after_id,))
+            return cursor.fetchall()
+
+    @staticmethod
+    def get_existing_ids(company_ids):
+        """The subset of company_ids that still exist, in one query"""
+        if not company_ids:
+            return set()
+        placeholders = ', '.join(['%s'] * len(company_ids))
+        with db_cursor() as cursor:
+            cursor.execute(f"SELECT id FROM companies WHERE id IN ({placeholders})", tuple(company_ids))
+            return {row[0] for row in cursor.fetchall()}
+
+    # Relevance weight of each searchable field
+    SEARCH_WEIGHTS = (('name', 4.0), ('industry', 2.0), ('location', 1.5), ('description', 1.0))
+
+    @staticmethod
+    def search_companies(user_id, search_term, limit=20, offset=0):
+        """
+        Full-text search over a user's companies, ranked by weighted relevance.
+        Every term must match; the last term is a prefix so partial input matches.
+        """
+        terms = re.findall(r'[0-9a-z]+', search_term.casefold())
+        if not terms:
+            return []
+
+        columns = """id, name, description, tier, industry, location, website,
+                     funding_stage, employee_count, revenue, created_at"""
+
+        # InnoDB ignores FULLTEXT tokens shorter than 3 characters
+        if all(len(term) < 3 for term in terms):
+            query = f"""
+                SELECT {columns}, 1.0 AS relevance
+                FROM companies
+                WHERE created_by = %s AND name_normalized LIKE %s
+                ORDER BY name_normalized, id
+                LIMIT %s OFFSET %s
+            """
+            params = (user_id, ' '.join(terms) + '%', limit, offset)
+        else:
+            boolean_query = ' '.join(
+                f"+{term}" if index < len(terms) - 1 else f"+{term}*"
+                for index, term in enumerate(terms) if len(term) >= 3
+            )
+            relevance = ' + '.join(
+                f"{weight} * MATCH({field}) AGAINST (%s IN BOOLEAN MODE)"
+                for field, weight in CompanyModel.SEARCH_WEIGHTS
+            )
+            query = f"""
+                SELECT {columns}, ({relevance}) AS relevance
+                FROM companies
+                WHERE created_by = %s
+                  AND MATCH(name, industry, description, location) AGAINST (%s IN BOOLEAN MODE)
+                ORDER BY relevance DESC, id DESC
+                LIMIT %s OFFSET %s
+            """
+            params = (boolean_query,) * len(CompanyModel.SEARCH_WEIGHTS) + (user_id, boolean_query, limit, offset)
+
+        with db_cursor(dictionary=True) as cursor:
+            cursor.execute(query, params)
+            companies = cursor.fetchall()
+
         for company in companies:
+            company['relevance'] = float(company['relevance'])
             if company['created_at']:
                 company['created_at'] = company['created_at'].isoformat()
-        
-        cursor.close()
-        conn.close()
-        return companies
\ No newline at end of file
+        return companies
+
+    @staticmethod
+    def get_companies_by_user(user_id, filters=None):
+        """Get all companies created by user, optionally filtered (see _filter_clauses)"""
+        clauses, params = CompanyModel._filter_clauses(user_id, filters)
+        with db_cursor(dictionary=True) as cursor:
+            cursor.execute(f"""
+                SELECT {CompanyModel.PAGE_COLUMNS}
+                FROM {CompanyModel.PAGE_FROM}
+                WHERE {' AND '.join(clauses)}
+                ORDER BY c.created_at DESC, c.id DESC
+            """, tuple(params))
+            return CompanyModel._with_read_flags(cursor.fetchall())
+
+    @staticmethod
+    def find_by_names(names):
+        """Find existing companies for many names in one query; returns {normalized name: row}"""
+        keys = list({normalize_company_name(name) for name in names if name})
+        if not keys:
+            return {}
+
+        placeholders = ', '.join(['%s'] * len(keys))
+        with db_cursor(dictionary=True) as cursor:
+            cursor.execute(
+                f"SELECT * FROM companies WHERE name_normalized IN ({placeholders})",
+                tuple(keys)
+            )
+            return {row['name_normalized']: row for row in cursor.fetchall()}
+
+    @staticmethod
+    def create_companies(companies, user_id):
+        """
+        Insert many companies in one transaction. Returns
+        {normalized name: (id, created)}; created is False for names that
+        already existed or were inserted concurrently.
+        """
+        if not companies:
+            return {}
+
+        rows = [CompanyModel._insert_params(company_data, user_id) for company_data in companies]
+        keys = list({row[1] for row in rows})
+        placeholders = ', '.join(['%s'] * len(keys))
+        query = CompanyModel.INSERT_QUERY + " ON DUPLICATE KEY UPDATE id = id"
+        with db_cursor(dictionary=True, commit=True) as cursor:
+            cursor.execute("SAVEPOINT create_companies")
+            # executemany rewrites this into a single multi-row INSERT; affected
+            # rows count only fresh inserts, duplicates are left untouched
+            cursor.executemany(query, rows)
+            if cursor.rowcount == len(rows):
+                created_keys = set(keys)
+            else:
+                # Some rows lost a race to concurrent inserts; redo the rows one
+                # by one so each affected-row count says which ones were new
+                cursor.execute("ROLLBACK TO SAVEPOINT create_companies")
+                created_keys = set()
+                for row in rows:
+                    cursor.execute(query, row)
+                    if cursor.rowcount == 1:
+                        created_keys.add(row[1])
+
+            deltas = []
+            for company_data, row in zip(companies, rows):
+                if row[1] in created_keys:
+                    deltas.extend(StatsModel.company_deltas(company_data, 1))
+            StatsModel.apply_deltas(cursor, user_id, deltas)
+            cursor.execute(
+                f"SELECT id, name_normalized FROM companies WHERE name_normalized IN ({placeholders})",
+                tuple(keys)
+            )
+            return {row['name_normalized']: (row['id'], row['name_normalized'] in created_keys)
+                    for row in cursor.fetchall()}
+
+    PAGE_COLUMNS = """c.id, c.name, c.description, c.tier, c.industry, c.location, c.website,
+                      c.funding_stage, c.employee_count, c.revenue, c.ctc, c.form_link, c.mode,
+                      DATE_FORMAT(c.last_date, '%Y-%m-%d') AS last_date,
+                      DATE_FORMAT(c.created_at, '%Y-%m-%dT%H:%i:%s') AS created_at,
+                      rs.company_id IS NOT NULL AS is_read"""
+
+    # Listing queries join the owner's read status; the listed user is always created_by
+    PAGE_FROM = """companies c
+                   LEFT JOIN read_status rs ON rs.user_id = c.created_by AND rs.company_id = c.id"""
+
+    @staticmethod
+    def delete_company(company_id, user_id):
+        """Delete a company owned by user; returns True if a row was deleted"""
+        with db_cursor(dictionary=True, commit=True) as cursor:
+            cursor.execute("""
+                SELECT c.tier, c.industry, c.created_at, rs.company_id IS NOT NULL AS is_read
+                FROM companies c
+                LEFT JOIN read_status rs ON rs.user_id = c.created_by AND rs.company_id = c.id
+                WHERE c.id = %s AND c.created_by = %s
+                FOR UPDATE
+            """, (company_id, user_id))
+            company = cursor.fetchone()
+            if company is None:
+                return False
+
+            cursor.execute("DELETE FROM companies WHERE id = %s", (company_id,))
+            deltas = StatsModel.company_deltas(company, -1, created_on=company['created_at'].date())
+            if company['is_read']:
+                deltas.append(('read', '', -1))
+            StatsModel.apply_deltas(cursor, user_id, deltas)
+            return True
+
+    # Columns update_company may change; the name is the dedup key and stays fixed
+    UPDATABLE_COLUMNS = ('description', 'website', 'industry', 'tier', 'location',
+                         'funding_stage', 'employee_count', 'revenue', 'ctc', 'form_link', 'mode', 'last_date')
+
+    @staticmethod
+    def update_company(company_id, updates, user_id):
+        """Update fields of a company owned by user; returns True if it exists"""
+        with db_cursor(dictionary=True, commit=True) as cursor:
+            cursor.execute("""
+                SELECT tier, industry, created_at, extracted_data
+                FROM companies WHERE id = %s AND created_by = %s
+                FOR UPDATE
+            """, (company_id, user_id))
+            company = cursor.fetchone()
+            if company is None:
+                return False
+
+            columns = [column for column in CompanyModel.UPDATABLE_COLUMNS if column in updates]
+            extracted = json.loads(company['extracted_data'] or '{}')
+            extracted.update(updates)
+            assignments = ', '.join(f"{column} = %s" for column in columns + ['extracted_data'])
+            params = [CompanyModel.column_value(column, updates[column]) for column in columns]
+            params += [json.dumps(extracted), company_id]
+            cursor.execute(f"UPDATE companies SET {assignments} WHERE id = %s", tuple(params))
+
+            if 'tier' in updates or 'industry' in updates:
+                created_on = company['created_at'].date()
+                new = {'tier': tier_label(updates.get('tier', company['tier'])),
+                       'industry': updates.get('industry', company['industry'])}
+                # Old and new buckets net out on total/day; only tier/industry move
+                StatsModel.apply_deltas(cursor, user_id,
+                                        StatsModel.company_deltas(company, -1, created_on) +
+                                        StatsModel.company_deltas(new, 1, created_on))
+            return True
+
+    @staticmethod
+    def _with_read_flags(companies):
+        for company in companies:
+            company['is_read'] = bool(company['is_read'])
+        return companies
+
+    @staticmethod
+    def encode_cursor(created_at, company_id):
+        """Opaque keyset cursor for the row (created_at, id)"""
+        raw = json.dumps([created_at, company_id]).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii')
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """Inverse of encode_cursor; raises ValueError on a malformed cursor"""
+        try:
+            created_at, company_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+            return str(created_at), int(company_id)
+        except Exception:
+            raise ValueError("Invalid cursor")
+
+    @staticmethod
+    def _filter_clauses(user_id, filters):
+        """WHERE clauses and params for the dashboard filters"""
+        clauses = ["c.created_by = %s"]
+        params = [user_id]
+        filters = filters or {}
+
+        if filters.get('tier'):
+            clauses.append("c.tier = %s")
+            params.append(filters['tier'])
+        if filters.get('industry'):
+            clauses.append("c.industry = %s")
+            params.append(filters['industry'])
+        if filters.get('location'):
+            clauses.append("c.location LIKE %s")
+            params.append(filters['location'].replace('%', '').replace('_', '') + '%')
+        if filters.get('created_after'):
+            clauses.append("c.created_at >= %s")
+            params.append(filters['created_after'])
+        if filters.get('created_before'):
+            clauses.append("c.created_at < %s")
+            params.append(filters['created_before'])
+        if filters.get('read_status') == 'read':
+            clauses.append("rs.company_id IS NOT NULL")
+        elif filters.get('read_status') == 'unread':
+            clauses.append("rs.company_id IS NULL")
+
+        return clauses, params
+
+    @staticmethod
+    def get_companies_page(user_id, filters=None, cursor=None, page_size=20):
+        """
+        One page of a user's companies, newest first, using keyset pagination
+        on (created_at, id). Returns (companies, next_cursor or None).
+        """
+        clauses, params = CompanyModel._filter_clauses(user_id, filters)
+        if cursor:
+            created_at, company_id = CompanyModel.decode_cursor(cursor)
+            clauses.append("(c.created_at < %s OR (c.created_at = %s AND c.id < %s))")
+            params.extend([created_at, created_at, company_id])
+
+        query = f"""
+            SELECT {CompanyModel.PAGE_COLUMNS}
+            FROM {CompanyModel.PAGE_FROM}
+            WHERE {' AND '.join(clauses)}
+            ORDER BY c.created_at DESC, c.id DESC
+            LIMIT %s
+        """
+        # Fetch one extra row to know whether another page exists
+        params.append(page_size + 1)
+
+        with db_cursor(dictionary=True) as db:
+            db.execute(query, tuple(params))
+            companies = CompanyModel._with_read_flags(db.fetchall())
+
+        next_cursor = None
+        if len(companies) > page_size:
+            companies = companies[:page_size]
+            last = companies[-1]
+            next_cursor = CompanyModel.encode_cursor(last['created_at'], last['id'])
+        return companies, next_cursor
+
+
+class ReadStatusModel:
+    @staticmethod
+    def mark_read(user_id, company_ids):
+        """Mark the user's companies as read; returns how many were newly marked"""
+        if not company_ids:
+            return 0
+        placeholders = ', '.join(['%s'] * len(company_ids))
+        with db_cursor(commit=True) as cursor:
+            cursor.execute(f"""
+                INSERT IGNORE INTO read_status (user_id, company_id)
+                SELECT created_by, id FROM companies
+                WHERE created_by = %s AND id IN ({placeholders})
+            """, (user_id, *company_ids))
+            marked = cursor.rowcount
+            StatsModel.apply_deltas(cursor, user_id, [('read', '', marked)])
+            return marked
+
+    @staticmethod
+    def mark_unread(user_id, company_ids):
+        """Remove read marks; returns how many were removed"""
+        if not company_ids:
+            return 0
+        placeholders = ', '.join(['%s'] * len(company_ids))
+        with db_cursor(commit=True) as cursor:
+            cursor.execute(
+                f"DELETE FROM read_status WHERE user_id = %s AND company_id IN ({placeholders})",
+                (user_id, *company_ids)
+            )
+            removed = cursor.rowcount
+            StatsModel.apply_deltas(cursor, user_id, [('read', '', -removed)])
+            return removed
+
+    @staticmethod
+    def get_read_map(user_id, company_ids):
+        """Read timestamps for many companies in one query; returns {company_id: read_at}"""
+        if not company_ids:
+            return {}
+        placeholders = ', '.join(['%s'] * len(company_ids))
+        with db_cursor() as cursor:
+            cursor.execute(
+                f"SELECT company_id, read_at FROM read_status WHERE user_id = %s AND company_id IN ({placeholders})",
+                (user_id, *company_ids)
+            )
+            return {company_id: read_at for company_id, read_at in cursor.fetchall()}
+
+    @staticmethod
+    def get_read_company_ids(user_id):
+        """Get ids of every company the user has read"""
+        with db_cursor() as cursor:
+            cursor.execute("SELECT company_id FROM read_status WHERE user_id = %s", (user_id,))
+            return [row[0] for row in cursor.fetchall()]
+
+
+class StatsModel:
+    """
+    Pre-aggregated per-user counters in company_stats, keyed on
+    (user_id, dimension, bucket). Dimensions: total, tier, industry, read, day.
+    Writers call apply_deltas() on their own cursor so counters change in
+    the same transaction as the rows they count.
+    """
+
+    BUCKET_LENGTH = 100
+
+    @staticmethod
+    def company_deltas(company_data, sign, created_on=None):
+        """Counter changes for adding (sign=1) or removing (sign=-1) a company"""
+        created_on = created_on or date.today()
+        return [
+            ('total', '', sign),
+            ('tier', tier_label(company_data.get('tier')), sign),
+            ('industry', (company_data.get('industry') or 'Unknown')[:StatsModel.BUCKET_LENGTH], sign),
+            ('day', created_on.isoformat(), sign),
+        ]
+
+    @staticmethod
+    def apply_deltas(cursor, user_id, deltas):
+        """Add deltas [(dimension, bucket, delta), ...] to the user's counters"""
+        merged = {}
+        for dimension, bucket, delta in deltas:
+            merged[(dimension, bucket)] = merged.get((dimension, bucket), 0) + delta
+        rows = [(user_id, dimension, bucket, delta) for (dimension, bucket), delta in merged.items() if delta]
+        if not rows:
+            return
+        cursor.executemany("""
+            INSERT INTO company_stats (user_id, dimension, bucket, count)
+            VALUES (%s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE count = count + VALUES(count)
+        """, rows)
+
+    @staticmethod
+    def rebuild_user(cursor, user_id):
+        """Recompute a user's counters from the source tables"""
+        # Same bucket as company_deltas: a missing or empty industry counts as 'Unknown'
+        industry = f"LEFT(COALESCE(NULLIF(industry, ''), 'Unknown'), {StatsModel.BUCKET_LENGTH})"
+        cursor.execute("DELETE FROM company_stats WHERE user_id = %s", (user_id,))
+        cursor.execute(f"""
+            INSERT INTO company_stats (user_id, dimension, bucket, count)
+            SELECT created_by, 'total', '', COUNT(*)
+                FROM companies WHERE created_by = %s GROUP BY created_by
+            UNION ALL
+            SELECT created_by, 'tier', COALESCE(tier, 'tier3'), COUNT(*)
+                FROM companies WHERE created_by = %s GROUP BY created_by, COALESCE(tier, 'tier3')
+            UNION ALL
+            SELECT created_by, 'industry', {industry}, COUNT(*)
+                FROM companies WHERE created_by = %s GROUP BY created_by, {industry}
+            UNION ALL
+            SELECT created_by, 'day', CAST(DATE(created_at) AS CHAR), COUNT(*)
+                FROM companies WHERE created_by = %s GROUP BY created_by, DATE(created_at)
+            UNION ALL
+            SELECT rs.user_id, 'read', '', COUNT(*)
+                FROM read_status rs JOIN companies c ON c.id = rs.company_id AND c.created_by = rs.user_id
+                WHERE rs.user_id = %s GROUP BY rs.user_id
+        """, (user_id,) * 5)
+
+    @staticmethod
+    def reconcile_user(user_id):
+        """Rebuild one user's counters in its own transaction"""
+        with db_cursor(commit=True) as cursor:
+            StatsModel.rebuild_user(cursor, user_id)
+
+    @staticmethod
+    def get_user_ids():
+        """Ids of every user that owns companies or has counters"""
+        with db_cursor() as cursor:
+            cursor.execute("""
+                SELECT created_by FROM companies WHERE created_by IS NOT NULL GROUP BY created_by
+                UNION
+                SELECT user_id FROM company_stats GROUP BY user_id
+            """)
+            return [row[0] for row in cursor.fetchall()]
+
+    @staticmethod
+    def get_stats(user_id):
+        """All counters for a user as {dimension: {bucket: count}}"""
+        with db_cursor() as cursor:
+            cursor.execute(
+                "SELECT dimension, bucket, count FROM company_stats WHERE user_id = %s AND count <> 0",
+                (user_id,)
+            )
+            stats = {}
+            for dimension, bucket, count in cursor.fetchall():
+                stats.setdefault(dimension, {})[bucket] = count
+            return stats
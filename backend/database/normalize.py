@@ -0,0 +1,42 @@
+import re
+import unicodedata
+
+# Legal-form suffixes that do not distinguish one company from another
+COMPANY_SUFFIXES = {
+    'pvt', 'private', 'ltd', 'limited', 'inc', 'incorporated', 'llc', 'llp',
+    'corp', 'corporation', 'co', 'company', 'plc', 'gmbh', 'ag', 'sa', 'bv',
+}
+
+_NON_ALNUM_RE = re.compile(r'[^0-9a-z]+')
+
+
+def normalize_tokens(text):
+    """Casefolded, accent-free alphanumeric tokens of a piece of text"""
+    if not text:
+        return []
+
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+    text = text.replace('&', ' and ')
+    return _NON_ALNUM_RE.sub(' ', text).split()
+
+
+def normalize_company_name(name):
+    """
+    Build the dedup key for a company name.
+
+    Case, accents, punctuation and trailing legal suffixes are dropped, so
+    "Google LLC", "google, inc." and "GOOGLE" all map to "google". Names
+    with no Latin letters or digits ("株式会社トヨタ") keep their own
+    characters, NFKC-normalized and casefolded.
+    """
+    tokens = normalize_tokens(name)
+    if not tokens:
+        return ' '.join(unicodedata.normalize('NFKC', name or '').casefold().split())[:255]
+
+    stripped = list(tokens)
+    while stripped and stripped[-1] in COMPANY_SUFFIXES:
+        stripped.pop()
+
+    # A name made only of suffix words ("The Company") keeps its tokens
+    return ' '.join(stripped or tokens)[:255]
@@ -0,0 +1,175 @@
+"""
+The PlaceBuddy schema and the process-wide SQLAlchemy engine.
+
+Both entry points use this module: the backend borrows raw connections
+from the engine's pool for its hand-written SQL (database.connection), and
+api_server.py uses the tables below directly, so there is one schema and
+one set of pooled connections per process.
+
+Tiers are stored as labels ('tier1'..'tier3'); tier_label() and
+tier_number() convert from and to the integer tiers api_server.py exposes.
+"""
+import threading
+import time
+from urllib.parse import quote_plus
+
+from sqlalchemy import (JSON, TIMESTAMP, Column, Date, Float, ForeignKey, Index, Integer, MetaData,
+                        PrimaryKeyConstraint, String, Table, Text, UniqueConstraint, create_engine, event, exc,
+                        func)
+
+from mysql.connector.constants import ClientFlag
+
+from async_support import is_cooperative
+from config import config
+
+metadata = MetaData()
+
+users = Table(
+    'users', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('username', String(50), nullable=False, unique=True),
+    Column('email', String(100), nullable=False, unique=True),
+    Column('password_hash', String(255), nullable=False),
+    Column('created_at', TIMESTAMP, nullable=False, server_default=func.current_timestamp())
+)
+
+admins = Table(
+    'admins', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('name', String(50), nullable=False, unique=True),
+    Column('password_hash', String(256), nullable=False)
+)
+
+companies = Table(
+    'companies', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('name', String(255), nullable=False),
+    Column('name_normalized', String(255)),
+    Column('description', Text),
+    Column('website', String(255)),
+    Column('industry', String(100)),
+    Column('tier', String(20), server_default='tier3'),
+    Column('location', String(255)),
+    Column('funding_stage', String(50)),
+    Column('employee_count', String(50)),
+    Column('revenue', String(100)),
+    Column('ctc', Float),
+    Column('form_link', Text),
+    Column('mode', String(50)),
+    Column('last_date', Date),
+    Column('extracted_data', JSON),
+    Column('created_by', Integer),
+    Column('created_at', TIMESTAMP, nullable=False, server_default=func.current_timestamp()),
+    UniqueConstraint('name_normalized', name='uq_companies_name_normalized'),
+    # Per-user keyset pagination on (created_at, id)
+    Index('idx_companies_user_created', 'created_by', 'created_at', 'id'),
+    Index('idx_companies_tier', 'tier'),
+    Index('idx_companies_last_date', 'last_date')
+)
+
+# Companies folded into another row with the same name_normalized, kept so no owner's data is lost
+merged_companies = Table(
+    'merged_companies', metadata,
+    Column('company_id', Integer, primary_key=True),
+    Column('survivor_id', Integer, nullable=False),
+    Column('created_by', Integer),
+    Column('data', JSON, nullable=False),
+    Column('merged_at', TIMESTAMP, nullable=False, server_default=func.current_timestamp())
+)
+
+read_status = Table(
+    'read_status', metadata,
+    Column('user_id', Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+    Column('company_id', Integer, ForeignKey('companies.id', ondelete='CASCADE'), nullable=False),
+    Column('read_at', TIMESTAMP, nullable=False, server_default=func.current_timestamp()),
+    PrimaryKeyConstraint('user_id', 'company_id'),
+    Index('idx_read_status_company', 'company_id')
+)
+
+company_stats = Table(
+    'company_stats', metadata,
+    Column('user_id', Integer, nullable=False),
+    Column('dimension', String(20), nullable=False),
+    Column('bucket', String(100), nullable=False),
+    Column('count', Integer, nullable=False, server_default='0'),
+    PrimaryKeyConstraint('user_id', 'dimension', 'bucket')
+)
+
+TIERS = ('tier1', 'tier2', 'tier3')
+DEFAULT_TIER = 'tier3'
+
+
+def tier_label(tier) -> str:
+    """'tier1'..'tier3' from a label or an integer tier (1..3); unknown values map to the default"""
+    if isinstance(tier, str) and tier.strip().lower() in TIERS:
+        return tier.strip().lower()
+    try:
+        number = int(str(tier).strip().lower().replace('tier', ''))
+    except (TypeError, ValueError):
+        return DEFAULT_TIER
+    return f"tier{number}" if 1 <= number <= len(TIERS) else DEFAULT_TIER
+
+
+def tier_number(tier) -> int:
+    """Integer tier (1..3) for a stored label"""
+    return TIERS.index(tier_label(tier)) + 1
+
+
+def database_url() -> str:
+    return (f"mysql+mysqlconnector://{config.DB_USERNAME}:{quote_plus(config.DB_PASSWORD or '')}"
+            f"@{config.DB_HOST}:{config.DB_PORT}/{config.DB_NAME}")
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """
+    Get the process-wide engine, creating it on first use.
+
+    Connections are recycled after DB_POOL_RECYCLE seconds and pinged on
+    checkout only when they have been idle longer than DB_POOL_PING_INTERVAL,
+    so a busy pool pays no extra round trip. Compiled Core statements are
+    cached (DB_QUERY_CACHE_SIZE entries) and reused across calls.
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = _create_engine()
+    return _engine
+
+
+def _create_engine():
+    ping_interval = getattr(config, 'DB_POOL_PING_INTERVAL', 30)
+    engine = create_engine(
+        database_url(),
+        pool_size=getattr(config, 'DB_POOL_SIZE', 10),
+        max_overflow=0,
+        pool_timeout=getattr(config, 'DB_POOL_TIMEOUT', 10.0),
+        pool_recycle=getattr(config, 'DB_POOL_RECYCLE', 1800),
+        query_cache_size=getattr(config, 'DB_QUERY_CACHE_SIZE', 500),
+        connect_args={
+            # The C extension blocks the event loop; the pure driver uses patched sockets
+            'use_pure': is_cooperative(),
+            # The dialect turns FOUND_ROWS on, which makes ON DUPLICATE KEY UPDATE report
+            # a kept row as affected; the models tell inserts from duplicates by rowcount
+            'client_flags': ClientFlag.get_default() & ~ClientFlag.FOUND_ROWS
+        }
+    )
+
+    @event.listens_for(engine, 'checkin')
+    def _mark_idle(dbapi_connection, record):
+        record.info['last_used'] = time.monotonic()
+
+    @event.listens_for(engine, 'checkout')
+    def _ping_if_idle(dbapi_connection, record, proxy):
+        if time.monotonic() - record.info.get('last_used', time.monotonic()) > ping_interval:
+            try:
+                dbapi_connection.ping(reconnect=False)
+            except Exception:
+                # The pool discards this connection and checks out another
+                raise exc.DisconnectionError()
+
+    return engine
@@ -0,0 +1,215 @@
+"""
+In-process metrics in the Prometheus text format, served on /metrics.
+
+Recording is a dict lookup and a few additions under a per-metric lock, so
+instrumentation stays on in production. Values owned by other components
+(pool usage, socket count, cache counters) are read through callbacks only
+when /metrics is scraped.
+
+    STAGE_SECONDS.labels(stage='llm').observe(0.8)
+    with STAGE_SECONDS.labels(stage='insert').time():
+        ...
+"""
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds; spans fast index lookups up to slow LLM calls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(labelnames, labelvalues, extra=None):
+    pairs = list(zip(labelnames, labelvalues))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value))
+
+
+class _Metric:
+    type_name = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        self._callback = None
+
+    def labels(self, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def set_function(self, func):
+        """
+        Read values at scrape time instead of recording them. func returns a
+        number, or a dict mapping label values (tuples for several labels) to
+        numbers.
+        """
+        self._callback = func
+
+    def _default(self):
+        return self.labels() if not self.labelnames else None
+
+    def _samples(self):
+        if self._callback is not None:
+            try:
+                values = self._callback()
+            except Exception:
+                return []
+            if not isinstance(values, dict):
+                return [('', (), values)]
+            return [('', key if isinstance(key, tuple) else (key,), value) for key, value in values.items()]
+        with self._lock:
+            children = list(self._children.items())
+        return [sample for key, child in children for sample in child.samples(key)]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        for suffix, labelvalues, value, *extra in self._samples():
+            labels = _format_labels(self.labelnames, labelvalues, extra[0] if extra else None)
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return '\n'.join(lines)
+
+
+class _Value:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+    def set(self, value):
+        self.value = value
+
+    def samples(self, key):
+        return [('', key, self.value)]
+
+
+class Counter(_Metric):
+    type_name = 'counter'
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount=1):
+        self._default().inc(amount)
+
+
+class Gauge(_Metric):
+    type_name = 'gauge'
+
+    def _new_child(self):
+        return _Value()
+
+    def set(self, value):
+        self._default().set(value)
+
+
+class _HistogramValue:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += seconds
+
+    @contextmanager
+    def time(self):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+    def samples(self, key):
+        with self._lock:
+            counts, total = list(self.counts), self.sum
+        samples, cumulative = [], 0
+        for bound, count in zip(self.buckets + (math.inf,), counts):
+            cumulative += count
+            samples.append(('_bucket', key, cumulative, ('le', _format_value(bound))))
+        samples.append(('_sum', key, total))
+        samples.append(('_count', key, cumulative))
+        return samples
+
+
+class Histogram(_Metric):
+    type_name = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, seconds):
+        self._default().observe(seconds)
+
+    def time(self):
+        return self._default().time()
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        return '\n'.join(metric.render() for metric in self._metrics) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def counter(name, documentation, labelnames=()):
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name, documentation, labelnames=()):
+    return REGISTRY.register(Gauge(name, documentation, labelnames))
+
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+def render():
+    """All metrics in the Prometheus text exposition format"""
+    return REGISTRY.render()
+
+
+# Shared metrics for the process_text path and the API
+STAGE_SECONDS = histogram('placebuddy_stage_seconds', 'Time spent per processing stage', ['stage'])
+REQUEST_SECONDS = histogram('placebuddy_http_request_seconds', 'HTTP handler latency', ['endpoint'])
+COMPANIES = counter('placebuddy_companies_total', 'Processed companies by outcome', ['result'])
+ERRORS = counter('placebuddy_errors_total', 'Errors by stage', ['stage'])
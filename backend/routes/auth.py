@@ -1,12 +1,30 @@
-from flask import Blueprint, request, jsonify
-import bcrypt
-import jwt
-from datetime import datetime, timedelta
+from functools import wraps
+from flask import Blueprint, request, jsonify, g
 from database.models import UserModel
-from config import config
+from metrics import ERRORS
+from services.password_service import PasswordHasherBusyError, get_password_hasher
+from services.token_service import InvalidTokenError, get_token_service
 
 auth_bp = Blueprint('auth', __name__)
 
+def require_auth(view):
+    """Reject requests without a valid Bearer token; verified claims are put in g.user"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        header = request.headers.get('Authorization', '')
+        token = header[7:].strip() if header.startswith('Bearer ') else None
+        try:
+            g.user = get_token_service().verify(token)
+        except InvalidTokenError as e:
+            return jsonify({'message': str(e)}), 401
+        return view(*args, **kwargs)
+    return wrapper
+
+def _busy_response(error):
+    response = jsonify({'message': str(error), 'retry_after': error.retry_after})
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response, 503
+
 @auth_bp.route('/register', methods=['POST'])
 def register():
     try:
@@ -26,13 +44,17 @@ def register():
         if UserModel.find_by_username_or_email(username, email):
             return jsonify({'message': 'Username or email already exists'}), 409
         
-        # Hash password and create user
-        password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+        # Hash password (on the bcrypt pool) and create user
+        password_hash = get_password_hasher().hash(password)
         user_id = UserModel.create_user(username, email, password_hash)
         
         return jsonify({'message': 'User registered successfully', 'user_id': user_id}), 201
         
+    except PasswordHasherBusyError as e:
+        ERRORS.labels(stage='auth_busy').inc()
+        return _busy_response(e)
     except Exception as e:
+        ERRORS.labels(stage='auth').inc()
         print(f"Registration error: {e}")
         return jsonify({'message': f'Registration failed: {str(e)}'}), 500
 
@@ -48,17 +70,20 @@ def login():
         
         # Find user
         user = UserModel.find_by_username(username)
+        hasher = get_password_hasher()
         
-        if not user or not bcrypt.checkpw(password.encode('utf-8'), user['password_hash'].encode('utf-8')):
+        if not user or not hasher.verify(password, user['password_hash']):
             return jsonify({'message': 'Invalid username or password'}), 401
         
+        # Upgrade the stored hash if the work factor has changed since it was created
+        if hasher.needs_rehash(user['password_hash']):
+            user_id = user['id']
+            hasher.rehash_in_background(
+                password, lambda new_hash: UserModel.update_password_hash(user_id, new_hash)
+            )
+        
         # Generate JWT token
-        token_payload = {
-            'user_id': user['id'],
-            'username': user['username'],
-            'exp': datetime.utcnow() + timedelta(hours=config.JWT_EXPIRATION_HOURS)
-        }
-        token = jwt.encode(token_payload, config.SECRET_KEY, algorithm='HS256')
+        token = get_token_service().issue(user)
         
         return jsonify({
             'message': 'Login successful',
@@ -70,6 +95,10 @@ def login():
             }
         }), 200
         
+    except PasswordHasherBusyError as e:
+        ERRORS.labels(stage='auth_busy').inc()
+        return _busy_response(e)
     except Exception as e:
+        ERRORS.labels(stage='auth').inc()
         print(f"Login error: {e}")
         return jsonify({'message': f'Login failed: {str(e)}'}), 500
\ No newline at end of file
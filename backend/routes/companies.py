@@ -0,0 +1,109 @@
+import os
+import tempfile
+from flask import Blueprint, current_app, request, jsonify, g
+from routes.auth import require_auth
+from services.batch_service import run_batch_job
+from services.company_service import CompanyService, ReadStatusService
+from services.job_service import PRIORITY_BULK
+from services.posting_splitter import SUPPORTED_EXTENSIONS, iter_file_postings
+from services.rate_limiter import AdmissionError, get_rate_limiter
+from websocket.feed import compact_counters, get_feed_publisher
+from config import config
+
+companies_bp = Blueprint('companies', __name__)
+
+FILTER_PARAMS = ('tier', 'industry', 'location', 'read_status', 'created_after', 'created_before')
+
+@companies_bp.route('', methods=['GET'])
+@require_auth
+def list_companies():
+    try:
+        user_id = g.user['user_id']
+        filters = {name: request.args[name] for name in FILTER_PARAMS if request.args.get(name)}
+        page_size = request.args.get('page_size', getattr(config, 'COMPANIES_PAGE_SIZE', 20), type=int)
+        cursor = request.args.get('cursor')
+
+        page = CompanyService().get_user_companies_page(user_id, filters, cursor, page_size)
+        return jsonify(page), 200
+
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        print(f"List companies error: {e}")
+        return jsonify({'message': f'Could not load companies: {str(e)}'}), 500
+
+@companies_bp.route('/stats', methods=['GET'])
+@require_auth
+def company_stats():
+    return jsonify(CompanyService().get_company_stats(g.user['user_id'])), 200
+
+def _read_status_update(mark, is_read):
+    data = request.get_json() or {}
+    user_id = g.user['user_id']
+    company_ids = data.get('company_ids') or []
+
+    if not isinstance(company_ids, list) or not company_ids:
+        return jsonify({'message': 'A non-empty company_ids list is required'}), 400
+
+    try:
+        company_ids = [int(company_id) for company_id in company_ids]
+    except (TypeError, ValueError):
+        return jsonify({'message': 'company_ids must be integers'}), 400
+
+    if not mark(user_id, company_ids):
+        return jsonify({'message': 'Could not update read status'}), 500
+
+    # Keep the user's other tabs and devices in sync without a refetch
+    feed = get_feed_publisher()
+    if feed:
+        counters = compact_counters(CompanyService().get_company_stats(user_id))
+        feed.counters_updated(user_id, counters, company_ids, is_read)
+    return jsonify({'message': 'Read status updated', 'company_ids': company_ids}), 200
+
+@companies_bp.route('/read', methods=['POST'])
+@require_auth
+def mark_read():
+    return _read_status_update(ReadStatusService.mark_many_as_read, True)
+
+@companies_bp.route('/unread', methods=['POST'])
+@require_auth
+def mark_unread():
+    return _read_status_update(ReadStatusService.mark_many_as_unread, False)
+
+@companies_bp.route('/upload', methods=['POST'])
+@require_auth
+def upload_postings():
+    upload = request.files.get('file')
+    if upload is None or not upload.filename:
+        return jsonify({'message': 'A file is required'}), 400
+
+    extension = os.path.splitext(upload.filename)[1].lower()
+    if extension not in SUPPORTED_EXTENSIONS:
+        return jsonify({'message': f"Unsupported file type, expected one of {', '.join(SUPPORTED_EXTENSIONS)}"}), 400
+
+    user_id = g.user['user_id']
+    # Copied to disk in chunks; the job reads it back one posting at a time and deletes it
+    handle, path = tempfile.mkstemp(prefix='placebuddy-upload-', suffix=extension)
+    os.close(handle)
+
+    def remove_upload():
+        if os.path.exists(path):
+            os.remove(path)
+
+    try:
+        upload.save(path)
+        get_rate_limiter().check(user_id)
+        job_manager = current_app.extensions['job_manager']
+        job = job_manager.submit(user_id, None, run_batch_job, job_manager, iter_file_postings(path),
+                                 user_id, get_feed_publisher(), priority=PRIORITY_BULK, cleanup=remove_upload)
+    except AdmissionError as e:
+        remove_upload()
+        response = jsonify({'message': str(e), 'retry_after': e.retry_after})
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, 503
+    except Exception as e:
+        remove_upload()
+        print(f"Upload error: {e}")
+        return jsonify({'message': f'Could not queue upload: {str(e)}'}), 500
+
+    return jsonify({'message': 'Upload queued for processing', 'job_id': job.id}), 202
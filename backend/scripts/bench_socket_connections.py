@@ -0,0 +1,77 @@
+"""
+Idle WebSocket connection benchmark.
+
+Opens N authenticated Socket.IO clients against a running server, keeps
+them connected for a while and reports how many the server accepted and
+how long connecting took. Compare server modes with e.g.
+
+    SOCKETIO_ASYNC_MODE=threading python app.py
+    SOCKETIO_ASYNC_MODE=eventlet  python app.py
+    SOCKETIO_ASYNC_MODE=gevent    python app.py
+
+    python scripts/bench_socket_connections.py --token <JWT> --clients 2000
+
+Requires python-socketio[asyncio_client] on the client machine. Raise the
+open-file limit (ulimit -n) on both sides for large client counts.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import socketio
+
+
+async def open_client(url, token, latencies, errors):
+    client = socketio.AsyncClient(reconnection=False)
+    started = time.perf_counter()
+    try:
+        await client.connect(url, auth={'token': token}, transports=['websocket'], wait_timeout=30)
+        latencies.append((time.perf_counter() - started) * 1000)
+        return client
+    except Exception as e:
+        errors.append(str(e))
+        return None
+
+
+async def run(url, token, clients, ramp, hold):
+    latencies, errors = [], []
+    connected = []
+    started = time.perf_counter()
+
+    for offset in range(0, clients, ramp):
+        batch = [open_client(url, token, latencies, errors) for _ in range(min(ramp, clients - offset))]
+        connected.extend(client for client in await asyncio.gather(*batch) if client)
+        print(f"  {len(connected)} connected, {len(errors)} failed")
+
+    elapsed = time.perf_counter() - started
+    print(f"Holding {len(connected)} idle connections for {hold}s...")
+    await asyncio.sleep(hold)
+    still_connected = sum(1 for client in connected if client.connected)
+
+    await asyncio.gather(*(client.disconnect() for client in connected), return_exceptions=True)
+
+    print()
+    print(f"requested:        {clients}")
+    print(f"connected:        {len(connected)}")
+    print(f"failed:           {len(errors)}")
+    print(f"alive after hold: {still_connected}")
+    print(f"ramp-up time:     {elapsed:.1f}s")
+    if latencies:
+        latencies.sort()
+        print(f"connect p50:      {statistics.median(latencies):.0f}ms")
+        print(f"connect p99:      {latencies[int(len(latencies) * 0.99) - 1]:.0f}ms")
+    if errors:
+        print(f"first error:      {errors[0]}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark idle Socket.IO connections per server process')
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--token', required=True, help='JWT from POST /api/auth/login')
+    parser.add_argument('--clients', type=int, default=1000)
+    parser.add_argument('--ramp', type=int, default=100, help='connections opened concurrently per step')
+    parser.add_argument('--hold', type=float, default=30, help='seconds to keep connections open')
+    args = parser.parse_args()
+
+    asyncio.run(run(args.url, args.token, args.clients, args.ramp, args.hold))
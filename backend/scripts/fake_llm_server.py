@@ -0,0 +1,117 @@
+"""
+Local stand-in for an LLM model server.
+
+Speaks the protocol HTTPBackend expects (POST /extract, POST
+/extract/stream, GET /health) and can be made slow or flaky to exercise
+deadlines, retries, the circuit breaker and hedging:
+
+    python scripts/fake_llm_server.py --port 8001 --latency 0.3 --slow-rate 0.05 --slow-latency 3
+    python scripts/fake_llm_server.py --port 8002 --latency 0.3
+
+    LLM_BACKEND=http LLM_URLS=http://localhost:8001,http://localhost:8002 LLM_HEDGE=True
+
+The server can also be started in-process from tests with start_server().
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_NAME_RE = re.compile(r'\b([A-Z][A-Za-z0-9&.]+(?:\s+[A-Z][A-Za-z0-9&.]+)*)')
+
+
+def fake_extract(text):
+    """Pretend extraction: the first capitalised phrase is the company name"""
+    match = _NAME_RE.search(text)
+    return {
+        'name': match.group(1) if match else 'Unknown Company',
+        'industry': 'Technology',
+        'tier': 'tier3',
+        'description': text[:200]
+    }
+
+
+def make_handler(latency=0.1, jitter=0.0, slow_rate=0.0, slow_latency=2.0, error_rate=0.0):
+    class FakeLLMHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # keep-alive, like a real model server
+
+        def do_GET(self):
+            if self.path == '/health':
+                self._reply(200, {'status': 'ok'})
+            else:
+                self._reply(404, {'error': 'not found'})
+
+        def do_POST(self):
+            if self.path not in ('/extract', '/extract/stream'):
+                self._reply(404, {'error': 'not found'})
+                return
+            length = int(self.headers.get('Content-Length', 0))
+            payload = json.loads(self.rfile.read(length) or b'{}')
+            if self.path == '/extract/stream':
+                self._stream(fake_extract(payload.get('text', '')))
+                return
+
+            delay = latency + random.uniform(0, jitter)
+            if random.random() < slow_rate:
+                delay = slow_latency
+            time.sleep(delay)
+
+            if random.random() < error_rate:
+                self._reply(503, {'error': 'overloaded'})
+                return
+            self._reply(200, {'results': [fake_extract(text) for text in payload.get('texts', [])]})
+
+        def _stream(self, result):
+            # Newline-delimited fields in chunked encoding, spread over the latency
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/x-ndjson')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            for field, value in result.items():
+                time.sleep((latency + random.uniform(0, jitter)) / len(result))
+                line = json.dumps({'field': field, 'value': value}).encode('utf-8') + b'\n'
+                self.wfile.write(f"{len(line):x}\r\n".encode('ascii') + line + b'\r\n')
+                self.wfile.flush()
+            self.wfile.write(b'0\r\n\r\n')
+
+        def _reply(self, status, body):
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return FakeLLMHandler
+
+
+def start_server(port=0, **behaviour):
+    """Serve on a background thread; returns (server, base_url)"""
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(**behaviour))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='fake-llm', daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fake LLM extraction server')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--latency', type=float, default=0.1, help='base seconds per request')
+    parser.add_argument('--jitter', type=float, default=0.0, help='extra random seconds per request')
+    parser.add_argument('--slow-rate', type=float, default=0.0, help='fraction of requests that are slow')
+    parser.add_argument('--slow-latency', type=float, default=2.0, help='seconds for a slow request')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests answered 503')
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('0.0.0.0', args.port), make_handler(
+        latency=args.latency, jitter=args.jitter, slow_rate=args.slow_rate,
+        slow_latency=args.slow_latency, error_rate=args.error_rate
+    ))
+    print(f"Fake LLM server listening on http://0.0.0.0:{args.port}")
+    server.serve_forever()
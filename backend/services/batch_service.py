@@ -0,0 +1,177 @@
+import itertools
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+
+from config import config
+from metrics import STAGE_SECONDS
+from services.company_service import CompanyService
+from services.llm_service import LLMService
+from websocket.feed import company_row, compact_counters
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class BatchProcessor:
+    """
+    Runs a stream of postings through extraction and dedup in parallel.
+
+    Postings are pulled from the iterable lazily and grouped into chunks of
+    ``chunk_size``; each chunk is one cached/batched LLM call plus one
+    multi-row insert, and up to ``workers`` chunks run at once. At most
+    ``workers`` chunks are read ahead, so memory stays bounded however long
+    the input is. Results are handed to ``on_item`` as each chunk finishes,
+    always from the calling thread.
+    """
+
+    def __init__(self, llm_service: Optional[LLMService] = None, company_service: Optional[CompanyService] = None,
+                 chunk_size: int = 8, workers: int = 4, max_postings: int = 1000):
+        self.llm_service = llm_service or LLMService()
+        self.company_service = company_service or CompanyService()
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.max_postings = max_postings
+
+    def run(self, postings: Iterable[str], user_id: int, on_item: Callable[[Dict], None]) -> Dict:
+        """
+        Process every posting and report each result
+
+        Args:
+            postings (iterable): Posting texts, consumed lazily
+            user_id (int): ID of the user adding the companies
+            on_item (callable): Called with one result dict per posting
+
+        Returns:
+            dict: Totals for the batch (total, created, duplicates, failed, truncated)
+        """
+        summary = {'total': 0, 'created': 0, 'duplicates': 0, 'failed': 0, 'truncated': False}
+        started = time.perf_counter()
+        numbered = enumerate(itertools.islice(postings, self.max_postings + 1))
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='batch') as pool:
+            pending = set()
+            exhausted = False
+            while pending or not exhausted:
+                # Keep the pool busy without reading more of the input than it can use
+                while not exhausted and len(pending) < self.workers:
+                    chunk = list(itertools.islice(numbered, self.chunk_size))
+                    if chunk and chunk[-1][0] >= self.max_postings:
+                        summary['truncated'] = True
+                        chunk = chunk[:-1]
+                        exhausted = True
+                    elif len(chunk) < self.chunk_size:
+                        exhausted = True
+                    if chunk:
+                        pending.add(pool.submit(self._process_chunk, chunk, user_id))
+                if not pending:
+                    break
+
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    for item in future.result():
+                        summary['total'] += 1
+                        if item['status'] == 'created':
+                            summary['created'] += 1
+                        elif item['status'] == 'duplicate':
+                            summary['duplicates'] += 1
+                        else:
+                            summary['failed'] += 1
+                        on_item(item)
+
+        summary['elapsed_seconds'] = round(time.perf_counter() - started, 3)
+        return summary
+
+    def _process_chunk(self, chunk: List, user_id: int) -> List[Dict]:
+        """Extract and store one chunk; failures are reported per item, never raised"""
+        indexes = [index for index, _ in chunk]
+        texts = [text for _, text in chunk]
+        try:
+            extracted = self.llm_service.extract_company_info_many(texts)
+        except Exception as e:
+            logger.error(f"Batch extraction failed: {str(e)}")
+            return [self._failed(index, f'Extraction failed: {str(e)}') for index in indexes]
+
+        items = {}
+        named = []
+        for index, company_data in zip(indexes, extracted):
+            if company_data and company_data.get('name'):
+                named.append((index, company_data))
+            else:
+                items[index] = self._failed(index, 'Could not extract company information from text')
+
+        if named:
+            try:
+                results = self.company_service.process_companies_batch([data for _, data in named], user_id)
+            except Exception as e:
+                logger.error(f"Storing batch chunk failed: {str(e)}")
+                results = [{'error': f'Could not save company: {str(e)}'}] * len(named)
+            for (index, company_data), result in zip(named, results):
+                if result.get('error'):
+                    items[index] = self._failed(index, result['error'])
+                    continue
+                items[index] = {
+                    'index': index,
+                    'status': 'duplicate' if result.get('is_duplicate') else 'created',
+                    'company_id': result['company_id'],
+                    'company_name': company_data.get('name'),
+                    'tier': company_data.get('tier'),
+                    'company': company_data,
+                    'similar_companies': result.get('similar_companies', []),
+                    'created_at': datetime.now().isoformat()
+                }
+        return [items[index] for index in indexes]
+
+    @staticmethod
+    def _failed(index: int, error: str) -> Dict:
+        return {'index': index, 'status': 'failed', 'error': error}
+
+
+def create_batch_processor() -> BatchProcessor:
+    """Batch processor configured from config"""
+    return BatchProcessor(
+        chunk_size=getattr(config, 'BATCH_CHUNK_SIZE', 8),
+        workers=getattr(config, 'BATCH_WORKERS', 4),
+        max_postings=getattr(config, 'BATCH_MAX_POSTINGS', 1000)
+    )
+
+
+def run_batch_job(job, job_manager, postings: Iterable[str], user_id: int, feed=None):
+    """
+    Job function for process_batch and file uploads: streams a batch_item
+    message per posting as it finishes and a batch_complete summary at the end
+    """
+    job_manager.notify(job, {
+        'type': 'status',
+        'message': 'Splitting and processing postings...'
+    })
+
+    created = []
+
+    def on_item(item):
+        company = item.pop('company', None)
+        job_manager.notify(job, {'type': 'batch_item', 'result': item})
+        if item['status'] == 'created':
+            created.append((item['company_id'], company))
+
+    with STAGE_SECONDS.labels(stage='batch').time():
+        summary = create_batch_processor().run(postings, user_id, on_item)
+
+    if summary['total'] == 0:
+        job_manager.notify(job, {
+            'type': 'processing_error',
+            'error': 'No postings found in the input'
+        })
+        return
+
+    job_manager.notify(job, {'type': 'batch_complete', 'summary': summary})
+
+    if feed is not None and created:
+        # Imports can be large: one counters lookup for the whole batch
+        counters = compact_counters(CompanyService().get_company_stats(user_id))
+        for company_id, company in created:
+            feed.company_created(user_id, company_row(company_id, company), counters)
+
+    logger.info(f"Batch job {job.id} finished: {summary}")
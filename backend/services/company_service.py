@@ -1,7 +1,11 @@
 import logging
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
-from database.models import CompanyModel, UserModel
+from database.models import CompanyModel, ReadStatusModel, StatsModel, UserModel
+from database.normalize import normalize_company_name
+from services.near_duplicate import get_near_duplicate_index
+from config import config
+from metrics import COMPANIES, STAGE_SECONDS
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -9,6 +13,37 @@ logger = logging.getLogger(__name__)
 class CompanyService:
     """Service for company-related database operations"""
     
+    def __init__(self):
+        self.max_page_size = getattr(config, 'COMPANIES_MAX_PAGE_SIZE', 100)
+    
+    def find_similar_companies(self, company_name: str) -> List[Dict]:
+        """
+        Near-duplicate candidates for a company name, best first. These are
+        only reported; a company is a duplicate only when its normalized
+        name is already taken.
+        
+        Args:
+            company_name (str): Company name to check
+            
+        Returns:
+            list: Candidates, each {'company_id', 'name', 'score'}
+        """
+        return self.find_similar_companies_many([company_name])[0]
+    
+    def find_similar_companies_many(self, company_names: List[str]) -> List[List[Dict]]:
+        """Near-duplicate candidates for each name, with one existence check for all of them"""
+        near_index = get_near_duplicate_index()
+        with STAGE_SECONDS.labels(stage='dedup_query').time():
+            similar = [near_index.query(company_name) for company_name in company_names]
+        candidate_ids = {match['company_id'] for matches in similar for match in matches}
+        if not candidate_ids:
+            return similar
+        # The index can lag behind deletes made by other processes
+        existing = CompanyModel.get_existing_ids(list(candidate_ids))
+        for company_id in candidate_ids - existing:
+            near_index.remove(company_id)
+        return [[match for match in matches if match['company_id'] in existing] for matches in similar]
+    
     def process_company(self, company_data: Dict, user_id: int) -> Dict:
         """
         Process company data - check for duplicates and save if new
@@ -18,31 +53,36 @@ class CompanyService:
             user_id (int): ID of the user adding the company
             
         Returns:
-            dict: Result containing company_id and duplicate status
+            dict: Result containing company_id, duplicate status and
+                  near-duplicate candidates (similar_companies)
         """
         try:
             company_name = company_data.get('name')
             if not company_name:
                 raise ValueError("Company name is required")
             
-            # Check if company already exists
-            existing_company = CompanyModel.find_by_name(company_name)
+            similar = self.find_similar_companies(company_name)
             
-            if existing_company:
-                logger.info(f"Company '{company_name}' already exists with ID: {existing_company['id']}")
+            # Insert unless the normalized name already exists (single atomic statement)
+            with STAGE_SECONDS.labels(stage='insert').time():
+                company_id, created = CompanyModel.insert_or_get(company_data, user_id)
+            COMPANIES.labels(result='created' if created else 'duplicate').inc()
+            
+            if not created:
+                logger.info(f"Company '{company_name}' already exists with ID: {company_id}")
                 return {
-                    'company_id': existing_company['id'],
+                    'company_id': company_id,
                     'is_duplicate': True,
+                    'similar_companies': [match for match in similar if match['company_id'] != company_id],
                     'message': f"Company '{company_name}' already exists in database"
                 }
             
-            # Create new company
-            company_id = CompanyModel.create_company(company_data, user_id)
-            
+            get_near_duplicate_index().add(company_id, company_name)
             logger.info(f"Created new company '{company_name}' with ID: {company_id}")
             return {
                 'company_id': company_id,
                 'is_duplicate': False,
+                'similar_companies': similar,
                 'message': f"Successfully added new company '{company_name}'"
             }
             
@@ -50,6 +90,97 @@ class CompanyService:
             logger.error(f"Error processing company: {str(e)}")
             raise e
     
+    def process_companies_batch(self, companies_data: List[Dict], user_id: int) -> List[Dict]:
+        """
+        Process many extracted companies at once - one duplicate lookup and
+        one multi-row insert for the whole batch. Results match what
+        process_company returns for each item on its own.
+        
+        Args:
+            companies_data (list): Extracted company information dicts
+            user_id (int): ID of the user adding the companies
+            
+        Returns:
+            list: One result per input item, in order, with company_id,
+                  duplicate status and similar_companies (or an error for
+                  items without a name)
+        """
+        try:
+            results: List[Optional[Dict]] = [None] * len(companies_data)
+            first_seen = {}
+
+            for index, company_data in enumerate(companies_data):
+                company_name = (company_data.get('name') or '').strip()
+                if not company_name:
+                    results[index] = {
+                        'company_id': None,
+                        'is_duplicate': False,
+                        'error': 'Company name is required'
+                    }
+                    continue
+                key = normalize_company_name(company_name)
+                if key in first_seen:
+                    continue
+                first_seen[key] = index
+
+            names = [companies_data[index]['name'].strip() for index in first_seen.values()]
+            similar = dict(zip(first_seen, self.find_similar_companies_many(names)))
+            with STAGE_SECONDS.labels(stage='dedup_query').time():
+                existing = CompanyModel.find_by_names(list(first_seen))
+            to_create = [
+                dict(companies_data[index], name=companies_data[index]['name'].strip())
+                for key, index in first_seen.items() if key not in existing
+            ]
+
+            with STAGE_SECONDS.labels(stage='insert').time():
+                inserted = CompanyModel.create_companies(to_create, user_id)
+            near_index = get_near_duplicate_index()
+            for company_data in to_create:
+                company_id, created = inserted.get(normalize_company_name(company_data['name']), (None, False))
+                if created:
+                    near_index.add(company_id, company_data['name'])
+
+            created_count = 0
+            for index, company_data in enumerate(companies_data):
+                if results[index] is not None:
+                    continue
+                company_name = company_data['name'].strip()
+                key = normalize_company_name(company_name)
+                if key in existing:
+                    company_id, created = existing[key]['id'], False
+                else:
+                    company_id, created = inserted.get(key, (None, False))
+                # Only the first item with a name creates it; repeats in the batch are duplicates
+                created = created and first_seen[key] == index
+                if created:
+                    created_count += 1
+                    results[index] = {
+                        'company_id': company_id,
+                        'is_duplicate': False,
+                        'similar_companies': similar[key],
+                        'message': f"Successfully added new company '{company_name}'"
+                    }
+                else:
+                    results[index] = {
+                        'company_id': company_id,
+                        'is_duplicate': True,
+                        'similar_companies': [match for match in similar[key] if match['company_id'] != company_id],
+                        'message': f"Company '{company_name}' already exists in database"
+                    }
+
+            duplicates = sum(1 for result in results if result.get('is_duplicate'))
+            COMPANIES.labels(result='created').inc(created_count)
+            COMPANIES.labels(result='duplicate').inc(duplicates)
+            logger.info(
+                f"Processed batch of {len(companies_data)} companies: "
+                f"{created_count} new, {len(companies_data) - created_count} duplicate or invalid"
+            )
+            return results
+
+        except Exception as e:
+            logger.error(f"Error processing company batch: {str(e)}")
+            raise e
+    
     def get_user_companies(self, user_id: int, filters: Optional[Dict] = None) -> List[Dict]:
         """
         Get companies for a specific user with optional filters
@@ -62,37 +193,39 @@ class CompanyService:
             list: List of companies
         """
         try:
-            # Get base companies for user
-            companies = CompanyModel.get_companies_by_user(user_id)
-            
-            if not filters:
-                return companies
-            
-            # Apply filters
-            filtered_companies = []
-            for company in companies:
-                # Filter by tier
-                if filters.get('tier') and company['tier'] != filters['tier']:
-                    continue
-                
-                # Add read status if needed
-                if filters.get('read_status'):
-                    is_read = self.is_company_read(user_id, company['id'])
-                    company['is_read'] = is_read
-                    
-                    if filters['read_status'] == 'read' and not is_read:
-                        continue
-                    if filters['read_status'] == 'unread' and is_read:
-                        continue
-                
-                filtered_companies.append(company)
-            
-            return filtered_companies
+            # All filters, including read status, are applied in SQL
+            return CompanyModel.get_companies_by_user(user_id, filters)
             
         except Exception as e:
             logger.error(f"Error getting user companies: {str(e)}")
             return []
     
+    def get_user_companies_page(self, user_id: int, filters: Optional[Dict] = None,
+                                cursor: Optional[str] = None, page_size: int = 20) -> Dict:
+        """
+        Get one page of a user's companies, newest first, with filters applied in SQL
+        
+        Args:
+            user_id (int): User ID
+            filters (dict): Optional filters (tier, industry, location, read_status,
+                            created_after, created_before)
+            cursor (str): Cursor returned with the previous page, or None for the first page
+            page_size (int): Companies per page
+            
+        Returns:
+            dict: companies, next_cursor (None on the last page) and page_size
+            
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        page_size = max(1, min(page_size, self.max_page_size))
+        companies, next_cursor = CompanyModel.get_companies_page(user_id, filters, cursor, page_size)
+        return {
+            'companies': companies,
+            'next_cursor': next_cursor,
+            'page_size': page_size
+        }
+    
     def get_all_companies(self, filters: Optional[Dict] = None) -> List[Dict]:
         """
         Get all companies with optional filters
@@ -124,19 +257,7 @@ class CompanyService:
         Returns:
             bool: Success status
         """
-        try:
-            # This would need a ReadStatus model and table
-            # For now, just log the action
-            logger.info(f"Marking company {company_id} as read for user {user_id}")
-            
-            # TODO: Implement ReadStatus model and database operations
-            # ReadStatusModel.mark_as_read(user_id, company_id)
-            
-            return True
-            
-        except Exception as e:
-            logger.error(f"Error marking company as read: {str(e)}")
-            return False
+        return ReadStatusService.mark_many_as_read(user_id, [company_id])
     
     def is_company_read(self, user_id: int, company_id: int) -> bool:
         """
@@ -149,18 +270,11 @@ class CompanyService:
         Returns:
             bool: Read status
         """
-        try:
-            # TODO: Implement ReadStatus model and check
-            # return ReadStatusModel.is_read(user_id, company_id)
-            return False  # Default to unread for now
-            
-        except Exception as e:
-            logger.error(f"Error checking read status: {str(e)}")
-            return False
+        return ReadStatusService.get_read_status(user_id, company_id)['is_read']
     
     def get_company_stats(self, user_id: int) -> Dict:
         """
-        Get statistics about companies for a user
+        Get statistics about companies for a user (read from pre-aggregated counters)
         
         Args:
             user_id (int): User ID
@@ -169,26 +283,20 @@ class CompanyService:
             dict: Company statistics
         """
         try:
-            companies = CompanyModel.get_companies_by_user(user_id)
+            counters = StatsModel.get_stats(user_id)
             
-            total_companies = len(companies)
+            total_companies = counters.get('total', {}).get('', 0)
+            read_companies = counters.get('read', {}).get('', 0)
             tier_stats = {'tier1': 0, 'tier2': 0, 'tier3': 0}
-            industry_stats = {}
-            
-            for company in companies:
-                # Count by tier
-                tier = company.get('tier', 'tier3')
-                if tier in tier_stats:
-                    tier_stats[tier] += 1
-                
-                # Count by industry
-                industry = company.get('industry', 'Unknown')
-                industry_stats[industry] = industry_stats.get(industry, 0) + 1
+            tier_stats.update(counters.get('tier', {}))
             
             return {
                 'total_companies': total_companies,
+                'read_companies': read_companies,
+                'unread_companies': max(total_companies - read_companies, 0),
                 'tier_breakdown': tier_stats,
-                'industry_breakdown': industry_stats,
+                'industry_breakdown': counters.get('industry', {}),
+                'daily_ingest': counters.get('day', {}),
                 'last_updated': datetime.now().isoformat()
             }
             
@@ -196,8 +304,11 @@ class CompanyService:
             logger.error(f"Error getting company stats: {str(e)}")
             return {
                 'total_companies': 0,
+                'read_companies': 0,
+                'unread_companies': 0,
                 'tier_breakdown': {'tier1': 0, 'tier2': 0, 'tier3': 0},
                 'industry_breakdown': {},
+                'daily_ingest': {},
                 'last_updated': datetime.now().isoformat()
             }
     
@@ -234,44 +345,27 @@ class CompanyService:
                 'error': str(e)
             }
     
-    def search_companies(self, user_id: int, search_term: str) -> List[Dict]:
+    def search_companies(self, user_id: int, search_term: str, page: int = 1, page_size: int = 20) -> List[Dict]:
         """
-        Search companies by name, industry, or description
+        Search companies by name, industry, description or location
         
         Args:
             user_id (int): User ID
-            search_term (str): Search term
+            search_term (str): Search term (the last word matches as a prefix)
+            page (int): 1-based page number
+            page_size (int): Results per page
             
         Returns:
-            list: Matching companies
+            list: Matching companies, most relevant first
         """
         try:
-            companies = CompanyModel.get_companies_by_user(user_id)
-            search_term_lower = search_term.lower()
-            
-            matching_companies = []
-            for company in companies:
-                # Search in name
-                if search_term_lower in company.get('name', '').lower():
-                    matching_companies.append(company)
-                    continue
-                
-                # Search in industry
-                if search_term_lower in company.get('industry', '').lower():
-                    matching_companies.append(company)
-                    continue
-                
-                # Search in description
-                if search_term_lower in company.get('description', '').lower():
-                    matching_companies.append(company)
-                    continue
-                
-                # Search in location
-                if search_term_lower in company.get('location', '').lower():
-                    matching_companies.append(company)
-                    continue
-            
-            return matching_companies
+            if not search_term or not search_term.strip():
+                return []
+            page = max(page, 1)
+            page_size = max(1, min(page_size, 100))
+            return CompanyModel.search_companies(
+                user_id, search_term, limit=page_size, offset=(page - 1) * page_size
+            )
             
         except Exception as e:
             logger.error(f"Error searching companies: {str(e)}")
@@ -290,13 +384,11 @@ class CompanyService:
             bool: Success status
         """
         try:
-            # TODO: Implement update method in CompanyModel
-            # Also check if user has permission to update
-            logger.info(f"Would update company {company_id} with data: {updates}")
-            
-            # CompanyModel.update_company(company_id, updates, user_id)
-            
-            return True
+            # Only the owner's rows match, which is the permission check
+            updated = CompanyModel.update_company(company_id, updates, user_id)
+            if not updated:
+                logger.warning(f"Company {company_id} not found for user {user_id}")
+            return updated
             
         except Exception as e:
             logger.error(f"Error updating company: {str(e)}")
@@ -304,23 +396,23 @@ class CompanyService:
     
     def delete_company(self, company_id: int, user_id: int) -> bool:
         """
-        Delete a company (soft delete recommended)
+        Delete a company owned by the user and update their counters
         
         Args:
             company_id (int): Company ID
-            user_id (int): User ID (for permission check)
+            user_id (int): User ID (only the creator may delete)
             
         Returns:
-            bool: Success status
+            bool: True if the company was deleted
         """
         try:
-            # TODO: Implement delete method in CompanyModel
-            # Check if user has permission to delete
-            logger.info(f"Would delete company {company_id} by user {user_id}")
-            
-            # CompanyModel.delete_company(company_id, user_id)
-            
-            return True
+            deleted = CompanyModel.delete_company(company_id, user_id)
+            if deleted:
+                get_near_duplicate_index().remove(company_id)
+                logger.info(f"Deleted company {company_id} by user {user_id}")
+            else:
+                logger.warning(f"Company {company_id} not found for user {user_id}")
+            return deleted
             
         except Exception as e:
             logger.error(f"Error deleting company: {str(e)}")
@@ -354,17 +446,19 @@ class ReadStatusService:
     @staticmethod
     def mark_as_read(user_id: int, company_id: int) -> bool:
         """Mark a company as read for a user"""
+        return ReadStatusService.mark_many_as_read(user_id, [company_id])
+    
+    @staticmethod
+    def mark_as_unread(user_id: int, company_id: int) -> bool:
+        """Mark a company as unread for a user"""
+        return ReadStatusService.mark_many_as_unread(user_id, [company_id])
+    
+    @staticmethod
+    def mark_many_as_read(user_id: int, company_ids: List[int]) -> bool:
+        """Mark several companies as read in one statement"""
         try:
-            # TODO: Implement ReadStatus model and database table
-            logger.info(f"Marking company {company_id} as read for user {user_id}")
-            
-            # This would require a read_status table with columns:
-            # - id (primary key)
-            # - user_id (foreign key to users)
-            # - company_id (foreign key to companies) 
-            # - read_at (timestamp)
-            # - created_at (timestamp)
-            
+            marked = ReadStatusModel.mark_read(user_id, company_ids)
+            logger.info(f"Marked {marked} of {len(company_ids)} companies as read for user {user_id}")
             return True
             
         except Exception as e:
@@ -372,14 +466,11 @@ class ReadStatusService:
             return False
     
     @staticmethod
-    def mark_as_unread(user_id: int, company_id: int) -> bool:
-        """Mark a company as unread for a user"""
+    def mark_many_as_unread(user_id: int, company_ids: List[int]) -> bool:
+        """Mark several companies as unread in one statement"""
         try:
-            logger.info(f"Marking company {company_id} as unread for user {user_id}")
-            
-            # Remove from read_status table
-            # ReadStatusModel.remove_read_status(user_id, company_id)
-            
+            removed = ReadStatusModel.mark_unread(user_id, company_ids)
+            logger.info(f"Marked {removed} of {len(company_ids)} companies as unread for user {user_id}")
             return True
             
         except Exception as e:
@@ -389,31 +480,32 @@ class ReadStatusService:
     @staticmethod
     def get_read_status(user_id: int, company_id: int) -> Dict:
         """Get read status information for a company"""
+        return ReadStatusService.get_read_statuses(user_id, [company_id])[company_id]
+    
+    @staticmethod
+    def get_read_statuses(user_id: int, company_ids: List[int]) -> Dict[int, Dict]:
+        """Get read status for a whole page of companies with one query"""
         try:
-            # TODO: Query read_status table
-            # return ReadStatusModel.get_status(user_id, company_id)
-            
-            return {
-                'is_read': False,
-                'read_at': None
-            }
+            read_map = ReadStatusModel.get_read_map(user_id, company_ids)
             
         except Exception as e:
             logger.error(f"Error getting read status: {str(e)}")
-            return {
-                'is_read': False,
-                'read_at': None
+            read_map = {}
+        
+        return {
+            company_id: {
+                'is_read': company_id in read_map,
+                'read_at': read_map[company_id].isoformat() if read_map.get(company_id) else None
             }
+            for company_id in company_ids
+        }
     
     @staticmethod
     def get_user_read_companies(user_id: int) -> List[int]:
         """Get list of company IDs that user has read"""
         try:
-            # TODO: Query read_status table
-            # return ReadStatusModel.get_read_company_ids(user_id)
-            
-            return []
+            return ReadStatusModel.get_read_company_ids(user_id)
             
         except Exception as e:
             logger.error(f"Error getting read companies: {str(e)}")
-            return []
\ No newline at end of file
+            return []
@@ -0,0 +1,259 @@
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+import metrics
+from config import config
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_text(text: str) -> str:
+    """Normalize pasted text so trivially different copies share a cache key"""
+    text = unicodedata.normalize('NFKC', text)
+    return _WHITESPACE_RE.sub(' ', text).strip().casefold()
+
+
+def cache_key(text: str) -> str:
+    """Content hash of the normalized text"""
+    return hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+
+
+class _InFlight:
+    """Result slot shared by callers waiting on the same extraction"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class ExtractionCache:
+    """
+    Two-tier cache for LLM extraction results.
+
+    Tier 1 is an in-process LRU bounded by ``max_entries``; tier 2 is an
+    optional SQLite file shared across processes and restarts. Both tiers
+    expire entries after ``ttl`` seconds. Concurrent requests for the same
+    text are collapsed into a single computation.
+    """
+
+    SWEEP_EVERY = 100
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 86400,
+                 sqlite_path: Optional[str] = None, sqlite_max_entries: int = 100000):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.sqlite_max_entries = sqlite_max_entries
+        self._lru: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, _InFlight] = {}
+        self._counters = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'coalesced': 0, 'evictions': 0}
+
+        self._db = None
+        self._db_lock = threading.Lock()
+        self._disk_writes = 0
+        if sqlite_path:
+            self._db = sqlite3.connect(sqlite_path, check_same_thread=False)
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS extraction_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS idx_extraction_cache_access ON extraction_cache (last_access)"
+            )
+            self._db.commit()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Look up a cached extraction by key (memory first, then disk)"""
+        now = time.time()
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if now - stored_at <= self.ttl:
+                    self._lru.move_to_end(key)
+                    self._counters['hits'] += 1
+                    return dict(value)
+                del self._lru[key]
+
+        row = self._disk_get(key, now)
+        if row is not None:
+            value, stored_at = row
+            with self._lock:
+                self._counters['disk_hits'] += 1
+            # Keep the original timestamp so promotion does not extend the TTL
+            self._memory_set(key, value, stored_at)
+            return dict(value)
+        return None
+
+    def set(self, key: str, value: Dict):
+        """Store an extraction result in every tier"""
+        now = time.time()
+        self._memory_set(key, value, now)
+        self._disk_set(key, value, now)
+
+    def get_or_compute(self, text: str, compute: Callable[[str], Optional[Dict]]) -> Optional[Dict]:
+        """
+        Return the cached extraction for text, computing it at most once
+
+        Args:
+            text (str): Raw input text
+            compute (callable): Called with text on a miss
+
+        Returns:
+            dict: Extraction result (empty results are returned but not cached)
+        """
+        key = cache_key(text)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        slot, leader = self.claim(key)
+        if not leader:
+            return self.wait(slot)
+
+        try:
+            result = compute(text)
+        except Exception as e:
+            self.finish(key, slot, error=e)
+            raise
+        self.finish(key, slot, result)
+        return dict(result) if result else result
+
+    def claim(self, key: str) -> Tuple[_InFlight, bool]:
+        """
+        Join the computation for key, starting one if none is running
+
+        Returns:
+            tuple: (slot, leader); the leader must call finish() with the slot,
+            everyone else calls wait() on it
+        """
+        with self._lock:
+            slot = self._in_flight.get(key)
+            if slot is not None:
+                self._counters['coalesced'] += 1
+                return slot, False
+            slot = _InFlight()
+            self._in_flight[key] = slot
+            self._counters['misses'] += 1
+            return slot, True
+
+    def wait(self, slot: _InFlight) -> Optional[Dict]:
+        """Block until the leader finishes and return its result (or raise its error)"""
+        slot.done.wait()
+        if slot.error is not None:
+            raise slot.error
+        return dict(slot.result) if slot.result else slot.result
+
+    def finish(self, key: str, slot: _InFlight, result: Optional[Dict] = None, error: Optional[Exception] = None):
+        """Publish the leader's result to the waiters and cache it when non-empty"""
+        slot.result = result
+        slot.error = error
+        try:
+            if result:
+                self.set(key, result)
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            slot.done.set()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._counters)
+            stats['entries'] = len(self._lru)
+            stats['in_flight'] = len(self._in_flight)
+        lookups = stats['hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_ratio'] = (stats['hits'] + stats['disk_hits']) / lookups if lookups else 0.0
+        return stats
+
+    def _memory_set(self, key: str, value: Dict, stored_at: float):
+        with self._lock:
+            self._lru[key] = (stored_at, dict(value))
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+                self._counters['evictions'] += 1
+
+    def _disk_get(self, key: str, now: float) -> Optional[tuple]:
+        if self._db is None:
+            return None
+        try:
+            with self._db_lock:
+                row = self._db.execute(
+                    "SELECT value, created_at FROM extraction_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                if now - row[1] > self.ttl:
+                    self._db.execute("DELETE FROM extraction_cache WHERE key = ?", (key,))
+                    self._db.commit()
+                    return None
+                self._db.execute("UPDATE extraction_cache SET last_access = ? WHERE key = ?", (now, key))
+                self._db.commit()
+            return json.loads(row[0]), row[1]
+        except sqlite3.Error as e:
+            logger.error(f"Extraction cache read failed: {e}")
+            return None
+
+    def _disk_set(self, key: str, value: Dict, now: float):
+        if self._db is None:
+            return
+        try:
+            with self._db_lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO extraction_cache (key, value, created_at, last_access) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value), now, now)
+                )
+                self._disk_writes += 1
+                # Sweeping is a table scan, so only do it every so often
+                if self._disk_writes % self.SWEEP_EVERY == 0:
+                    self._db.execute("DELETE FROM extraction_cache WHERE created_at < ?", (now - self.ttl,))
+                    self._db.execute("""
+                        DELETE FROM extraction_cache WHERE key IN (
+                            SELECT key FROM extraction_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                        )
+                    """, (self.sqlite_max_entries,))
+                self._db.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Extraction cache write failed: {e}")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+LLM_CACHE = metrics.counter('placebuddy_llm_cache_total', 'Extraction cache lookups by result', ['result'])
+LLM_CACHE.set_function(lambda: {
+    result: count for result, count in _cache.stats().items()
+    if result in ('hits', 'disk_hits', 'misses', 'coalesced')
+} if _cache else {})
+
+
+def get_extraction_cache() -> ExtractionCache:
+    """Get the process-wide extraction cache configured from config"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ExtractionCache(
+                    max_entries=getattr(config, 'LLM_CACHE_SIZE', 1024),
+                    ttl=getattr(config, 'LLM_CACHE_TTL', 86400),
+                    sqlite_path=getattr(config, 'LLM_CACHE_PATH', None),
+                    sqlite_max_entries=getattr(config, 'LLM_CACHE_DISK_SIZE', 100000)
+                )
+    return _cache
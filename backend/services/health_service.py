@@ -0,0 +1,144 @@
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+from config import config
+from database.connection import db_cursor, get_pool
+from services.llm_service import LLMService
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+STATUS_ORDER = {'healthy': 0, 'degraded': 1, 'unhealthy': 2}
+
+
+class HealthMonitor:
+    """
+    Runs dependency checks on a background thread and keeps the latest
+    results as a snapshot, so health probes are answered from memory instead
+    of touching MySQL or the LLM on every request.
+
+    A check is a callable returning a dict of details; it may set
+    ``status: 'degraded'`` (e.g. a saturated pool) and fails by raising. A
+    failing critical check makes the whole service unhealthy, any other
+    failure or degradation only degrades it.
+    """
+
+    def __init__(self, interval: float = 5):
+        self.interval = interval
+        self._checks = {}
+        self._snapshot = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._refresh_lock = threading.Lock()
+
+    def add_check(self, name: str, check: Callable[[], Dict], critical: bool = False):
+        self._checks[name] = (check, critical)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self.refresh()
+        self._thread = threading.Thread(target=self._loop, name='health-monitor', daemon=True)
+        self._thread.start()
+        logger.info(f"Health checks scheduled every {self.interval}s")
+
+    def stop(self):
+        self._stop.set()
+
+    def snapshot(self) -> Dict:
+        """Latest results with their age; never runs a check"""
+        snapshot = self._snapshot or self.refresh()
+        return dict(snapshot, age_seconds=round(time.time() - snapshot['checked_at_epoch'], 3))
+
+    def refresh(self) -> Dict:
+        """Run every check now; concurrent callers share one run"""
+        started = time.time()
+        with self._refresh_lock:
+            # Someone else refreshed while we waited for the lock
+            if self._snapshot and self._snapshot['checked_at_epoch'] >= started:
+                return self._snapshot
+
+            checks = {name: self._run_check(check, critical) for name, (check, critical) in self._checks.items()}
+            status = 'healthy'
+            for result in checks.values():
+                if STATUS_ORDER[result['status']] > STATUS_ORDER[status]:
+                    status = result['status']
+
+            now = time.time()
+            self._snapshot = {
+                'status': status,
+                'checked_at': datetime.fromtimestamp(now).isoformat(),
+                'checked_at_epoch': now,
+                'checks': checks
+            }
+            return self._snapshot
+
+    def is_stale(self, snapshot: Optional[Dict] = None) -> bool:
+        """True when the background refresh has stopped keeping up"""
+        snapshot = snapshot or self.snapshot()
+        return snapshot['age_seconds'] > self.interval * 3
+
+    def is_ready(self, snapshot: Optional[Dict] = None) -> bool:
+        """Ready to take traffic: no critical check failing and the snapshot is fresh"""
+        snapshot = snapshot or self.snapshot()
+        return snapshot['status'] != 'unhealthy' and not self.is_stale(snapshot)
+
+    def _run_check(self, check, critical) -> Dict:
+        started = time.perf_counter()
+        try:
+            result = {'status': 'healthy'}
+            result.update(check() or {})
+        except Exception as e:
+            result = {'status': 'unhealthy' if critical else 'degraded', 'error': str(e)}
+        result['latency_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        return result
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Health refresh failed: {str(e)}")
+
+
+def create_health_monitor(job_manager) -> HealthMonitor:
+    """Monitor for the API server's dependencies, configured from config"""
+    pool_threshold = getattr(config, 'HEALTH_POOL_SATURATION', 0.9)
+    queue_threshold = getattr(config, 'HEALTH_QUEUE_SATURATION', 0.8)
+    monitor = HealthMonitor(interval=getattr(config, 'HEALTH_CHECK_INTERVAL', 5))
+
+    def check_database():
+        with db_cursor() as cursor:
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+        return {}
+
+    def check_db_pool():
+        stats = get_pool().stats()
+        saturation = stats['in_use'] / stats['size'] if stats['size'] else 0.0
+        result = dict(stats, saturation=round(saturation, 3))
+        if saturation >= pool_threshold:
+            result['status'] = 'degraded'
+        return result
+
+    def check_job_queue():
+        stats = job_manager.stats()
+        saturation = stats['queue_depth'] / stats['queue_capacity'] if stats['queue_capacity'] else 0.0
+        result = {
+            'depth': stats['queue_depth'],
+            'capacity': stats['queue_capacity'],
+            'running': stats['running'],
+            'saturation': round(saturation, 3)
+        }
+        if saturation >= queue_threshold:
+            result['status'] = 'degraded'
+        return result
+
+    monitor.add_check('database', check_database, critical=True)
+    monitor.add_check('db_pool', check_db_pool)
+    monitor.add_check('llm', lambda: LLMService().health_check())
+    monitor.add_check('job_queue', check_job_queue)
+    return monitor
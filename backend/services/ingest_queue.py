@@ -0,0 +1,329 @@
+"""
+Broker access for the process_text ingestion pipeline.
+
+The edge (Socket.IO handler, api_server.py) produces one request per text
+to INGEST_TOPIC and returns immediately; IngestWorker consumer-group members
+do extraction, dedup and DB writes in batches. INGEST_BROKER_URL selects the
+broker:
+
+    kafka://host:9092[,host2:9092]   Kafka (kafka-python)
+    memory://                        in-process broker for tests and single-process runs
+
+Both expose the same small interface: send(topic, key, value), which
+returns once the broker has the record and raises otherwise, flush() and
+consumer(topic, group) returning an object with poll(), commit(), rewind()
+and close(). Offsets are committed explicitly after a batch is handled, and
+a consumer is rewound to its committed offsets when a batch fails, so
+delivery is at-least-once.
+
+Bulk requests travel on their own topic (INGEST_BULK_TOPIC), which workers
+only drain while the interactive topic is empty, mirroring the JobManager
+lanes. PendingRequests applies JOB_MAX_PER_USER at the edge before a
+request is produced.
+"""
+import json
+import logging
+import math
+import threading
+import time
+import uuid
+import zlib
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from config import config
+from services.job_service import PRIORITY_BULK, PRIORITY_INTERACTIVE, UserJobLimitError
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOPIC = 'placebuddy.process_text'
+DEFAULT_BULK_TOPIC = 'placebuddy.process_text.bulk'
+DEFAULT_DEAD_LETTER_TOPIC = 'placebuddy.process_text.dlq'
+DEFAULT_GROUP = 'placebuddy-ingest'
+
+
+def ingest_topic() -> str:
+    return getattr(config, 'INGEST_TOPIC', DEFAULT_TOPIC)
+
+
+def bulk_topic() -> str:
+    return getattr(config, 'INGEST_BULK_TOPIC', DEFAULT_BULK_TOPIC)
+
+
+def dead_letter_topic() -> str:
+    return getattr(config, 'INGEST_DEAD_LETTER_TOPIC', DEFAULT_DEAD_LETTER_TOPIC)
+
+
+def request_topic(request: Dict) -> str:
+    """The lane a request is produced to: bulk requests yield to interactive ones"""
+    return bulk_topic() if request.get('priority', PRIORITY_INTERACTIVE) >= PRIORITY_BULK else ingest_topic()
+
+
+def make_request(user_id: int, text: str, sid: Optional[str] = None, priority: int = PRIORITY_INTERACTIVE) -> Dict:
+    """A process_text request as it travels through the topic"""
+    return {
+        'request_id': uuid.uuid4().hex,
+        'user_id': user_id,
+        'text': text,
+        'sid': sid,
+        'priority': priority,
+        'attempts': 0,
+        'submitted_at': datetime.now().isoformat()
+    }
+
+
+class PendingRequests:
+    """
+    Requests each user has handed to the broker that are not answered yet.
+
+    The edge calls acquire() before producing, so a user gets the same
+    ``max_per_user`` limit as on the local job pool. Workers in this
+    process release a request when they report its result; workers in other
+    processes cannot, so every entry also expires after ``ttl`` seconds.
+    """
+
+    def __init__(self, max_per_user: int = 3, ttl: float = 30):
+        self.max_per_user = max_per_user
+        self.ttl = ttl
+        self._pending: Dict = defaultdict(dict)
+        self._lock = threading.Lock()
+
+    def acquire(self, user_id, request_id: str):
+        """Count a request against the user, or raise UserJobLimitError if they are at the limit"""
+        now = time.monotonic()
+        with self._lock:
+            pending = self._pending[user_id]
+            for expired in [key for key, started in pending.items() if now - started > self.ttl]:
+                del pending[expired]
+            if len(pending) >= self.max_per_user:
+                retry_after = math.ceil(min(pending.values()) + self.ttl - now)
+                raise UserJobLimitError(
+                    f"Too many jobs in progress (limit {self.max_per_user}), please wait", max(retry_after, 1)
+                )
+            pending[request_id] = now
+
+    def release(self, user_id, request_id: str):
+        with self._lock:
+            pending = self._pending.get(user_id)
+            if pending is not None:
+                pending.pop(request_id, None)
+                if not pending:
+                    del self._pending[user_id]
+
+    def count(self, user_id) -> int:
+        with self._lock:
+            return len(self._pending.get(user_id, ()))
+
+
+class InMemoryBroker:
+    """
+    Kafka stand-in: partitioned topics, key-based partitioning and consumer
+    groups with committed offsets. When a member joins or leaves, partitions
+    are reassigned and uncommitted records are delivered again.
+    """
+
+    def __init__(self, partitions: int = 4):
+        self.partitions = partitions
+        self._topics = defaultdict(lambda: [[] for _ in range(self.partitions)])
+        self._groups = {}
+        self._cond = threading.Condition()
+
+    def send(self, topic: str, key, value: Dict):
+        partition = zlib.crc32(str(key).encode('utf-8')) % self.partitions
+        with self._cond:
+            self._topics[topic][partition].append(json.dumps(value))
+            self._cond.notify_all()
+
+    def flush(self):
+        """Sends are synchronous in memory"""
+
+    def consumer(self, topic: str, group: str = DEFAULT_GROUP, max_poll_records: int = 100):
+        return InMemoryConsumer(self, topic, group)
+
+    def records(self, topic: str) -> List[Dict]:
+        """Every record ever sent to a topic (for inspecting dead letters in tests)"""
+        with self._cond:
+            return [json.loads(value) for partition in self._topics[topic] for value in partition]
+
+    def _group(self, topic, group):
+        return self._groups.setdefault((topic, group), {
+            'committed': [0] * self.partitions,
+            'members': [],
+            'generation': 0
+        })
+
+
+class InMemoryConsumer:
+    """One consumer-group member of an InMemoryBroker topic"""
+
+    def __init__(self, broker: InMemoryBroker, topic: str, group: str):
+        self.broker = broker
+        self.topic = topic
+        self._generation = None
+        self._positions = {}
+        with broker._cond:
+            self._state = broker._group(topic, group)
+            self._state['members'].append(self)
+            self._state['generation'] += 1
+            broker._cond.notify_all()
+
+    def poll(self, max_records: int = 100, timeout: float = 1.0) -> List[Dict]:
+        with self.broker._cond:
+            self.broker._cond.wait_for(lambda: self._available(), timeout=timeout)
+            partitions = self.broker._topics[self.topic]
+            batch = []
+            for partition in list(self._positions):
+                position = self._positions[partition]
+                take = partitions[partition][position:position + max_records - len(batch)]
+                self._positions[partition] = position + len(take)
+                batch.extend(json.loads(value) for value in take)
+            return batch
+
+    def commit(self):
+        with self.broker._cond:
+            if self._generation == self._state['generation']:
+                for partition, position in self._positions.items():
+                    self._state['committed'][partition] = position
+
+    def rewind(self):
+        """Go back to the committed offsets so the uncommitted records are polled again"""
+        with self.broker._cond:
+            if self._generation == self._state['generation']:
+                for partition in self._positions:
+                    self._positions[partition] = self._state['committed'][partition]
+
+    def close(self):
+        with self.broker._cond:
+            if self in self._state['members']:
+                self._state['members'].remove(self)
+                self._state['generation'] += 1
+                self.broker._cond.notify_all()
+
+    def _available(self) -> bool:
+        # Called with the broker lock held; picks up rebalances first
+        if self._generation != self._state['generation']:
+            self._rebalance()
+        partitions = self.broker._topics[self.topic]
+        return any(position < len(partitions[partition]) for partition, position in self._positions.items())
+
+    def _rebalance(self):
+        members = self._state['members']
+        index = members.index(self)
+        self._generation = self._state['generation']
+        # Resume from the group's committed offsets; anything uncommitted is redelivered
+        self._positions = {
+            partition: self._state['committed'][partition]
+            for partition in range(self.broker.partitions)
+            if partition % len(members) == index
+        }
+
+
+class KafkaBroker:
+    """Kafka via kafka-python, with JSON values and string keys"""
+
+    def __init__(self, bootstrap_servers: List[str], send_timeout: float = 10):
+        from kafka import KafkaProducer
+
+        self.bootstrap_servers = bootstrap_servers
+        self.send_timeout = send_timeout
+        self._producer = KafkaProducer(
+            bootstrap_servers=bootstrap_servers,
+            acks='all',
+            linger_ms=5,
+            key_serializer=lambda key: str(key).encode('utf-8'),
+            value_serializer=lambda value: json.dumps(value).encode('utf-8')
+        )
+
+    def send(self, topic: str, key, value: Dict):
+        """Produce one record and wait for the brokers to acknowledge it"""
+        self._producer.send(topic, key=key, value=value).get(timeout=self.send_timeout)
+
+    def flush(self):
+        self._producer.flush()
+
+    def consumer(self, topic: str, group: str = DEFAULT_GROUP, max_poll_records: int = 100):
+        return KafkaTopicConsumer(self.bootstrap_servers, topic, group, max_poll_records)
+
+
+class KafkaTopicConsumer:
+    """Consumer-group member with manual offset commits"""
+
+    def __init__(self, bootstrap_servers: List[str], topic: str, group: str, max_poll_records: int):
+        from kafka import KafkaConsumer
+
+        self._consumer = KafkaConsumer(
+            topic,
+            group_id=group,
+            bootstrap_servers=bootstrap_servers,
+            enable_auto_commit=False,
+            auto_offset_reset='earliest',
+            max_poll_records=max_poll_records,
+            value_deserializer=lambda value: json.loads(value.decode('utf-8'))
+        )
+
+    def poll(self, max_records: int = 100, timeout: float = 1.0) -> List[Dict]:
+        batches = self._consumer.poll(timeout_ms=int(timeout * 1000), max_records=max_records)
+        return [record.value for records in batches.values() for record in records]
+
+    def commit(self):
+        self._consumer.commit()
+
+    def rewind(self):
+        """Seek every assigned partition back to its committed offset"""
+        for partition in self._consumer.assignment():
+            committed = self._consumer.committed(partition)
+            if committed is None:
+                self._consumer.seek_to_beginning(partition)
+            else:
+                self._consumer.seek(partition, committed)
+
+    def close(self):
+        self._consumer.close()
+
+
+def create_ingest_broker(url: Optional[str]):
+    """Build the broker for an INGEST_BROKER_URL (None if no URL)"""
+    if not url:
+        return None
+    if url.startswith('memory://'):
+        return InMemoryBroker(partitions=getattr(config, 'INGEST_PARTITIONS', 4))
+    if url.startswith('kafka://'):
+        return KafkaBroker(url[len('kafka://'):].rstrip('/').split(','),
+                           send_timeout=getattr(config, 'INGEST_SEND_TIMEOUT', 10))
+    raise ValueError(f"Unsupported INGEST_BROKER_URL: {url}")
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_ingest_broker():
+    """Get the process-wide ingest broker, or None when process_text runs on the local job pool"""
+    global _broker
+    url = getattr(config, 'INGEST_BROKER_URL', None)
+    if not url:
+        return None
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = create_ingest_broker(url)
+    return _broker
+
+
+_pending = None
+_pending_lock = threading.Lock()
+
+
+def get_pending_requests() -> PendingRequests:
+    """Get the process-wide pending-request tracker configured from config"""
+    global _pending
+    if _pending is None:
+        with _pending_lock:
+            if _pending is None:
+                _pending = PendingRequests(
+                    max_per_user=getattr(config, 'JOB_MAX_PER_USER', 3),
+                    ttl=getattr(config, 'INGEST_PENDING_TTL', getattr(config, 'JOB_MAX_QUEUE_WAIT', 30))
+                )
+    return _pending
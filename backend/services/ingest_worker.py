@@ -0,0 +1,247 @@
+"""
+Consumer-group worker for the process_text ingestion pipeline.
+
+Run one or more per machine next to the API servers:
+
+    python -m services.ingest_worker
+
+Every worker joins the INGEST_GROUP consumer group, so ingest throughput
+scales by starting more of them (up to the topic's partition count). Results
+reach the requesting user through SOCKETIO_MESSAGE_QUEUE.
+"""
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from config import config
+from services.company_service import CompanyService
+from services.ingest_queue import (DEFAULT_GROUP, bulk_topic, dead_letter_topic, get_ingest_broker,
+                                   get_pending_requests, ingest_topic)
+from services.job_service import PRIORITY_BULK, PRIORITY_INTERACTIVE
+from services.llm_service import LLMService
+from websocket.feed import company_row, compact_counters, get_feed_publisher
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class IngestWorker:
+    """
+    Drains process_text requests in batches: one cached/batched LLM call per
+    batch and one multi-row insert per user, then commits the batch's offsets.
+
+    Delivery is at-least-once. A batch redelivered after a crash is harmless
+    because inserts are idempotent on the normalized company name (the
+    second delivery reports a duplicate). Requests that fail are re-queued
+    with an attempt count and moved to the dead-letter topic after
+    ``max_attempts``; both happen before the offsets are committed.
+
+    With a ``bulk_topic`` the worker consumes two lanes and only takes a bulk
+    batch when the interactive topic has nothing waiting.
+    """
+
+    def __init__(self, broker, topic: str, dead_letter_topic: str, group: str = DEFAULT_GROUP,
+                 batch_size: int = 16, poll_timeout: float = 1.0, max_attempts: int = 3,
+                 llm_service: Optional[LLMService] = None, company_service: Optional[CompanyService] = None,
+                 bulk_topic: Optional[str] = None):
+        self.broker = broker
+        self.topic = topic
+        self.bulk_topic = bulk_topic
+        self.dead_letter_topic = dead_letter_topic
+        self.group = group
+        self.batch_size = batch_size
+        self.poll_timeout = poll_timeout
+        self.max_attempts = max_attempts
+        self.llm_service = llm_service or LLMService()
+        self.company_service = company_service or CompanyService()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._counters = {'batches': 0, 'processed': 0, 'created': 0, 'duplicates': 0,
+                          'failed': 0, 'retried': 0, 'dead_lettered': 0}
+
+    def start(self):
+        """Consume on a background thread"""
+        self._thread = threading.Thread(target=self.run, name='ingest-worker', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def run(self):
+        # Interactive lane first; the bulk lane is only polled when it is empty
+        topics = [self.topic] + ([self.bulk_topic] if self.bulk_topic else [])
+        consumers = [self.broker.consumer(topic, self.group, max_poll_records=self.batch_size) for topic in topics]
+        logger.info(f"Ingest worker consuming {', '.join(topics)} as group {self.group}")
+        try:
+            while not self._stop.is_set():
+                for lane, consumer in enumerate(consumers):
+                    # Only the last lane waits for records, so a new paste is picked up right after a batch
+                    timeout = self.poll_timeout if lane == len(consumers) - 1 else 0
+                    try:
+                        requests = consumer.poll(max_records=self.batch_size, timeout=timeout)
+                        if not requests:
+                            continue
+                        self.process_batch(requests)
+                        consumer.commit()
+                    except Exception as e:
+                        logger.error(f"Ingest batch failed: {str(e)}")
+                        # Polling moved past the failed batch; go back so it is redelivered
+                        consumers[lane] = self._rewind(consumer, topics[lane])
+                        time.sleep(self.poll_timeout)
+                    break
+        finally:
+            for consumer in consumers:
+                consumer.close()
+
+    def _rewind(self, consumer, topic: str):
+        """Rewind to the committed offsets, or rejoin the group if that fails"""
+        try:
+            consumer.rewind()
+            return consumer
+        except Exception as e:
+            logger.error(f"Rewinding ingest consumer failed, rejoining the group: {str(e)}")
+            try:
+                consumer.close()
+            except Exception:
+                pass
+            # A new member starts from the group's committed offsets
+            return self.broker.consumer(topic, self.group, max_poll_records=self.batch_size)
+
+    def process_batch(self, requests: List[Dict]):
+        """Extract, dedup and store one batch of process_text requests"""
+        try:
+            extracted = self.llm_service.extract_company_info_many([request['text'] for request in requests])
+        except Exception as e:
+            logger.error(f"Batch extraction failed: {str(e)}")
+            for request in requests:
+                self._retry(request, e)
+            self.broker.flush()
+            return
+
+        by_user = defaultdict(list)
+        for request, company_data in zip(requests, extracted):
+            if company_data and company_data.get('name'):
+                by_user[request['user_id']].append((request, company_data))
+            else:
+                self._count('failed')
+                self._notify(request, {
+                    'type': 'processing_error',
+                    'error': 'Could not extract company information from text'
+                })
+
+        for user_id, items in by_user.items():
+            try:
+                results = self.company_service.process_companies_batch([data for _, data in items], user_id)
+            except Exception as e:
+                logger.error(f"Storing batch for user {user_id} failed: {str(e)}")
+                for request, _ in items:
+                    self._retry(request, e)
+                continue
+            self._report(user_id, items, results)
+
+        # Re-queued and dead-lettered requests must be durable before the offsets move on
+        self.broker.flush()
+        with self._lock:
+            self._counters['batches'] += 1
+            self._counters['processed'] += len(requests)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return dict(self._counters)
+
+    def _report(self, user_id, items, results):
+        feed = get_feed_publisher()
+        counters = None
+        for (request, company_data), result in zip(items, results):
+            self._count('duplicates' if result.get('is_duplicate') else 'created')
+            self._notify(request, {
+                'type': 'processing_complete',
+                'success': True,
+                'result': {
+                    'company_id': result['company_id'],
+                    'company_name': company_data.get('name'),
+                    'tier': company_data.get('tier'),
+                    'is_duplicate': result.get('is_duplicate', False),
+                    'similar_companies': result.get('similar_companies', []),
+                    'created_at': request.get('submitted_at')
+                },
+                'originalText': request['text']
+            })
+            if feed and not result.get('is_duplicate'):
+                if counters is None:
+                    counters = compact_counters(self.company_service.get_company_stats(user_id))
+                feed.company_created(user_id, company_row(result['company_id'], company_data), counters)
+
+    def _retry(self, request: Dict, error: Exception):
+        failed = dict(request, attempts=request.get('attempts', 0) + 1, last_error=str(error))
+        if failed['attempts'] >= self.max_attempts:
+            self._count('dead_lettered')
+            self.broker.send(self.dead_letter_topic, request['user_id'], failed)
+            self._notify(request, {
+                'type': 'processing_error',
+                'error': 'Could not process text, please try again later'
+            })
+        else:
+            self._count('retried')
+            self.broker.send(self._lane(request), request['user_id'], failed)
+
+    def _lane(self, request: Dict) -> str:
+        if self.bulk_topic and request.get('priority', PRIORITY_INTERACTIVE) >= PRIORITY_BULK:
+            return self.bulk_topic
+        return self.topic
+
+    def _notify(self, request: Dict, payload: Dict):
+        # Every notification is the request's final answer
+        get_pending_requests().release(request['user_id'], request['request_id'])
+        feed = get_feed_publisher()
+        if feed:
+            feed.send_to_user(request['user_id'], dict(payload, job_id=request['request_id']))
+
+    def _count(self, name: str):
+        with self._lock:
+            self._counters[name] += 1
+
+
+def create_ingest_worker(broker=None) -> IngestWorker:
+    """Build a worker configured from config"""
+    return IngestWorker(
+        broker or get_ingest_broker(),
+        ingest_topic(),
+        dead_letter_topic(),
+        bulk_topic=bulk_topic(),
+        group=getattr(config, 'INGEST_GROUP', DEFAULT_GROUP),
+        batch_size=getattr(config, 'INGEST_BATCH_SIZE', 16),
+        max_attempts=getattr(config, 'INGEST_MAX_ATTEMPTS', 3)
+    )
+
+
+def start_embedded_workers() -> List[IngestWorker]:
+    """
+    With the in-memory broker nothing outside this process can consume the
+    topic, so run INGEST_EMBEDDED_WORKERS consumers here. No-op otherwise.
+    """
+    if not (getattr(config, 'INGEST_BROKER_URL', None) or '').startswith('memory://'):
+        return []
+    workers = [create_ingest_worker() for _ in range(getattr(config, 'INGEST_EMBEDDED_WORKERS', 1))]
+    for worker in workers:
+        worker.start()
+    return workers
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    if get_ingest_broker() is None:
+        raise SystemExit("INGEST_BROKER_URL is not configured")
+    if get_feed_publisher() is None:
+        # Results reach users through the Socket.IO message queue; without it every result is dropped
+        raise SystemExit("SOCKETIO_MESSAGE_QUEUE is not configured")
+    worker = create_ingest_worker()
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,276 @@
+import json
+import logging
+import math
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, Optional
+from metrics import STAGE_SECONDS
+from services.rate_limiter import AdmissionError
+from websocket.pubsub import user_room
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+# Lower runs first: single pastes go ahead of bulk imports
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 1
+
+
+class JobQueueFullError(AdmissionError):
+    """Raised when the global job queue (or the bulk lane's share of it) is full"""
+
+
+class UserJobLimitError(AdmissionError):
+    """Raised when a user already has the maximum number of jobs in flight"""
+
+
+class Job:
+    """A unit of background work tied to the socket that requested it"""
+
+    def __init__(self, user_id, sid: Optional[str], func: Callable, args: tuple,
+                 priority: int = PRIORITY_INTERACTIVE, cleanup: Optional[Callable] = None):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.sid = sid
+        self.func = func
+        self.args = args
+        self.priority = priority
+        self.cleanup = cleanup
+        self.status = 'queued'
+        self.error = None
+        self.created_at = datetime.now()
+        self.started_at = None
+        self.finished_at = None
+
+    def to_dict(self) -> Dict:
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'priority': self.priority,
+            'error': self.error,
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
+class JobManager:
+    """
+    Bounded worker pool for slow socket work (LLM extraction + DB writes).
+
+    Jobs are queued up to ``max_queue`` and executed by ``workers`` threads,
+    ``interactive_workers`` of which never take bulk jobs, so a batch import
+    cannot occupy every worker while pastes wait.
+    Each user may have at most ``max_jobs_per_user`` jobs queued or running.
+    Job functions receive the Job as their first argument and report progress
+    through notify(), which emits to the originating socket.
+
+    Interactive jobs are dequeued before bulk ones, and bulk jobs may only
+    fill ``bulk_queue_share`` of the queue so pastes always find room. A job
+    that waited longer than ``max_queue_wait`` seconds is dropped with a
+    busy reply instead of being run late, which keeps tail latency bounded
+    under overload.
+    """
+
+    def __init__(self, socketio, workers: int = 4, max_queue: int = 100, max_jobs_per_user: int = 3,
+                 max_queue_wait: float = 30, bulk_queue_share: float = 0.5, interactive_workers: int = 1):
+        self.socketio = socketio
+        self.workers = workers
+        # With a single worker there is nothing to reserve, or bulk jobs would never run
+        self.interactive_workers = min(interactive_workers, workers - 1) if workers > 1 else 0
+        self.max_queue = max_queue
+        self.max_jobs_per_user = max_jobs_per_user
+        self.max_queue_wait = max_queue_wait
+        self.bulk_queue_share = bulk_queue_share
+        # One FIFO lane per priority; workers always drain the interactive lane first
+        self._lanes = {PRIORITY_INTERACTIVE: deque(), PRIORITY_BULK: deque()}
+        self._queue_cond = threading.Condition()
+        self._avg_run_seconds = 1.0
+        self._counters = {'completed': 0, 'failed': 0, 'rejected': 0, 'expired': 0}
+        self._lock = threading.Lock()
+        self._user_jobs: Dict = {}
+        self._jobs: Dict[str, Job] = {}
+        self._threads = []
+        self._started = False
+
+    def start(self):
+        """Start worker threads (idempotent)"""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        for i in range(self.workers):
+            interactive_only = i < self.interactive_workers
+            thread = threading.Thread(target=self._worker_loop, args=(interactive_only,),
+                                      name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"Started {self.workers} job workers ({self.interactive_workers} interactive only, "
+                    f"queue size {self.max_queue})")
+
+    def submit(self, user_id, sid: Optional[str], func: Callable, *args,
+               priority: int = PRIORITY_INTERACTIVE, cleanup: Optional[Callable] = None) -> Job:
+        """
+        Queue a job for background execution
+
+        Args:
+            user_id: Owner of the job (used for per-user limits)
+            sid (str): Socket session to report progress to
+            func (callable): Called as func(job, *args) on a worker thread
+            priority (int): PRIORITY_INTERACTIVE or PRIORITY_BULK
+            cleanup (callable): Called once the job is finished, however it
+                ended (run, failed, expired or rejected)
+
+        Returns:
+            Job: The queued job; its id can be returned to the client right away
+
+        Raises:
+            UserJobLimitError: If the user already has too many jobs in flight
+            JobQueueFullError: If the global queue (or the bulk lane) is full
+        """
+        self.start()
+        job = Job(user_id, sid, func, args, priority, cleanup)
+
+        with self._lock:
+            in_flight = self._user_jobs.get(user_id, 0)
+            if in_flight >= self.max_jobs_per_user:
+                self._counters['rejected'] += 1
+                self._cleanup(job)
+                raise UserJobLimitError(
+                    f"Too many jobs in progress (limit {self.max_jobs_per_user}), please wait",
+                    math.ceil(self._avg_run_seconds)
+                )
+            if priority >= PRIORITY_BULK and self._queued() >= self.max_queue * self.bulk_queue_share:
+                self._counters['rejected'] += 1
+                self._cleanup(job)
+                raise JobQueueFullError("Bulk imports are paused while the server is busy",
+                                        self._retry_after())
+            self._user_jobs[user_id] = in_flight + 1
+            self._jobs[job.id] = job
+
+        with self._queue_cond:
+            queued = self._queued()
+            if queued < self.max_queue:
+                self._lanes[PRIORITY_BULK if priority >= PRIORITY_BULK else PRIORITY_INTERACTIVE].append(job)
+                self._queue_cond.notify_all()
+        if queued >= self.max_queue:
+            self._finish(job, 'rejected')
+            raise JobQueueFullError("Server is busy, please try again shortly", self._retry_after())
+
+        return job
+
+    def get_job(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def notify(self, job: Job, payload: Dict):
+        """
+        Emit a message to the socket that submitted the job, or to all of the
+        user's sockets when the job has no originating socket. With a message
+        queue configured this reaches the socket on whichever instance holds it.
+        """
+        message = dict(payload)
+        message['job_id'] = job.id
+        target = job.sid or user_room(job.user_id)
+        with STAGE_SECONDS.labels(stage='emit').time():
+            self.socketio.emit('message', json.dumps(message), to=target)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            running = sum(1 for job in self._jobs.values() if job.status == 'running')
+            stats = {
+                'workers': self.workers,
+                'queue_depth': self._queued(),
+                'queue_capacity': self.max_queue,
+                'running': running,
+                'users_with_jobs': len(self._user_jobs),
+                'avg_run_seconds': self._avg_run_seconds
+            }
+            stats.update(self._counters)
+            return stats
+
+    def _retry_after(self) -> int:
+        """Seconds until the current backlog should have drained"""
+        backlog = self._queued() / max(self.workers, 1)
+        return max(1, math.ceil(backlog * self._avg_run_seconds))
+
+    def _queued(self) -> int:
+        return sum(len(lane) for lane in self._lanes.values())
+
+    def _next_job(self, interactive_only: bool) -> Job:
+        """Block until there is a job this worker may run and dequeue it"""
+        with self._queue_cond:
+            while True:
+                if self._lanes[PRIORITY_INTERACTIVE]:
+                    return self._lanes[PRIORITY_INTERACTIVE].popleft()
+                if self._lanes[PRIORITY_BULK] and not interactive_only:
+                    return self._lanes[PRIORITY_BULK].popleft()
+                self._queue_cond.wait()
+
+    def _worker_loop(self, interactive_only: bool = False):
+        while True:
+            self._run(self._next_job(interactive_only))
+
+    def _run(self, job: Job):
+        waited = (datetime.now() - job.created_at).total_seconds()
+        if waited > self.max_queue_wait:
+            # Shed stale work: the client is told to retry rather than wait ever longer
+            self._finish(job, 'expired')
+            try:
+                self.notify(job, {
+                    'type': 'busy',
+                    'error': 'Server is busy, please try again shortly',
+                    'retry_after': self._retry_after()
+                })
+            except Exception as emit_error:
+                logger.error(f"Could not report expiry of job {job.id}: {emit_error}")
+            return
+
+        job.status = 'running'
+        job.started_at = datetime.now()
+        started = time.perf_counter()
+        try:
+            job.func(job, *job.args)
+            self._finish(job, 'completed')
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {str(e)}")
+            job.error = str(e)
+            self._finish(job, 'failed')
+            try:
+                self.notify(job, {
+                    'type': 'processing_error',
+                    'error': f'Processing failed: {str(e)}'
+                })
+            except Exception as emit_error:
+                logger.error(f"Could not report failure of job {job.id}: {emit_error}")
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                # Smoothed job duration used for retry-after estimates
+                self._avg_run_seconds = 0.9 * self._avg_run_seconds + 0.1 * elapsed
+
+    def _finish(self, job: Job, status: str):
+        job.status = status
+        job.finished_at = datetime.now()
+        with self._lock:
+            if status in self._counters:
+                self._counters[status] += 1
+            remaining = self._user_jobs.get(job.user_id, 1) - 1
+            if remaining > 0:
+                self._user_jobs[job.user_id] = remaining
+            else:
+                self._user_jobs.pop(job.user_id, None)
+            self._jobs.pop(job.id, None)
+        self._cleanup(job)
+
+    @staticmethod
+    def _cleanup(job: Job):
+        if job.cleanup is None:
+            return
+        try:
+            job.cleanup()
+        except Exception as e:
+            logger.error(f"Cleanup of job {job.id} failed: {str(e)}")
@@ -0,0 +1,467 @@
+"""
+Extraction backends behind LLMService.
+
+LLM_BACKEND selects one:
+
+    dummy   canned results after LLM_DUMMY_LATENCY seconds (the default)
+    http    a model server speaking the JSON protocol below, on one or more
+            replicas listed in LLM_URLS
+
+HTTP protocol: ``POST <url>/extract`` with ``{"texts": [...]}`` answers
+``{"results": [...]}`` (one object per text, in order); ``POST
+<url>/extract/stream`` with ``{"text": ...}`` answers newline-delimited
+``{"field": ..., "value": ...}`` objects as the model decodes them;
+``GET <url>/health`` answers 200 when the replica can serve. scripts/fake_llm_server.py
+implements it for local runs and tests.
+"""
+import abc
+import collections
+import json
+import logging
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import metrics
+from config import config
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+LLM_ATTEMPTS = metrics.counter('placebuddy_llm_attempts_total', 'LLM backend calls by result', ['result'])
+
+
+class LLMUnavailableError(Exception):
+    """Raised when no replica produced a result before the deadline"""
+
+
+class LLMRequestRejectedError(LLMUnavailableError):
+    """Raised when a replica refuses the request itself; other replicas would too"""
+
+
+class LLMBackend(abc.ABC):
+    """Interface every extraction backend implements"""
+
+    name = 'base'
+    # True when extract_stream yields fields while the model is still decoding
+    streams = False
+
+    @abc.abstractmethod
+    def extract_batch(self, texts: List[str], deadline: Optional[float] = None) -> List[Dict]:
+        """
+        Extract company information for every text in one call
+
+        Args:
+            texts (list): Input texts, one posting each
+            deadline (float): time.monotonic() value by which to give up
+
+        Returns:
+            list: One dictionary of company information per text, in order
+        """
+
+    def extract_stream(self, text: str, deadline: Optional[float] = None) -> Iterator[Tuple[str, object]]:
+        """
+        Yield (field, value) pairs for one text as they become available.
+        Backends without streaming yield the whole result at once.
+        """
+        result = self.extract_batch([text], deadline)[0] or {}
+        yield from result.items()
+
+    def health_check(self) -> Dict:
+        """Details for health reporting; raises when the backend is unreachable"""
+        return {'backend': self.name}
+
+
+class DummyBackend(LLMBackend):
+    """Canned extractions, for development without a model server"""
+
+    name = 'dummy'
+    streams = True
+
+    def __init__(self, latency: float = 1.0):
+        self.latency = latency
+
+    def extract_batch(self, texts: List[str], deadline: Optional[float] = None) -> List[Dict]:
+        logger.info(f"DUMMY LLM: Simulating batched extraction for {len(texts)} text(s)")
+        results = [self._extract(text) for text in texts]
+
+        # Simulate a small delay to mimic network latency
+        # This is optional but can make the front-end experience feel more realistic
+        time.sleep(self.latency)
+
+        return results
+
+    def extract_stream(self, text: str, deadline: Optional[float] = None) -> Iterator[Tuple[str, object]]:
+        # Spread the simulated latency over the fields, name first
+        result = self._extract(text)
+        for field, value in result.items():
+            time.sleep(self.latency / len(result))
+            yield field, value
+
+    def _extract(self, text: str) -> Dict:
+        logger.info(f"DUMMY LLM: Simulating extraction for text: '{text[:50]}...'")
+
+        # This is the dummy data that will be returned every time
+        # You can add more variety here if needed for specific tests
+        dummy_data = {
+            'name': 'Dummy Corp',
+            'industry': 'Technology',
+            'location': 'San Francisco, CA',
+            'tier': 'tier1',
+            'description': 'A dummy company created for testing purposes.',
+            'contact_info': 'contact@dummycorp.com',
+        }
+
+        # You can add logic to simulate different outputs based on the input text
+        if "google" in text.lower():
+            dummy_data['name'] = 'Google'
+            dummy_data['tier'] = 'tier1'
+            dummy_data['description'] = 'Tech giant specializing in search and cloud services.'
+        elif "microsoft" in text.lower():
+            dummy_data['name'] = 'Microsoft'
+            dummy_data['tier'] = 'tier1'
+            dummy_data['description'] = 'Software and technology company.'
+
+        logger.info(f"DUMMY LLM: Returning simulated company data: {dummy_data['name']}")
+        return dummy_data
+
+
+class CircuitBreaker:
+    """
+    Stops calling a replica after ``failure_threshold`` consecutive failures.
+    After ``reset_timeout`` seconds a single trial call is let through; its
+    outcome closes or re-opens the breaker.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_in_flight or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+class LatencyTracker:
+    """Sliding window of recent successful call latencies"""
+
+    def __init__(self, window: int = 200):
+        self._samples = collections.deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < 20:
+            return None
+        return samples[min(int(len(samples) * fraction), len(samples) - 1)]
+
+
+class _RetryableError(Exception):
+    """An attempt failed in a way another attempt may not"""
+
+
+class HTTPBackend(LLMBackend):
+    """
+    Model server client with a bounded tail.
+
+    - One requests.Session per replica keeps a pool of persistent
+      connections, so calls skip the TCP/TLS handshake.
+    - Every call has a deadline; each attempt's timeout is what remains.
+    - Transport errors, 429 and 5xx are retried with full-jitter
+      exponential backoff, while time remains.
+    - A circuit breaker per replica skips replicas that keep failing.
+    - A replica that gives up (retries exhausted) fails over to the next
+      one, whenever that happens.
+    - With ``hedge`` on and a second replica, a call still running after the
+      recent p95 latency is duplicated to the next replica and the first
+      answer wins.
+    """
+
+    name = 'http'
+    streams = True
+
+    def __init__(self, urls: List[str], deadline: float = 15, max_retries: int = 2, backoff: float = 0.2,
+                 backoff_cap: float = 2.0, pool_size: int = 10, hedge: bool = False,
+                 hedge_min_delay: float = 0.05, breaker_threshold: int = 5, breaker_reset: float = 30):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        if not urls:
+            raise ValueError("HTTPBackend needs at least one replica URL")
+        self.urls = [url.rstrip('/') for url in urls]
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.backoff_cap = backoff_cap
+        self.hedge = hedge and len(self.urls) > 1
+        self.hedge_min_delay = hedge_min_delay
+        self._requests = requests
+        self._sessions = []
+        for _ in self.urls:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self._sessions.append(session)
+        self._breakers = [CircuitBreaker(breaker_threshold, breaker_reset) for _ in self.urls]
+        self._latency = LatencyTracker()
+        self._next = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=pool_size * len(self.urls), thread_name_prefix='llm-http')
+
+    def extract_batch(self, texts: List[str], deadline: Optional[float] = None) -> List[Dict]:
+        deadline = deadline or time.monotonic() + self.deadline
+        order = self._replica_order()
+        if not order:
+            LLM_ATTEMPTS.labels(result='breaker_open').inc()
+            raise LLMUnavailableError("Every LLM replica is failing; circuit breakers are open")
+
+        if not self.hedge or len(order) < 2:
+            error = None
+            for index in order:
+                if error is not None:
+                    LLM_ATTEMPTS.labels(result='failover').inc()
+                try:
+                    return self._call_with_retries(index, texts, deadline)
+                except LLMRequestRejectedError:
+                    raise
+                except LLMUnavailableError as e:
+                    error = e
+                if time.monotonic() >= deadline:
+                    break
+            raise error
+
+        hedge_after = self._latency.percentile(0.95)
+        replicas = iter(order)
+        pending = {self._executor.submit(self._call_with_retries, next(replicas), texts, deadline)}
+        hedged = False
+        error = None
+        while pending:
+            timeout = max(deadline - time.monotonic(), 0)
+            if not hedged and hedge_after is not None:
+                # Until the one hedge is sent, wake up after the recent p95 to send it
+                timeout = min(timeout, max(hedge_after, self.hedge_min_delay))
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    return future.result()
+                except LLMRequestRejectedError:
+                    raise
+                except Exception as e:
+                    error = e
+            if time.monotonic() >= deadline:
+                break
+            if done:
+                if pending:
+                    # The other attempt is still running; wait for it
+                    continue
+                result = 'failover'
+            elif not hedged and hedge_after is not None:
+                hedged = True
+                result = 'hedged'
+            else:
+                continue
+            index = next(replicas, None)
+            if index is None:
+                continue
+            LLM_ATTEMPTS.labels(result=result).inc()
+            pending.add(self._executor.submit(self._call_with_retries, index, texts, deadline))
+        raise LLMUnavailableError(f"LLM extraction failed: {error or 'deadline exceeded'}")
+
+    def extract_stream(self, text: str, deadline: Optional[float] = None) -> Iterator[Tuple[str, object]]:
+        """
+        Stream fields from one replica. If it fails before producing anything,
+        fall back to a buffered call (which retries and hedges); a failure
+        after fields were already yielded raises LLMUnavailableError.
+        """
+        deadline = deadline or time.monotonic() + self.deadline
+        order = self._replica_order()
+        if order and self._breakers[order[0]].allow():
+            index = order[0]
+            breaker = self._breakers[index]
+            yielded = False
+            try:
+                response = self._sessions[index].post(f"{self.urls[index]}/extract/stream", json={'text': text},
+                                                      stream=True, timeout=max(deadline - time.monotonic(), 0.001))
+                with response:
+                    if response.status_code != 200:
+                        raise _RetryableError(f"HTTP {response.status_code}")
+                    for line in response.iter_lines():
+                        if time.monotonic() > deadline:
+                            raise _RetryableError("deadline exceeded mid-stream")
+                        if line:
+                            item = json.loads(line)
+                            yielded = True
+                            yield item['field'], item['value']
+                breaker.record_success()
+                LLM_ATTEMPTS.labels(result='ok').inc()
+                return
+            except (self._requests.RequestException, _RetryableError, ValueError, KeyError) as e:
+                breaker.record_failure()
+                LLM_ATTEMPTS.labels(result='error').inc()
+                if yielded:
+                    raise LLMUnavailableError(f"LLM stream from {self.urls[index]} broke off: {e}") from None
+                logger.warning(f"LLM stream from {self.urls[index]} failed, falling back: {e}")
+
+        yield from super().extract_stream(text, deadline)
+
+    def health_check(self) -> Dict:
+        replicas = {}
+        for index, url in enumerate(self.urls):
+            started = time.perf_counter()
+            try:
+                response = self._sessions[index].get(f"{url}/health", timeout=2)
+                reachable = response.status_code == 200
+            except self._requests.RequestException:
+                reachable = False
+            replicas[url] = {
+                'reachable': reachable,
+                'breaker': self._breakers[index].state,
+                'latency_ms': round((time.perf_counter() - started) * 1000, 2)
+            }
+        if not any(replica['reachable'] for replica in replicas.values()):
+            raise LLMUnavailableError("No LLM replica is reachable")
+        p95 = self._latency.percentile(0.95)
+        return {'backend': self.name, 'replicas': replicas, 'p95_ms': round(p95 * 1000, 2) if p95 else None}
+
+    def _replica_order(self) -> List[int]:
+        """Round-robin start, skipping replicas whose breaker is open"""
+        with self._lock:
+            start = self._next
+            self._next = (self._next + 1) % len(self.urls)
+        rotated = [(start + offset) % len(self.urls) for offset in range(len(self.urls))]
+        return [index for index in rotated if self._breakers[index].state != 'open']
+
+    def _call_with_retries(self, index: int, texts: List[str], deadline: float) -> List[Dict]:
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                LLM_ATTEMPTS.labels(result='timeout').inc()
+                raise LLMUnavailableError("LLM deadline exceeded")
+            try:
+                return self._call(index, texts, remaining)
+            except _RetryableError as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise LLMUnavailableError(f"LLM replica {self.urls[index]} failed: {e}") from None
+                # Full jitter keeps retries from many workers from synchronising
+                delay = random.uniform(0, min(self.backoff_cap, self.backoff * 2 ** attempt))
+                time.sleep(min(delay, max(deadline - time.monotonic(), 0)))
+
+    def _call(self, index: int, texts: List[str], timeout: float) -> List[Dict]:
+        breaker = self._breakers[index]
+        if not breaker.allow():
+            LLM_ATTEMPTS.labels(result='breaker_open').inc()
+            raise LLMUnavailableError(f"Circuit breaker for {self.urls[index]} is open")
+        started = time.perf_counter()
+        try:
+            response = self._sessions[index].post(f"{self.urls[index]}/extract", json={'texts': texts},
+                                                  timeout=timeout)
+        except self._requests.RequestException as e:
+            breaker.record_failure()
+            LLM_ATTEMPTS.labels(result='error').inc()
+            raise _RetryableError(str(e)) from None
+
+        if response.status_code == 429 or response.status_code >= 500:
+            breaker.record_failure()
+            LLM_ATTEMPTS.labels(result='error').inc()
+            raise _RetryableError(f"HTTP {response.status_code}")
+        if response.status_code != 200:
+            # A request the server rejects will not get better on retry
+            breaker.record_success()
+            LLM_ATTEMPTS.labels(result='rejected').inc()
+            raise LLMRequestRejectedError(f"LLM replica rejected the request: HTTP {response.status_code}")
+
+        try:
+            results = response.json().get('results') or []
+            if not isinstance(results, list) or not all(isinstance(result, dict) for result in results):
+                raise ValueError("results is not a list of objects")
+        except (ValueError, AttributeError) as e:
+            # A malformed body must still settle the breaker, or a half-open trial never ends
+            breaker.record_failure()
+            LLM_ATTEMPTS.labels(result='error').inc()
+            raise _RetryableError(f"Malformed response: {e}") from None
+        if len(results) != len(texts):
+            breaker.record_failure()
+            LLM_ATTEMPTS.labels(result='error').inc()
+            raise _RetryableError(f"Expected {len(texts)} results, got {len(results)}")
+
+        breaker.record_success()
+        self._latency.record(time.perf_counter() - started)
+        LLM_ATTEMPTS.labels(result='ok').inc()
+        return results
+
+
+def create_llm_backend() -> LLMBackend:
+    """Build the backend selected by LLM_BACKEND"""
+    kind = getattr(config, 'LLM_BACKEND', 'dummy')
+    if kind == 'dummy':
+        return DummyBackend(latency=getattr(config, 'LLM_DUMMY_LATENCY', 1.0))
+    if kind == 'http':
+        urls = getattr(config, 'LLM_URLS', [])
+        if isinstance(urls, str):
+            urls = [url.strip() for url in urls.split(',') if url.strip()]
+        return HTTPBackend(
+            urls,
+            deadline=getattr(config, 'LLM_DEADLINE', 15),
+            max_retries=getattr(config, 'LLM_MAX_RETRIES', 2),
+            backoff=getattr(config, 'LLM_RETRY_BACKOFF', 0.2),
+            pool_size=getattr(config, 'LLM_POOL_SIZE', 10),
+            hedge=getattr(config, 'LLM_HEDGE', False),
+            breaker_threshold=getattr(config, 'LLM_BREAKER_THRESHOLD', 5),
+            breaker_reset=getattr(config, 'LLM_BREAKER_RESET', 30)
+        )
+    raise ValueError(f"Unsupported LLM_BACKEND: {kind}")
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_llm_backend() -> LLMBackend:
+    """Get the process-wide extraction backend configured from config"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_llm_backend()
+    return _backend
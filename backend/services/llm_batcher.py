@@ -0,0 +1,108 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from queue import Queue, Empty
+from typing import Callable, Dict, List
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 characters per token)"""
+    return len(text) // 4 + 1
+
+
+class ExtractionBatcher:
+    """
+    Micro-batching front-end for LLM extraction.
+
+    Requests submitted within ``window_ms`` of the first pending request are
+    grouped (up to ``max_batch_size`` texts or ``max_tokens`` estimated input
+    tokens) and sent as a single call to ``extract_batch``, which must return
+    one result per text in order. Each caller gets a Future for its own item.
+    """
+
+    def __init__(self, extract_batch: Callable[[List[str]], List[Dict]], window_ms: float = 25,
+                 max_batch_size: int = 8, max_tokens: int = 6000, max_concurrent_batches: int = 4):
+        self.extract_batch = extract_batch
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self.max_tokens = max_tokens
+        self._queue: Queue = Queue()
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent_batches, thread_name_prefix='llm-batch')
+        self._pending = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._counters = {'requests': 0, 'batches': 0}
+
+    def submit(self, text: str) -> Future:
+        """Queue a text for extraction and return a Future for its result"""
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((text, future))
+        with self._lock:
+            self._counters['requests'] += 1
+        return future
+
+    def extract(self, text: str) -> Dict:
+        """Blocking convenience wrapper around submit()"""
+        return self.submit(text).result()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._counters)
+        stats['avg_batch_size'] = stats['requests'] / stats['batches'] if stats['batches'] else 0.0
+        stats['queue_depth'] = self._queue.qsize()
+        return stats
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._collect_loop, name='llm-batcher', daemon=True)
+                self._thread.start()
+
+    def _collect_loop(self):
+        while True:
+            batch = [self._pending or self._queue.get()]
+            self._pending = None
+            tokens = estimate_tokens(batch[0][0])
+            deadline = time.monotonic() + self.window
+
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except Empty:
+                    break
+                item_tokens = estimate_tokens(item[0])
+                if tokens + item_tokens > self.max_tokens:
+                    # Start the next batch with this item
+                    self._pending = item
+                    break
+                batch.append(item)
+                tokens += item_tokens
+
+            with self._lock:
+                self._counters['batches'] += 1
+            self._executor.submit(self._dispatch, batch)
+
+    def _dispatch(self, batch):
+        texts = [text for text, _ in batch]
+        try:
+            results = self.extract_batch(texts)
+            if len(results) != len(batch):
+                raise ValueError(f"Batch extraction returned {len(results)} results for {len(batch)} texts")
+        except Exception as e:
+            logger.error(f"Batch extraction of {len(batch)} texts failed: {str(e)}")
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
@@ -1,53 +1,236 @@
 import logging
 import json
-from typing import Dict
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+from config import config
+from metrics import STAGE_SECONDS
+from services.extraction_cache import ExtractionCache, cache_key, get_extraction_cache
+from services.llm_backends import LLMBackend, get_llm_backend
+from services.llm_batcher import ExtractionBatcher
+from services.pre_extractor import PRE_EXTRACT, PreExtractor, get_pre_extractor
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 class LLMService:
     """
-    Dummy service to simulate LLM responses for testing.
-    This bypasses any real API calls to avoid dependencies and errors.
+    Company extraction on top of a pluggable backend (see llm_backends),
+    with result caching and request micro-batching. A rule-based
+    pre-extractor runs first and skips the LLM when it finds every
+    required field.
     """
     
+    def __init__(self, cache: Optional[ExtractionCache] = None, batcher: Optional[ExtractionBatcher] = None,
+                 backend: Optional[LLMBackend] = None, pre_extractor: Optional[PreExtractor] = None):
+        self.cache = cache or get_extraction_cache()
+        self.batcher = batcher
+        self.backend = backend or get_llm_backend()
+        self.pre_extractor = pre_extractor or get_pre_extractor()
+
     def extract_company_info(self, text: str) -> Dict:
         """
-        Simulates the extraction of company information from text using an LLM.
+        Extract company information: rule-based fields first, the (cached)
+        LLM only for what the rules could not fill.
         
         Args:
             text (str): The input text to process.
             
         Returns:
-            Dict: A dictionary with dummy company information.
-        """
-        logger.info(f"DUMMY LLM: Simulating extraction for text: '{text[:50]}...'")
-        
-        # This is the dummy data that will be returned every time
-        # You can add more variety here if needed for specific tests
-        dummy_data = {
-            'name': 'Dummy Corp',
-            'industry': 'Technology',
-            'location': 'San Francisco, CA',
-            'tier': 'tier1',
-            'description': 'A dummy company created for testing purposes.',
-            'contact_info': 'contact@dummycorp.com',
-        }
-        
-        # You can add logic to simulate different outputs based on the input text
-        if "google" in text.lower():
-            dummy_data['name'] = 'Google'
-            dummy_data['tier'] = 'tier1'
-            dummy_data['description'] = 'Tech giant specializing in search and cloud services.'
-        elif "microsoft" in text.lower():
-            dummy_data['name'] = 'Microsoft'
-            dummy_data['tier'] = 'tier1'
-            dummy_data['description'] = 'Software and technology company.'
+            Dict: A dictionary with company information.
+        """
+        ruled = self._pre_extract(text)
+        if ruled is not None and not self.pre_extractor.missing(ruled):
+            return ruled
+        
+        with STAGE_SECONDS.labels(stage='llm').time():
+            extracted = self.cache.get_or_compute(text, self._extract)
+        return self._fill_name(text, self._merge(extracted, ruled), ruled)
+
+    def extract_company_info_many(self, texts: List[str]) -> List[Dict]:
+        """
+        Extract many texts at once: cached texts are served from the cache and
+        all misses go to the LLM in a single batched call.
+        
+        Args:
+            texts (list): Input texts, one posting each.
             
-        # Simulate a small delay to mimic network latency
-        # This is optional but can make the front-end experience feel more realistic
-        import time
-        time.sleep(1)
+        Returns:
+            list: One dictionary of company information per text, in order.
+        """
+        ruled = [self._pre_extract(text) for text in texts]
+        keys = [cache_key(text) for text in texts]
+        results = [
+            fields if fields is not None and not self.pre_extractor.missing(fields) else self.cache.get(key)
+            for fields, key in zip(ruled, keys)
+        ]
+        misses = [index for index, result in enumerate(results) if result is None]
+        if misses:
+            with STAGE_SECONDS.labels(stage='llm').time():
+                extracted = self.extract_company_info_batch([texts[index] for index in misses])
+            for index, result in zip(misses, extracted):
+                results[index] = result
+                if result:
+                    self.cache.set(keys[index], result)
+        return [
+            self._fill_name(text, self._merge(result, fields), fields)
+            for text, result, fields in zip(texts, results, ruled)
+        ]
+
+    def stream_company_info(self, text: str) -> Iterator[Tuple[str, object]]:
+        """
+        Yield (field, value) pairs as soon as each is known: rule-based fields
+        first, then LLM fields as the backend decodes them. Each field is
+        yielded once; rule values win. A known company mentioned in the
+        text comes last, and only when nothing else named the company.
+        
+        Streams share the cache with extract_company_info: a cached text is
+        replayed, a text already being extracted waits for that result, and
+        a finished stream is cached. A stream that leads goes to the backend
+        directly when it can stream (token streams cannot be micro-batched)
+        and through the micro-batcher otherwise.
+        
+        Args:
+            text (str): The input text to process.
+            
+        Returns:
+            Iterator: (field, value) pairs.
+        """
+        named = False
+        for field, value in self._stream_fields(text):
+            named = named or (field == 'name' and bool(value))
+            yield field, value
+        if not named:
+            name = self._known_company(text)
+            if name:
+                yield 'name', name
+
+    def _stream_fields(self, text: str) -> Iterator[Tuple[str, object]]:
+        """Rule-based fields, then the streamed, shared or cached LLM fields they leave open"""
+        ruled = self._pre_extract(text) or {}
+        yield from ruled.items()
+        if ruled and not self.pre_extractor.missing(ruled):
+            return
+        
+        key = cache_key(text)
+        cached = self.cache.get(key)
+        if cached is None:
+            slot, leader = self.cache.claim(key)
+            if leader:
+                yield from self._stream_and_cache(text, key, slot, ruled)
+                return
+            # The same text is already being extracted; share that result
+            cached = self.cache.wait(slot)
+            if not cached:
+                # The leader gave up or found nothing; run the usual cached path
+                cached = self.cache.get_or_compute(text, self._extract) or {}
+        yield from ((field, value) for field, value in cached.items() if field not in ruled)
+
+    def _stream_and_cache(self, text: str, key: str, slot, ruled: Dict) -> Iterator[Tuple[str, object]]:
+        """Stream one extraction from the backend, then hand the full result to the cache waiters"""
+        started = time.perf_counter()
+        extracted = {}
+        complete = False
+        # Without real streaming nothing arrives early, so let the batcher share the call
+        fields = self.backend.extract_stream(text) if self.backend.streams else self._extract_items(text)
+        try:
+            for field, value in fields:
+                extracted[field] = value
+                if field not in ruled:
+                    yield field, value
+            complete = True
+        except Exception as e:
+            self.cache.finish(key, slot, error=e)
+            raise
+        finally:
+            if not complete and not slot.done.is_set():
+                # Abandoned mid-stream: a partial result must not be cached
+                self.cache.finish(key, slot)
+        STAGE_SECONDS.labels(stage='llm').observe(time.perf_counter() - started)
+        self.cache.finish(key, slot, extracted)
+
+    def _extract_items(self, text: str) -> Iterator[Tuple[str, object]]:
+        """A (micro-batched) single extraction, yielded as one chunk of fields"""
+        yield from (self._extract(text) or {}).items()
+
+    def _pre_extract(self, text: str) -> Optional[Dict]:
+        """Rule-based fields for text, or None when the pre-extractor is disabled"""
+        if self.pre_extractor is None:
+            return None
+        with STAGE_SECONDS.labels(stage='pre_extract').time():
+            fields = self.pre_extractor.extract(text)
+        missing = self.pre_extractor.missing(fields)
+        PRE_EXTRACT.labels(result='none' if not fields else 'partial' if missing else 'complete').inc()
+        return fields
+
+    def _known_company(self, text: str) -> Optional[str]:
+        if self.pre_extractor is None:
+            return None
+        return self.pre_extractor.match_known_company(text)
+
+    def _fill_name(self, text: str, result: Optional[Dict], ruled: Optional[Dict]) -> Optional[Dict]:
+        """Fall back to a known company mentioned in text when neither a label nor the LLM gave a name"""
+        if result and result.get('name'):
+            return result
+        name = self._known_company(text)
+        if not name:
+            return result
+        return dict(result or ruled or {}, name=name)
+
+    @staticmethod
+    def _merge(extracted: Optional[Dict], ruled: Optional[Dict]) -> Optional[Dict]:
+        """LLM result with the rule-based fields on top (they are only set when unambiguous)"""
+        if not ruled:
+            return extracted
+        if not extracted:
+            return dict(ruled) if ruled.get('name') else extracted
+        return dict(extracted, **ruled)
+
+    def health_check(self) -> Dict:
+        """
+        Report whether the extraction backend is reachable (raises if not).
         
-        logger.info(f"DUMMY LLM: Returning simulated company data: {dummy_data['name']}")
-        return dummy_data
\ No newline at end of file
+        Returns:
+            Dict: Details about the backend for health reporting.
+        """
+        return self.backend.health_check()
+
+    def _extract(self, text: str) -> Dict:
+        """Run a single extraction, through the micro-batcher when enabled"""
+        batcher = self.batcher or get_llm_batcher()
+        if batcher is not None:
+            return batcher.extract(text)
+        return self.extract_company_info_batch([text])[0]
+
+    def extract_company_info_batch(self, texts: List[str]) -> List[Dict]:
+        """
+        Extract every text with one backend call.
+        
+        Args:
+            texts (list): Input texts, one posting each.
+            
+        Returns:
+            list: One dictionary of company information per text, in order.
+        """
+        return self.backend.extract_batch(texts)
+
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+
+def get_llm_batcher() -> Optional[ExtractionBatcher]:
+    """Get the shared extraction batcher, or None when batching is disabled"""
+    global _batcher
+    if not getattr(config, 'LLM_BATCH_ENABLED', True):
+        return None
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                _batcher = ExtractionBatcher(
+                    LLMService().extract_company_info_batch,
+                    window_ms=getattr(config, 'LLM_BATCH_WINDOW_MS', 25),
+                    max_batch_size=getattr(config, 'LLM_BATCH_MAX_SIZE', 8),
+                    max_tokens=getattr(config, 'LLM_BATCH_MAX_TOKENS', 6000)
+                )
+    return _batcher
@@ -0,0 +1,173 @@
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config import config
+from database.models import CompanyModel
+from database.normalize import normalize_company_name
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+def trigrams(key: str) -> set:
+    """Character trigrams of a normalized name, padded so short names still match"""
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NearDuplicateIndex:
+    """
+    In-memory trigram index over company names.
+
+    Each normalized name is broken into character trigrams and stored in an
+    inverted index (trigram -> company ids). A query only touches companies
+    sharing at least one trigram and scores them with the Dice coefficient,
+    so "Gogle" finds "Google" without scanning the companies table.
+    """
+
+    def __init__(self, min_score: float = 0.6):
+        self.min_score = min_score
+        self._postings: Dict[str, set] = defaultdict(set)
+        self._grams: Dict[int, int] = {}
+        self._names: Dict[int, str] = {}
+        self._keys: Dict[int, str] = {}
+        self._lock = threading.RLock()
+        self.max_id = 0
+
+    def __len__(self):
+        return len(self._names)
+
+    def load(self, rows: Iterable[Tuple[int, str]]):
+        """Bulk-add (company_id, name) rows"""
+        for company_id, name in rows:
+            self.add(company_id, name)
+
+    def add(self, company_id: int, name: str):
+        """Index a single company (re-adding an id replaces its name)"""
+        key = normalize_company_name(name)
+        if not key:
+            return
+        grams = trigrams(key)
+        with self._lock:
+            if company_id in self._keys:
+                self.remove(company_id)
+            for gram in grams:
+                self._postings[gram].add(company_id)
+            self._grams[company_id] = len(grams)
+            self._names[company_id] = name
+            self._keys[company_id] = key
+            self.max_id = max(self.max_id, company_id)
+
+    def remove(self, company_id: int):
+        with self._lock:
+            key = self._keys.pop(company_id, None)
+            if key is None:
+                return
+            for gram in trigrams(key):
+                postings = self._postings.get(gram)
+                if postings is not None:
+                    postings.discard(company_id)
+                    if not postings:
+                        del self._postings[gram]
+            self._grams.pop(company_id, None)
+            self._names.pop(company_id, None)
+
+    def query(self, name: str, limit: int = 5, min_score: Optional[float] = None) -> List[Dict]:
+        """
+        Find companies whose names look like name
+
+        Args:
+            name (str): Company name to check
+            limit (int): Maximum number of candidates
+            min_score (float): Minimum Dice similarity (defaults to the index setting)
+
+        Returns:
+            list: Candidates sorted by score, each {'company_id', 'name', 'score'}
+        """
+        key = normalize_company_name(name)
+        if not key:
+            return []
+        threshold = self.min_score if min_score is None else min_score
+        grams = trigrams(key)
+
+        with self._lock:
+            overlap: Dict[int, int] = defaultdict(int)
+            for gram in grams:
+                for company_id in self._postings.get(gram, ()):
+                    overlap[company_id] += 1
+
+            candidates = []
+            for company_id, shared in overlap.items():
+                score = 2.0 * shared / (len(grams) + self._grams[company_id])
+                if score >= threshold:
+                    candidates.append({
+                        'company_id': company_id,
+                        'name': self._names[company_id],
+                        'score': round(score, 3)
+                    })
+
+        candidates.sort(key=lambda candidate: candidate['score'], reverse=True)
+        return candidates[:limit]
+
+
+_index = None
+_index_lock = threading.Lock()
+_last_refresh = None
+_last_rebuild = None
+_refreshing = False
+
+
+def get_near_duplicate_index() -> NearDuplicateIndex:
+    """
+    Get the process-wide index. It is loaded from the companies table on a
+    background thread, topped up with rows inserted by other processes every
+    NEAR_DUP_REFRESH_SECONDS and rebuilt from scratch every
+    NEAR_DUP_REBUILD_SECONDS so companies deleted elsewhere drop out.
+    Callers never wait for the query.
+    """
+    global _index, _last_refresh, _last_rebuild, _refreshing
+    refresh_interval = getattr(config, 'NEAR_DUP_REFRESH_SECONDS', 30)
+    rebuild_interval = getattr(config, 'NEAR_DUP_REBUILD_SECONDS', 600)
+
+    with _index_lock:
+        if _index is None:
+            _index = NearDuplicateIndex(min_score=getattr(config, 'NEAR_DUP_MIN_SCORE', 0.6))
+            _last_refresh = _last_rebuild = None
+        index = _index
+        now = time.monotonic()
+        rebuild = _last_rebuild is None or now - _last_rebuild > rebuild_interval
+        refresh = not _refreshing and (rebuild or now - _last_refresh > refresh_interval)
+        if refresh:
+            _refreshing = True
+            _last_refresh = now
+            if rebuild:
+                _last_rebuild = now
+
+    if refresh:
+        threading.Thread(target=_refresh_index, args=(index, rebuild), name='near-dup-refresh', daemon=True).start()
+    return index
+
+
+def _refresh_index(index: NearDuplicateIndex, rebuild: bool):
+    """Pull new companies into index, or load a fresh index and swap it in"""
+    global _index, _refreshing
+    try:
+        started = time.monotonic()
+        if rebuild:
+            fresh = NearDuplicateIndex(min_score=index.min_score)
+            fresh.load(CompanyModel.get_company_names())
+            with _index_lock:
+                _index = fresh
+            index = fresh
+        else:
+            index.load(CompanyModel.get_company_names(after_id=index.max_id))
+        logger.info(f"Near-duplicate index has {len(index)} companies "
+                    f"({'rebuilt' if rebuild else 'refreshed'} in {(time.monotonic() - started) * 1000:.1f}ms)")
+    except Exception as e:
+        logger.error(f"Near-duplicate index refresh failed: {str(e)}")
+    finally:
+        with _index_lock:
+            _refreshing = False
@@ -0,0 +1,216 @@
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from typing import Dict, Optional
+
+import bcrypt
+from werkzeug.security import check_password_hash
+import metrics
+from async_support import run_blocking
+from config import config
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+_COST_RE = re.compile(r'^\$2[abxy]?\$(\d{2})\$')
+# Hashes written by werkzeug for accounts imported from the old api_server tables
+_LEGACY_PREFIXES = ('pbkdf2:', 'scrypt:')
+
+
+class PasswordHasherBusyError(Exception):
+    """Raised when the hashing queue is full; callers should retry later"""
+
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def hash_cost(hashed: str) -> Optional[int]:
+    """Work factor encoded in a bcrypt hash, or None if it is not a bcrypt hash"""
+    match = _COST_RE.match(hashed or '')
+    return int(match.group(1)) if match else None
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a dedicated, size-limited thread pool.
+
+    bcrypt releases the GIL, so a pool sized to the CPU count hashes in
+    parallel while web workers only wait on a future. At most
+    ``max_pending`` operations may be queued or running; beyond that callers
+    get PasswordHasherBusyError instead of piling up behind the CPU.
+
+    The work factor is either fixed (``rounds``) or tuned at start-up so one
+    hash takes about ``target_ms``.
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_pending: int = 64, rounds: Optional[int] = None,
+                 target_ms: float = 250, min_rounds: int = 10, max_rounds: int = 15, timeout: float = 10):
+        self.workers = workers or os.cpu_count() or 2
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.min_rounds = min_rounds
+        self.max_rounds = max_rounds
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='bcrypt')
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._counters = {'completed': 0, 'rejected': 0, 'rehashed': 0}
+        self._wait_ms_total = 0.0
+        self._run_ms_total = 0.0
+        self.rounds = rounds or self.calibrate(target_ms)
+
+    def calibrate(self, target_ms: float) -> int:
+        """Pick the highest work factor whose hash time stays within target_ms"""
+        started = time.perf_counter()
+        bcrypt.hashpw(b'calibration', bcrypt.gensalt(self.min_rounds))
+        base_ms = (time.perf_counter() - started) * 1000
+
+        rounds = self.min_rounds
+        # Each extra round doubles the cost
+        while rounds < self.max_rounds and base_ms * 2 ** (rounds + 1 - self.min_rounds) <= target_ms:
+            rounds += 1
+        logger.info(f"bcrypt cost {self.min_rounds} takes {base_ms:.0f}ms; using cost {rounds} "
+                    f"for a {target_ms:.0f}ms target")
+        return rounds
+
+    def hash(self, password: str) -> str:
+        """Hash a password at the current work factor"""
+        rounds = self.rounds
+        hashed = self._run(lambda: bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)))
+        return hashed.decode('utf-8')
+
+    def verify(self, password: str, hashed: str) -> bool:
+        """Check a password against a stored hash (legacy werkzeug hashes are rehashed on login)"""
+        if hashed.startswith(_LEGACY_PREFIXES):
+            return self._run(lambda: check_password_hash(hashed, password))
+        return self._run(lambda: bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8')))
+
+    def needs_rehash(self, hashed: str) -> bool:
+        # Only upgrade: nodes calibrated to a lower cost must not undo a stronger hash
+        cost = hash_cost(hashed)
+        return cost is None or cost < self.rounds
+
+    def rehash_in_background(self, password: str, save) -> bool:
+        """
+        Re-hash a password at the current cost and pass the result to save()
+        without making the caller wait. Skipped when the pool is busy.
+        """
+        if not self._slots.acquire(blocking=False):
+            return False
+        self._track(1)
+        rounds = self.rounds
+
+        def task():
+            try:
+                hashed = run_blocking(bcrypt.hashpw, password.encode('utf-8'), bcrypt.gensalt(rounds))
+                hashed = hashed.decode('utf-8')
+                save(hashed)
+                with self._lock:
+                    self._counters['rehashed'] += 1
+            except Exception as e:
+                logger.error(f"Password rehash failed: {str(e)}")
+            finally:
+                self._track(-1)
+                self._slots.release()
+
+        self._executor.submit(task)
+        return True
+
+    def stats(self) -> Dict:
+        with self._lock:
+            completed = self._counters['completed']
+            return {
+                'workers': self.workers,
+                'rounds': self.rounds,
+                'pending': self._pending,
+                'queue_depth': max(self._pending - self.workers, 0),
+                'capacity': self.max_pending,
+                'completed': completed,
+                'rejected': self._counters['rejected'],
+                'rehashed': self._counters['rehashed'],
+                'avg_wait_ms': self._wait_ms_total / completed if completed else 0.0,
+                'avg_run_ms': self._run_ms_total / completed if completed else 0.0
+            }
+
+    def _track(self, delta: int):
+        with self._lock:
+            self._pending += delta
+
+    def _run(self, func):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._counters['rejected'] += 1
+            raise PasswordHasherBusyError("Too many logins in progress, please retry shortly")
+
+        self._track(1)
+        submitted = time.perf_counter()
+        timing = {}
+
+        def release():
+            self._track(-1)
+            self._slots.release()
+
+        def task():
+            timing['started'] = time.perf_counter()
+            try:
+                return run_blocking(func)
+            finally:
+                # Held until bcrypt is really done, even when the caller stopped waiting
+                release()
+
+        try:
+            future = self._executor.submit(task)
+        except Exception:
+            release()
+            raise
+        try:
+            result = future.result(timeout=self.timeout)
+        except FuturesTimeoutError:
+            # Work that never started is dropped; running work keeps its slot until it ends
+            if future.cancel():
+                release()
+            raise
+        finished = time.perf_counter()
+        with self._lock:
+            self._counters['completed'] += 1
+            self._wait_ms_total += (timing['started'] - submitted) * 1000
+            self._run_ms_total += (finished - timing['started']) * 1000
+        return result
+
+_hasher = None
+_hasher_lock = threading.Lock()
+
+PASSWORD_HASHER = metrics.gauge('placebuddy_password_hasher', 'Password hasher queue and slot usage', ['stat'])
+PASSWORD_HASHER.set_function(lambda: {
+    stat: value for stat, value in _hasher.stats().items()
+    if stat in ('pending', 'queue_depth', 'capacity', 'workers', 'rounds')
+} if _hasher else {})
+PASSWORD_HASHER_MS = metrics.gauge('placebuddy_password_hasher_avg_ms', 'Average password hashing time by phase',
+                                   ['phase'])
+PASSWORD_HASHER_MS.set_function(lambda: {
+    'wait': _hasher.stats()['avg_wait_ms'], 'run': _hasher.stats()['avg_run_ms']
+} if _hasher else {})
+PASSWORD_HASHER_WORK = metrics.counter('placebuddy_password_hasher_total', 'Password hasher work by outcome',
+                                       ['result'])
+PASSWORD_HASHER_WORK.set_function(lambda: {
+    result: count for result, count in _hasher.stats().items() if result in ('completed', 'rejected', 'rehashed')
+} if _hasher else {})
+
+
+def get_password_hasher() -> PasswordHasher:
+    """Get the process-wide password hasher configured from config"""
+    global _hasher
+    if _hasher is None:
+        with _hasher_lock:
+            if _hasher is None:
+                _hasher = PasswordHasher(
+                    workers=getattr(config, 'BCRYPT_WORKERS', None),
+                    max_pending=getattr(config, 'BCRYPT_MAX_PENDING', 64),
+                    rounds=getattr(config, 'BCRYPT_ROUNDS', None),
+                    target_ms=getattr(config, 'BCRYPT_TARGET_MS', 250)
+                )
+    return _hasher
@@ -0,0 +1,135 @@
+"""
+Split digest mails and exports into individual job postings.
+
+Every splitter consumes its input lazily (an iterable of lines or a file
+path) and yields one posting text at a time, so a large upload is never
+held in memory as a whole.
+"""
+import csv
+import os
+import re
+from email import policy
+from email.parser import BytesFeedParser
+from typing import Iterable, Iterator
+
+# A line made only of ---, ===, ***, ___, ~~~ or ### separates postings
+_SEPARATOR_RE = re.compile(r'^\s*([-=_*~#])\1{2,}\s*$')
+# A "Company:" line starts a new posting in templated digests
+_START_RE = re.compile(r'^\s*(?:company|organi[sz]ation|employer)(?:\s+name)?\s*[:\-–]', re.IGNORECASE)
+_TAG_RE = re.compile(r'<[^>]+>')
+
+TEXT_COLUMNS = ('text', 'posting', 'description', 'body', 'content', 'message', 'details')
+SUPPORTED_EXTENSIONS = ('.txt', '.csv', '.eml')
+
+MIN_POSTING_CHARS = 20
+MAX_POSTING_CHARS = 20000
+
+
+def split_text_lines(lines: Iterable[str], max_chars: int = MAX_POSTING_CHARS) -> Iterator[str]:
+    """
+    Split free text into postings at separator lines, at two or more blank
+    lines, and before each "Company:" line. Postings longer than max_chars
+    are cut so one runaway block cannot grow without bound.
+    """
+    buffer, size, blank_run = [], 0, 0
+
+    def flush():
+        posting = '\n'.join(buffer).strip()
+        buffer.clear()
+        return posting if len(posting) >= MIN_POSTING_CHARS else None
+
+    for line in lines:
+        line = line.rstrip('\r\n')
+        boundary = False
+        if _SEPARATOR_RE.match(line):
+            boundary, line = True, None
+        elif not line.strip():
+            blank_run += 1
+            boundary = blank_run >= 2
+        else:
+            boundary = blank_run >= 2 or (_START_RE.match(line) is not None and size > 0)
+            blank_run = 0
+
+        if boundary or size >= max_chars:
+            posting = flush()
+            size = 0
+            if posting:
+                yield posting
+        if line is not None and (line.strip() or buffer):
+            buffer.append(line)
+            size += len(line)
+
+    posting = flush()
+    if posting:
+        yield posting
+
+
+def split_csv_lines(lines: Iterable[str]) -> Iterator[str]:
+    """
+    One posting per CSV row. A text-like column (text, description, ...) is
+    used as the posting, prefixed with the company column when present;
+    otherwise the row is rendered as "header: value" lines.
+    """
+    reader = csv.reader(lines)
+    header = next(reader, None)
+    if not header:
+        return
+    names = [column.strip().lower() for column in header]
+    text_index = next((names.index(column) for column in TEXT_COLUMNS if column in names), None)
+    company_index = names.index('company') if 'company' in names else None
+
+    for row in reader:
+        if not any(cell.strip() for cell in row):
+            continue
+        if text_index is not None and text_index < len(row):
+            posting = row[text_index].strip()
+            if company_index is not None and company_index < len(row) and row[company_index].strip():
+                posting = f"Company: {row[company_index].strip()}\n{posting}"
+        else:
+            posting = '\n'.join(f"{header[i]}: {cell}" for i, cell in enumerate(row) if i < len(header) and cell)
+        if len(posting) >= MIN_POSTING_CHARS:
+            yield posting[:MAX_POSTING_CHARS]
+
+
+def read_eml_body(path: str, chunk_size: int = 64 * 1024) -> str:
+    """
+    Plain-text body of an .eml file (HTML parts are stripped of tags when
+    there is no text part). The file is fed to the parser in chunks; the
+    parsed message itself is bounded by the upload size limit.
+    """
+    parser = BytesFeedParser(policy=policy.default)
+    with open(path, 'rb') as handle:
+        for chunk in iter(lambda: handle.read(chunk_size), b''):
+            parser.feed(chunk)
+    message = parser.close()
+
+    part = message.get_body(preferencelist=('plain', 'html'))
+    if part is None:
+        return ''
+    content = part.get_content()
+    if part.get_content_subtype() == 'html':
+        content = _TAG_RE.sub(' ', content)
+    return content
+
+
+def iter_file_postings(path: str, remove: bool = False) -> Iterator[str]:
+    """
+    Postings from a .txt, .csv or .eml file, read lazily. With remove set the
+    file is deleted once iteration ends (used for uploaded temp files).
+    """
+    extension = os.path.splitext(path)[1].lower()
+    try:
+        if extension == '.eml':
+            yield from split_text_lines(read_eml_body(path).splitlines())
+        else:
+            with open(path, encoding='utf-8', errors='replace', newline='') as handle:
+                if extension == '.csv':
+                    yield from split_csv_lines(handle)
+                else:
+                    yield from split_text_lines(handle)
+    finally:
+        if remove:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
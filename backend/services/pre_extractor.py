@@ -0,0 +1,304 @@
+import logging
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import metrics
+from config import config
+from database.models import CompanyModel
+from database.normalize import normalize_company_name, normalize_tokens
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+PRE_EXTRACT = metrics.counter('placebuddy_pre_extract_total', 'Rule-based extraction outcomes', ['result'])
+
+DEFAULT_REQUIRED_FIELDS = ('name', 'tier', 'ctc', 'last_date')
+
+
+class AhoCorasick:
+    """
+    Multi-pattern matcher: finds every occurrence of any of the patterns in
+    one pass over the text, however many patterns there are.
+    """
+
+    def __init__(self, patterns: Iterable[Tuple[str, object]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, object]]] = [[]]
+        for pattern, value in patterns:
+            self._insert(pattern, value)
+        self._build()
+
+    def _insert(self, pattern, value):
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((len(pattern), value))
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find_all(self, text: str) -> List[Tuple[int, int, object]]:
+        """Every (start, end, value) match in text"""
+        matches = []
+        state = 0
+        for index, ch in enumerate(text):
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            for length, value in self._out[state]:
+                matches.append((index + 1 - length, index + 1, value))
+        return matches
+
+
+class KnownCompanyMatcher:
+    """
+    Finds names of companies already in the database inside a posting.
+
+    Names and text are reduced to normalized tokens and matched with spaces
+    on both sides, so "Acme" never matches inside "Acmeware".
+    """
+
+    def __init__(self, rows: Iterable[Tuple[int, str]] = (), min_length: int = 3):
+        self.min_length = min_length
+        self.max_id = 0
+        self._names: Dict[str, str] = {}
+        self._automaton = AhoCorasick([])
+        self.load(rows)
+
+    def load(self, rows: Iterable[Tuple[int, str]]):
+        """Add (company_id, name) rows and rebuild the automaton if anything changed"""
+        added = 0
+        for company_id, name in rows:
+            self.max_id = max(self.max_id, company_id)
+            key = normalize_company_name(name)
+            if len(key) >= self.min_length and key not in self._names:
+                self._names[key] = name
+                added += 1
+        if added:
+            # Swap in a complete automaton so concurrent readers never see a partial one
+            self._automaton = AhoCorasick((f" {key} ", key) for key in self._names)
+
+    def __len__(self):
+        return len(self._names)
+
+    def match(self, text: str) -> Optional[str]:
+        """The known company named in text, or None if there is none or it is ambiguous"""
+        haystack = f" {' '.join(normalize_tokens(text))} "
+        found = {key for _, _, key in self._automaton.find_all(haystack)}
+        if not found:
+            return None
+        # Prefer the most specific name ("Tata Consultancy Services" over "Tata")
+        longest = max(len(key) for key in found)
+        best = [key for key in found if len(key) == longest]
+        return self._names[best[0]] if len(best) == 1 else None
+
+
+_AMOUNT = r'(\d[\d,]*(?:\.\d+)?)'
+_CTC_RE = re.compile(
+    r'\b(?:ctc|package|salary|compensation|stipend)\b[^\d\n]{0,20}?' + _AMOUNT +
+    r'(?:\s*(?:-|to|–)\s*' + _AMOUNT + r')?\s*(lpa|lakhs?|lacs?|l\b|cr\b|crores?|k\b)?',
+    re.IGNORECASE
+)
+_TIER_RE = re.compile(r'\btier[\s\-_]*(1|2|3|iii|ii|i)\b', re.IGNORECASE)
+# The name ends at a spaced dash, a bracket or a separator ("Company: Acme - Tier 1 drive" is "Acme")
+_NAME_LABEL_RE = re.compile(
+    r'^\s*(?:company|organi[sz]ation|employer)(?:\s+name)?\s*[:\-–]\s*((?:(?!\s[\-–]\s)[^\n|,;(\[]){2,100})',
+    re.IGNORECASE | re.MULTILINE
+)
+_DEADLINE_RE = re.compile(
+    r'\b(?:last\s+date|deadline|apply\s+(?:by|before)|register\s+(?:by|before)|due\s+(?:date|by)|closes?\s+on)'
+    r'(?:\s+(?:to\s+apply|for\s+(?:registration|applying)))?\s*(?:is|:|-|–)?\s*'
+    r'([0-9]{1,4}[/\-.][0-9]{1,2}[/\-.][0-9]{2,4}|[0-9]{1,2}(?:st|nd|rd|th)?\s+[A-Za-z]{3,9},?\s+[0-9]{4}'
+    r'|[A-Za-z]{3,9}\s+[0-9]{1,2}(?:st|nd|rd|th)?,?\s+[0-9]{4})',
+    re.IGNORECASE
+)
+_URL_RE = re.compile(r'https?://[^\s<>"\')\]]+', re.IGNORECASE)
+_FORM_HOST_RE = re.compile(r'forms\.gle|docs\.google\.com/forms|forms\.office\.com|typeform\.com|jotform', re.IGNORECASE)
+_LINK_CONTEXT_RE = re.compile(r'\b(?:apply|register|registration|form|link)\b', re.IGNORECASE)
+# "online"/"offline" only count after a "Mode:" label ("apply online" says nothing about the drive)
+_MODE_RE = re.compile(
+    r'\bmode(?:\s+of\s+\w+)?\s*[:\-–]\s*(on[\s\-]?campus|off[\s\-]?campus|online|offline|virtual|hybrid|in[\s\-]?person)\b'
+    r'|\b(on[\s\-]?campus|off[\s\-]?campus|in[\s\-]?person)\b',
+    re.IGNORECASE
+)
+
+_TIERS = {'1': 'tier1', 'i': 'tier1', '2': 'tier2', 'ii': 'tier2', '3': 'tier3', 'iii': 'tier3'}
+_MODES = {'oncampus': 'offline', 'offcampus': 'offline', 'offline': 'offline', 'inperson': 'offline',
+          'online': 'online', 'virtual': 'online', 'hybrid': 'hybrid'}
+_DATE_FORMATS = ('%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y', '%Y-%m-%d', '%Y/%m/%d', '%d/%m/%y', '%d-%m-%y',
+                 '%d %B %Y', '%d %b %Y', '%B %d %Y', '%b %d %Y')
+
+
+def parse_ctc(text: str) -> Optional[float]:
+    """CTC in lakhs per annum (upper end of a range), or None"""
+    match = _CTC_RE.search(text)
+    if not match:
+        return None
+    low, high, unit = match.group(1), match.group(2), (match.group(3) or '').lower()
+    value = float((high or low).replace(',', ''))
+    if unit.startswith('cr'):
+        return value * 100
+    if unit == 'k':
+        # Monthly stipends are quoted in thousands
+        return round(value * 12 / 100, 2)
+    if unit or value < 1000:
+        return value
+    # A plain rupee amount
+    return round(value / 100000, 2)
+
+
+def parse_deadline(text: str) -> Optional[str]:
+    """Application deadline as an ISO date, or None"""
+    match = _DEADLINE_RE.search(text)
+    if not match:
+        return None
+    raw = re.sub(r'(\d)(st|nd|rd|th)\b', r'\1', match.group(1), flags=re.IGNORECASE).replace(',', '')
+    raw = re.sub(r'\s+', ' ', raw).strip()
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(raw, fmt).date().isoformat()
+        except ValueError:
+            continue
+    return None
+
+
+def find_form_link(text: str) -> Optional[str]:
+    """Registration form URL: a known form host, else a URL on an apply/register line"""
+    urls = _URL_RE.findall(text)
+    for url in urls:
+        if _FORM_HOST_RE.search(url):
+            return url.rstrip('.,;')
+    for line in text.splitlines():
+        line_urls = _URL_RE.findall(line)
+        if line_urls and _LINK_CONTEXT_RE.search(_URL_RE.sub(' ', line)):
+            return line_urls[0].rstrip('.,;')
+    return None
+
+
+class PreExtractor:
+    """
+    Rule-based first pass ahead of the LLM.
+
+    Templated recruiter mails state the company, tier, CTC, deadline and
+    form link in predictable ways; this pulls them out with a handful of
+    regexes. When every field in ``required_fields`` is found the LLM is
+    skipped; otherwise the LLM result is used for the rest and these values
+    take precedence.
+
+    A name is only read from an explicit "Company:" label. A known company
+    mentioned anywhere in the text may be a client, a past employer or a
+    competitor, so match_known_company() is only a fallback for when neither
+    a label nor the LLM names the company.
+    """
+
+    def __init__(self, matcher: Optional[KnownCompanyMatcher] = None,
+                 required_fields: Iterable[str] = DEFAULT_REQUIRED_FIELDS):
+        self.matcher = matcher or KnownCompanyMatcher()
+        self.required_fields = tuple(required_fields)
+
+    def extract(self, text: str) -> Dict:
+        """Fields that could be read confidently from text"""
+        fields = {}
+
+        label = _NAME_LABEL_RE.search(text)
+        if label:
+            fields['name'] = label.group(1).strip()
+
+        tier = _TIER_RE.search(text)
+        if tier:
+            fields['tier'] = _TIERS[tier.group(1).lower()]
+
+        ctc = parse_ctc(text)
+        if ctc is not None:
+            fields['ctc'] = ctc
+
+        last_date = parse_deadline(text)
+        if last_date:
+            fields['last_date'] = last_date
+
+        form_link = find_form_link(text)
+        if form_link:
+            fields['form_link'] = form_link
+
+        mode = _MODE_RE.search(text)
+        if mode:
+            fields['mode'] = _MODES[re.sub(r'[\s\-]', '', (mode.group(1) or mode.group(2)).lower())]
+
+        return fields
+
+    def match_known_company(self, text: str) -> Optional[str]:
+        """A known company mentioned in text (a fallback name, never a reason to skip the LLM)"""
+        return self.matcher.match(text)
+
+    def missing(self, fields: Dict) -> List[str]:
+        return [field for field in self.required_fields if not fields.get(field)]
+
+
+_extractor = None
+_extractor_lock = threading.Lock()
+_last_refresh = 0.0
+_refreshing = False
+
+
+def get_pre_extractor() -> Optional[PreExtractor]:
+    """
+    Get the process-wide pre-extractor (None when PRE_EXTRACT_ENABLED is off).
+    Known company names are loaded and topped up periodically on a
+    background thread; callers never wait for the query.
+    """
+    global _extractor, _last_refresh, _refreshing
+    if not getattr(config, 'PRE_EXTRACT_ENABLED', True):
+        return None
+    refresh_interval = getattr(config, 'PRE_EXTRACT_REFRESH_SECONDS', 60)
+
+    with _extractor_lock:
+        if _extractor is None:
+            _extractor = PreExtractor(
+                required_fields=getattr(config, 'PRE_EXTRACT_REQUIRED_FIELDS', DEFAULT_REQUIRED_FIELDS)
+            )
+            _last_refresh = 0.0
+        extractor = _extractor
+        refresh = not _refreshing and time.monotonic() - _last_refresh > refresh_interval
+        if refresh:
+            _refreshing = True
+            _last_refresh = time.monotonic()
+
+    if refresh:
+        threading.Thread(target=_refresh_matcher, args=(extractor,), name='pre-extract-refresh', daemon=True).start()
+    return extractor
+
+
+def _refresh_matcher(extractor: PreExtractor):
+    """Load company names added since the last refresh; the matcher swaps its automaton in atomically"""
+    global _refreshing
+    try:
+        started = time.monotonic()
+        extractor.matcher.load(CompanyModel.get_company_names(after_id=extractor.matcher.max_id))
+        logger.info(f"Known-company matcher has {len(extractor.matcher)} names "
+                    f"(refreshed in {(time.monotonic() - started) * 1000:.1f}ms)")
+    except Exception as e:
+        logger.error(f"Known-company matcher refresh failed: {str(e)}")
+    finally:
+        with _extractor_lock:
+            _refreshing = False
@@ -0,0 +1,135 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from config import config
+
+
+class AdmissionError(Exception):
+    """Base for requests turned away under load; retry_after is in seconds"""
+
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RateLimitedError(AdmissionError):
+    """Raised when a user or the whole server exceeds its request rate"""
+
+
+class TokenBucket:
+    """Classic token bucket: ``rate`` tokens per second, at most ``burst`` saved up"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self, cost: float = 1, now: Optional[float] = None) -> float:
+        """
+        Take cost tokens if available. Returns 0 on success, otherwise the
+        number of seconds until enough tokens will have accumulated.
+
+        A cost above ``burst`` could never be saved up for, so it is taken
+        from a full bucket and the balance goes negative: the excess is paid
+        off at ``rate`` before the next request is admitted.
+        """
+        now = time.monotonic() if now is None else now
+        # A caller's clock reading can predate the bucket; never refill by a negative amount
+        self.tokens = min(self.burst, self.tokens + max(now - self.updated, 0) * self.rate)
+        self.updated = max(now, self.updated)
+        needed = min(cost, self.burst)
+        if self.tokens >= needed:
+            self.tokens -= cost
+            return 0.0
+        return (needed - self.tokens) / self.rate
+
+    def refund(self, cost: float = 1):
+        self.tokens = min(self.burst, self.tokens + cost)
+
+
+class RateLimiter:
+    """
+    Per-user and global token buckets in front of the process_text path.
+
+    A request must fit in both its user's bucket and the global bucket. The
+    user bucket is charged the request's cost (one token per posting for a
+    batch); the global bucket meters admissions, one token per request, as
+    bulk work is already bounded by the JobManager's bulk lane. Only
+    the ``max_users`` most recently active users keep a bucket; an evicted
+    user simply starts again with a full one.
+    """
+
+    def __init__(self, user_rate: float = 0.5, user_burst: float = 5, global_rate: float = 20,
+                 global_burst: float = 50, max_users: int = 10000):
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.max_users = max_users
+        self._global = TokenBucket(global_rate, global_burst)
+        self._users: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {'allowed': 0, 'user_limited': 0, 'global_limited': 0}
+
+    def check(self, user_id, cost: float = 1):
+        """
+        Admit a request or raise
+
+        Args:
+            user_id: The requesting user
+            cost (float): Tokens charged to the user, e.g. the number of postings in a batch
+
+        Raises:
+            RateLimitedError: If the user or the server is over its rate
+        """
+        with self._lock:
+            now = time.monotonic()
+            bucket = self._users.get(user_id)
+            if bucket is None:
+                bucket = TokenBucket(self.user_rate, self.user_burst)
+                self._users[user_id] = bucket
+                while len(self._users) > self.max_users:
+                    self._users.popitem(last=False)
+            else:
+                self._users.move_to_end(user_id)
+
+            wait = bucket.take(cost, now)
+            if wait:
+                self._counters['user_limited'] += 1
+                raise RateLimitedError("You are sending requests too quickly", math.ceil(wait))
+
+            wait = self._global.take(1, now)
+            if wait:
+                # The request was not admitted, so the user keeps their token
+                bucket.refund(cost)
+                self._counters['global_limited'] += 1
+                raise RateLimitedError("Server is busy, please try again shortly", math.ceil(wait))
+
+            self._counters['allowed'] += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._counters)
+            stats['tracked_users'] = len(self._users)
+            return stats
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Get the process-wide process_text rate limiter configured from config"""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = RateLimiter(
+                    user_rate=getattr(config, 'RATE_LIMIT_USER_PER_SEC', 0.5),
+                    user_burst=getattr(config, 'RATE_LIMIT_USER_BURST', 5),
+                    global_rate=getattr(config, 'RATE_LIMIT_GLOBAL_PER_SEC', 20),
+                    global_burst=getattr(config, 'RATE_LIMIT_GLOBAL_BURST', 50)
+                )
+    return _limiter
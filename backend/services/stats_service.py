@@ -0,0 +1,63 @@
+import logging
+import threading
+import time
+from typing import Dict
+
+from database.models import StatsModel
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class StatsReconciler:
+    """
+    Background job that periodically rebuilds every user's company_stats
+    counters from the source tables, correcting any drift from failed or
+    racing incremental updates.
+    """
+
+    def __init__(self, interval: float = 3600, pause_between_users: float = 0.05):
+        self.interval = interval
+        self.pause_between_users = pause_between_users
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_run = None
+        self.last_duration = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name='stats-reconciler', daemon=True)
+        self._thread.start()
+        logger.info(f"Stats reconciliation scheduled every {self.interval}s")
+
+    def stop(self):
+        self._stop.set()
+
+    def run_once(self) -> Dict:
+        """Rebuild counters for every user; returns a summary"""
+        started = time.monotonic()
+        users = StatsModel.get_user_ids()
+        failed = 0
+        for user_id in users:
+            if self._stop.is_set():
+                break
+            try:
+                StatsModel.reconcile_user(user_id)
+            except Exception as e:
+                failed += 1
+                logger.error(f"Stats reconciliation failed for user {user_id}: {str(e)}")
+            # Spread the load instead of hammering the database
+            time.sleep(self.pause_between_users)
+
+        self.last_run = time.time()
+        self.last_duration = time.monotonic() - started
+        logger.info(f"Reconciled stats for {len(users)} users in {self.last_duration:.1f}s ({failed} failed)")
+        return {'users': len(users), 'failed': failed, 'duration': self.last_duration}
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Stats reconciliation run failed: {str(e)}")
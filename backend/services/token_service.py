@@ -0,0 +1,117 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict
+
+import jwt
+import metrics
+from config import config
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class InvalidTokenError(Exception):
+    """Raised when a token is missing, malformed, forged or expired"""
+
+
+class TokenService:
+    """
+    Issues and verifies the JWTs handed out at login.
+
+    Verified claims are kept in an LRU keyed by the raw token, and each entry
+    is dropped once the token's own ``exp`` passes. A token therefore costs
+    one HMAC check for its lifetime in this process, no matter how many
+    requests or socket events carry it.
+    """
+
+    def __init__(self, secret: str, algorithm: str = 'HS256', expiration_hours: float = 24,
+                 max_entries: int = 10000):
+        self.secret = secret
+        self.algorithm = algorithm
+        self.expiration_hours = expiration_hours
+        self.max_entries = max_entries
+        self._cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'rejected': 0}
+
+    def issue(self, user: Dict) -> str:
+        """Create a signed token for a user row"""
+        payload = {
+            'user_id': user['id'],
+            'username': user['username'],
+            'exp': datetime.utcnow() + timedelta(hours=self.expiration_hours)
+        }
+        return jwt.encode(payload, self.secret, algorithm=self.algorithm)
+
+    def verify(self, token: str) -> Dict:
+        """
+        Return the claims of a valid token
+
+        Raises:
+            InvalidTokenError: If the token cannot be trusted
+        """
+        if not token:
+            raise InvalidTokenError("Authentication token required")
+
+        now = time.time()
+        with self._lock:
+            entry = self._cache.get(token)
+            if entry is not None:
+                expires_at, claims = entry
+                if now < expires_at:
+                    self._cache.move_to_end(token)
+                    self._counters['hits'] += 1
+                    return claims
+                del self._cache[token]
+            self._counters['misses'] += 1
+
+        try:
+            claims = jwt.decode(token, self.secret, algorithms=[self.algorithm])
+        except jwt.ExpiredSignatureError:
+            self._reject()
+            raise InvalidTokenError("Token has expired")
+        except jwt.InvalidTokenError:
+            self._reject()
+            raise InvalidTokenError("Invalid token")
+
+        with self._lock:
+            self._cache[token] = (claims.get('exp', now), claims)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return claims
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._counters)
+            stats['cached'] = len(self._cache)
+        return stats
+
+    def _reject(self):
+        with self._lock:
+            self._counters['rejected'] += 1
+
+
+_service = None
+_service_lock = threading.Lock()
+
+TOKEN_CACHE = metrics.counter('placebuddy_token_verifications_total', 'JWT verifications by result', ['result'])
+TOKEN_CACHE.set_function(lambda: {
+    result: count for result, count in _service.stats().items() if result != 'cached'
+} if _service else {})
+
+
+def get_token_service() -> TokenService:
+    """Get the process-wide token service configured from config"""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = TokenService(
+                    config.SECRET_KEY,
+                    expiration_hours=config.JWT_EXPIRATION_HOURS,
+                    max_entries=getattr(config, 'JWT_CACHE_SIZE', 10000)
+                )
+    return _service
@@ -0,0 +1,72 @@
+"""
+Shared test setup.
+
+Run from the backend directory:
+
+    python -m pytest -q
+
+config.py holds deployment settings and is not checked in; when it is
+missing the tests run against TestConfig below. Tests marked ``mysql``
+need a disposable database named by TEST_DB_NAME and are skipped otherwise.
+"""
+import os
+import sys
+import types
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+class TestConfig:
+    DB_HOST = os.getenv('TEST_DB_HOST', '127.0.0.1')
+    DB_PORT = int(os.getenv('TEST_DB_PORT', '3306'))
+    DB_USERNAME = os.getenv('TEST_DB_USERNAME', 'root')
+    DB_PASSWORD = os.getenv('TEST_DB_PASSWORD', '')
+    DB_NAME = os.getenv('TEST_DB_NAME', 'placebuddy_test')
+    DB_POOL_SIZE = 4
+    DB_POOL_TIMEOUT = 2.0
+    SECRET_KEY = 'test-secret-key-that-is-long-enough-for-hs256'
+    JWT_EXPIRATION_HOURS = 1
+    FEED_ADMINS = ['admin']
+
+
+try:
+    import config  # noqa: F401
+except ImportError:
+    module = types.ModuleType('config')
+    module.config = TestConfig()
+    sys.modules['config'] = module
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'mysql: needs the TEST_DB_NAME MySQL database')
+
+
+@pytest.fixture
+def mysql_db():
+    """Fresh schema in the test database; skips when no database is configured"""
+    if not os.getenv('TEST_DB_NAME'):
+        pytest.skip('TEST_DB_NAME is not set')
+
+    from sqlalchemy import text
+    from database.schema import get_engine, metadata
+    from database.migrate import run_migrations
+    engine = get_engine()
+    try:
+        with engine.connect():
+            pass
+    except Exception as e:
+        pytest.skip(f'Test database unavailable: {e}')
+
+    def drop_everything():
+        metadata.drop_all(engine)
+        with engine.begin() as conn:
+            conn.execute(text("DROP TABLE IF EXISTS schema_migrations"))
+
+    drop_everything()
+    run_migrations()
+    yield engine
+    drop_everything()
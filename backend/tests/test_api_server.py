@@ -0,0 +1,93 @@
+import importlib
+import os
+import sys
+
+import pytest
+
+from services import ingest_queue
+from services.ingest_queue import DEFAULT_TOPIC, InMemoryBroker, PendingRequests
+from services.token_service import get_token_service
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FailingBroker(InMemoryBroker):
+    """A broker whose sends are never acknowledged"""
+
+    def send(self, topic, key, value):
+        raise TimeoutError('no brokers')
+
+
+@pytest.fixture
+def api(monkeypatch):
+    monkeypatch.syspath_prepend(REPO_DIR)
+    sys.modules.pop('api_server', None)
+    module = importlib.import_module('api_server')
+    monkeypatch.setattr(module, 'user_exists', lambda user_id: True)
+    monkeypatch.setattr(ingest_queue, '_pending', PendingRequests(max_per_user=1))
+    return module
+
+
+def auth_header(user_id=5):
+    token = get_token_service().issue({'id': user_id, 'username': 'user', 'email': 'user@example.com'})
+    return {'Authorization': f'Bearer {token}'}
+
+
+def test_process_text_requires_a_token(api):
+    response = api.app.test_client().post('/process_text', json={'user_id': 5, 'text': 'Acme is hiring'})
+    assert response.status_code == 401
+
+
+def test_process_text_queues_as_the_token_user(api, monkeypatch):
+    broker = InMemoryBroker()
+    monkeypatch.setattr(api, 'get_ingest_broker', lambda: broker)
+
+    response = api.app.test_client().post('/process_text', headers=auth_header(5),
+                                          json={'user_id': 99, 'text': 'Acme is hiring'})
+
+    assert response.status_code == 202
+    # Same topic as the Socket.IO path
+    [message] = broker.records(DEFAULT_TOPIC)
+    assert message['user_id'] == 5 and message['request_id'] == response.get_json()['request_id']
+
+
+def test_process_text_reports_failed_delivery(api, monkeypatch):
+    monkeypatch.setattr(api, 'get_ingest_broker', lambda: FailingBroker())
+
+    response = api.app.test_client().post('/process_text', headers=auth_header(), json={'text': 'Acme is hiring'})
+
+    assert response.status_code == 503
+    # The failed send does not hold one of the user's pending slots
+    assert ingest_queue.get_pending_requests().count(5) == 0
+
+
+def test_process_text_without_a_broker_is_unavailable(api, monkeypatch):
+    monkeypatch.setattr(api, 'get_ingest_broker', lambda: None)
+
+    response = api.app.test_client().post('/process_text', headers=auth_header(), json={'text': 'Acme is hiring'})
+
+    assert response.status_code == 503
+
+
+def test_process_text_applies_the_per_user_limit(api, monkeypatch):
+    broker = InMemoryBroker()
+    monkeypatch.setattr(api, 'get_ingest_broker', lambda: broker)
+    client = api.app.test_client()
+
+    first = client.post('/process_text', headers=auth_header(5), json={'text': 'Acme is hiring'})
+    second = client.post('/process_text', headers=auth_header(5), json={'text': 'Globex is hiring'})
+
+    assert (first.status_code, second.status_code) == (202, 503)
+    assert second.headers['Retry-After']
+    [message] = broker.records(DEFAULT_TOPIC)
+    assert message['priority'] == 0
+
+
+def test_missing_database_settings_stop_the_import(monkeypatch):
+    from config import config
+    monkeypatch.setattr(config, 'DB_HOST', '', raising=False)
+    monkeypatch.syspath_prepend(REPO_DIR)
+    sys.modules.pop('api_server', None)
+
+    with pytest.raises(ValueError, match='DB_HOST'):
+        importlib.import_module('api_server')
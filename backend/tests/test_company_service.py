@@ -0,0 +1,53 @@
+from services import company_service
+from services.company_service import CompanyService
+from services.near_duplicate import NearDuplicateIndex
+
+
+def use_index(monkeypatch, rows, existing=None):
+    index = NearDuplicateIndex()
+    index.load(rows)
+    ids = {company_id for company_id, _ in rows} if existing is None else existing
+    monkeypatch.setattr(company_service, 'get_near_duplicate_index', lambda: index)
+    monkeypatch.setattr(company_service.CompanyModel, 'get_existing_ids',
+                        lambda company_ids: {company_id for company_id in company_ids if company_id in ids})
+    return index
+
+
+def test_near_duplicate_is_reported_not_merged(monkeypatch):
+    use_index(monkeypatch, [(1, 'Metro')])
+    monkeypatch.setattr(company_service.CompanyModel, 'insert_or_get', lambda data, user_id: (2, True))
+
+    result = CompanyService().process_company({'name': 'Metro Inc'}, user_id=7)
+
+    assert result['company_id'] == 2 and result['is_duplicate'] is False
+    assert result['similar_companies'] == [{'company_id': 1, 'name': 'Metro', 'score': 1.0}]
+
+
+def test_candidates_deleted_elsewhere_are_dropped(monkeypatch):
+    index = use_index(monkeypatch, [(1, 'Acme'), (2, 'Acme Labs')], existing={2})
+
+    similar = CompanyService().find_similar_companies('Acme')
+
+    assert [match['company_id'] for match in similar] == [2]
+    assert len(index) == 1
+
+
+def test_batch_matches_single_company_semantics(monkeypatch):
+    use_index(monkeypatch, [(1, 'Metro'), (2, 'Globex')])
+    monkeypatch.setattr(company_service.CompanyModel, 'find_by_names',
+                        lambda keys: {'globex': {'id': 2, 'name_normalized': 'globex'}})
+    # 'initech' lost an insert race to another process, so the model reports it as not created
+    monkeypatch.setattr(company_service.CompanyModel, 'create_companies',
+                        lambda companies, user_id: {'metro': (3, True), 'initech': (4, False)})
+
+    results = CompanyService().process_companies_batch(
+        [{'name': 'Metro Inc'}, {'name': 'Globex'}, {'name': 'Initech'}, {'name': 'metro inc.'}, {'name': ''}],
+        user_id=7
+    )
+
+    assert [(result['company_id'], result['is_duplicate']) for result in results] == [
+        (3, False), (2, True), (4, True), (3, True), (None, False)
+    ]
+    assert results[0]['similar_companies'] == [{'company_id': 1, 'name': 'Metro', 'score': 1.0}]
+    assert results[1]['similar_companies'] == []
+    assert results[4]['error'] == 'Company name is required'
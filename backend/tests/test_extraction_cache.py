@@ -0,0 +1,93 @@
+import threading
+import time
+
+import pytest
+
+from services.extraction_cache import ExtractionCache, cache_key
+
+RESULT = {'name': 'Acme'}
+
+
+def test_cache_key_ignores_case_and_whitespace():
+    assert cache_key('Acme  is\nHIRING ') == cache_key('acme is hiring')
+    assert cache_key('Acme is hiring') != cache_key('Globex is hiring')
+
+
+def test_entries_expire_after_ttl():
+    cache = ExtractionCache(ttl=0.05)
+    cache.set('key', RESULT)
+
+    assert cache.get('key') == RESULT
+    time.sleep(0.1)
+    assert cache.get('key') is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ExtractionCache(max_entries=2)
+    cache.set('a', RESULT)
+    cache.set('b', RESULT)
+    cache.get('a')
+    cache.set('c', RESULT)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == RESULT
+    assert cache.stats()['evictions'] == 1
+
+
+def test_disk_tier_survives_a_new_process_and_keeps_its_ttl(tmp_path):
+    path = str(tmp_path / 'cache.sqlite')
+    ExtractionCache(sqlite_path=path, ttl=0.2).set('key', RESULT)
+
+    reopened = ExtractionCache(sqlite_path=path, ttl=0.2)
+    assert reopened.get('key') == RESULT
+    assert reopened.stats()['disk_hits'] == 1
+    # Promotion to memory keeps the original timestamp
+    time.sleep(0.25)
+    assert reopened.get('key') is None
+
+
+def test_concurrent_misses_share_one_computation():
+    cache = ExtractionCache()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+    results = []
+
+    def compute(text):
+        calls.append(text)
+        started.set()
+        release.wait(5)
+        return dict(RESULT)
+
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute('Acme', compute)))
+               for _ in range(3)]
+    threads[0].start()
+    assert started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while cache.stats()['coalesced'] < 2:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert calls == ['Acme']
+    assert results == [RESULT] * 3
+    assert cache.get_or_compute('acme', compute) == RESULT
+    assert calls == ['Acme']
+
+
+def test_errors_reach_waiters_and_empty_results_are_not_cached():
+    cache = ExtractionCache()
+
+    def fail(text):
+        raise RuntimeError('model server down')
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute('Acme', fail)
+    assert cache.stats()['in_flight'] == 0
+
+    assert cache.get_or_compute('Acme', lambda text: {}) == {}
+    assert cache.get(cache_key('Acme')) is None
@@ -0,0 +1,131 @@
+from contextlib import contextmanager
+
+import pytest
+
+from services import health_service
+from services.health_service import HealthMonitor, create_health_monitor
+
+
+class FakeJobManager:
+    def __init__(self, queue_depth=0, queue_capacity=10):
+        self.queue_depth = queue_depth
+        self.queue_capacity = queue_capacity
+
+    def stats(self):
+        return {'queue_depth': self.queue_depth, 'queue_capacity': self.queue_capacity, 'running': 0}
+
+
+class FakePool:
+    def stats(self):
+        return {'size': 10, 'in_use': 1}
+
+
+class FakeLLMService:
+    def health_check(self):
+        return {'backend': 'fake'}
+
+
+@pytest.fixture
+def dependencies(monkeypatch):
+    """Healthy stand-ins for MySQL, the pool and the LLM; tests break the one they need"""
+    @contextmanager
+    def db_cursor(*args, **kwargs):
+        class Cursor:
+            def execute(self, sql):
+                pass
+
+            def fetchone(self):
+                return (1,)
+        yield Cursor()
+
+    monkeypatch.setattr(health_service, 'db_cursor', db_cursor)
+    monkeypatch.setattr(health_service, 'get_pool', lambda: FakePool())
+    monkeypatch.setattr(health_service, 'LLMService', FakeLLMService)
+    return monkeypatch
+
+
+def fail(message):
+    def check():
+        raise RuntimeError(message)
+    return check
+
+
+def test_failing_critical_check_makes_the_service_not_ready():
+    monitor = HealthMonitor()
+    monitor.add_check('database', fail('connection refused'), critical=True)
+    monitor.add_check('llm', lambda: {})
+
+    snapshot = monitor.snapshot()
+
+    assert snapshot['status'] == 'unhealthy'
+    assert snapshot['checks']['database']['error'] == 'connection refused'
+    assert not monitor.is_ready(snapshot)
+
+
+def test_failing_optional_check_only_degrades():
+    monitor = HealthMonitor()
+    monitor.add_check('database', lambda: {}, critical=True)
+    monitor.add_check('llm', fail('timeout'))
+
+    snapshot = monitor.snapshot()
+
+    assert (snapshot['status'], snapshot['checks']['llm']['status']) == ('degraded', 'degraded')
+    assert monitor.is_ready(snapshot)
+
+
+def test_stale_snapshot_is_not_ready():
+    monitor = HealthMonitor(interval=5)
+    monitor.add_check('database', lambda: {}, critical=True)
+
+    snapshot = dict(monitor.snapshot(), age_seconds=16)
+
+    assert monitor.is_stale(snapshot)
+    assert not monitor.is_ready(snapshot)
+
+
+def test_refresh_picks_up_a_recovered_dependency():
+    state = {'up': False}
+
+    def database():
+        if not state['up']:
+            raise RuntimeError('down')
+        return {}
+
+    monitor = HealthMonitor()
+    monitor.add_check('database', database, critical=True)
+    assert not monitor.is_ready()
+
+    state['up'] = True
+    # The snapshot is served from memory until the next refresh
+    assert not monitor.is_ready()
+    monitor.refresh()
+    assert monitor.is_ready()
+
+
+def test_database_outage_fails_readiness(dependencies):
+    @contextmanager
+    def db_cursor(*args, **kwargs):
+        raise ConnectionError('MySQL is unreachable')
+        yield
+
+    dependencies.setattr(health_service, 'db_cursor', db_cursor)
+    monitor = create_health_monitor(FakeJobManager())
+
+    snapshot = monitor.snapshot()
+
+    assert snapshot['checks']['database'] == {
+        'status': 'unhealthy', 'error': 'MySQL is unreachable',
+        'latency_ms': snapshot['checks']['database']['latency_ms']
+    }
+    assert not monitor.is_ready(snapshot)
+
+
+def test_saturated_job_queue_degrades_but_stays_ready(dependencies):
+    monitor = create_health_monitor(FakeJobManager(queue_depth=9, queue_capacity=10))
+
+    snapshot = monitor.snapshot()
+
+    assert snapshot['status'] == 'degraded'
+    assert snapshot['checks']['job_queue']['saturation'] == 0.9
+    assert snapshot['checks']['database']['status'] == 'healthy'
+    assert monitor.is_ready(snapshot)
@@ -0,0 +1,143 @@
+import threading
+import time
+
+import pytest
+
+from services import ingest_queue
+from services.ingest_queue import InMemoryBroker, PendingRequests, make_request
+from services.ingest_worker import IngestWorker
+from services.job_service import PRIORITY_BULK, UserJobLimitError
+
+TOPIC = 'test.process_text'
+BULK_TOPIC = 'test.process_text.bulk'
+DLQ = 'test.process_text.dlq'
+
+
+def test_rewind_redelivers_uncommitted_records():
+    broker = InMemoryBroker(partitions=1)
+    consumer = broker.consumer(TOPIC, 'group')
+    for text in ('a', 'b'):
+        broker.send(TOPIC, 1, make_request(1, text))
+
+    first = consumer.poll(timeout=0.1)
+    consumer.rewind()
+    again = consumer.poll(timeout=0.1)
+    consumer.commit()
+    consumer.rewind()
+
+    assert [record['text'] for record in first] == ['a', 'b']
+    assert [record['text'] for record in again] == ['a', 'b']
+    assert consumer.poll(timeout=0.05) == []
+
+
+class FlakyWorker(IngestWorker):
+    """Fails its first batch, then records what it was given"""
+
+    def __init__(self, broker):
+        super().__init__(broker, TOPIC, DLQ, group='group', batch_size=2, poll_timeout=0.05,
+                         llm_service=object(), company_service=object())
+        self.calls = []
+        self.done = threading.Event()
+
+    def process_batch(self, requests):
+        self.calls.append([request['text'] for request in requests])
+        if len(self.calls) == 1:
+            raise RuntimeError('database went away')
+        if sum(len(call) for call in self.calls[1:]) >= 3:
+            self.done.set()
+
+
+def test_failed_batch_is_redelivered_not_skipped():
+    broker = InMemoryBroker(partitions=1)
+    for text in ('a', 'b', 'c'):
+        broker.send(TOPIC, 1, make_request(1, text))
+
+    worker = FlakyWorker(broker)
+    worker.start()
+    assert worker.done.wait(5)
+    worker.stop(timeout=1)
+
+    assert worker.calls[0] == ['a', 'b']
+    assert worker.calls[1] == ['a', 'b']
+    assert [text for call in worker.calls[1:] for text in call] == ['a', 'b', 'c']
+
+
+def test_pending_requests_limit_each_user_until_released():
+    pending = PendingRequests(max_per_user=2, ttl=60)
+    pending.acquire(1, 'a')
+    pending.acquire(1, 'b')
+    pending.acquire(2, 'c')
+
+    with pytest.raises(UserJobLimitError):
+        pending.acquire(1, 'd')
+    pending.release(1, 'a')
+    pending.acquire(1, 'd')
+    assert pending.count(1) == 2
+
+
+def test_pending_requests_expire():
+    pending = PendingRequests(max_per_user=1, ttl=0.05)
+    pending.acquire(1, 'a')
+    with pytest.raises(UserJobLimitError):
+        pending.acquire(1, 'b')
+
+    time.sleep(0.1)
+    pending.acquire(1, 'b')
+    assert pending.count(1) == 1
+
+
+class RecordingWorker(IngestWorker):
+    """Records the texts of every batch and answers each request"""
+
+    def __init__(self, broker, expected):
+        super().__init__(broker, TOPIC, DLQ, group='group', batch_size=1, poll_timeout=0.05,
+                         llm_service=object(), company_service=object(), bulk_topic=BULK_TOPIC)
+        self.texts = []
+        self.expected = expected
+        self.done = threading.Event()
+
+    def process_batch(self, requests):
+        for request in requests:
+            self.texts.append(request['text'])
+            self._notify(request, {'type': 'processing_complete'})
+        if len(self.texts) >= self.expected:
+            self.done.set()
+
+
+def test_worker_drains_interactive_lane_before_bulk(monkeypatch):
+    monkeypatch.setattr(ingest_queue, '_pending', PendingRequests(max_per_user=10))
+    broker = InMemoryBroker(partitions=1)
+    requests = [make_request(1, 'bulk-1', priority=PRIORITY_BULK), make_request(1, 'bulk-2', priority=PRIORITY_BULK),
+                make_request(1, 'paste-1'), make_request(1, 'paste-2')]
+    for request in requests:
+        topic = BULK_TOPIC if request['priority'] == PRIORITY_BULK else TOPIC
+        broker.send(topic, 1, request)
+        ingest_queue.get_pending_requests().acquire(1, request['request_id'])
+
+    worker = RecordingWorker(broker, expected=4)
+    worker.start()
+    assert worker.done.wait(5)
+    worker.stop(timeout=1)
+
+    assert worker.texts == ['paste-1', 'paste-2', 'bulk-1', 'bulk-2']
+    # Answered requests no longer count against the user
+    assert ingest_queue.get_pending_requests().count(1) == 0
+
+
+def test_kafka_send_waits_for_the_acknowledgement():
+    class Future:
+        def get(self, timeout=None):
+            waited.append(timeout)
+            raise TimeoutError('not acknowledged')
+
+    class Producer:
+        def send(self, topic, key=None, value=None):
+            return Future()
+
+    waited = []
+    broker = ingest_queue.KafkaBroker.__new__(ingest_queue.KafkaBroker)
+    broker._producer, broker.send_timeout = Producer(), 2.5
+
+    with pytest.raises(TimeoutError):
+        broker.send(TOPIC, 1, make_request(1, 'Acme'))
+    assert waited == [2.5]
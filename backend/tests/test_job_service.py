@@ -0,0 +1,123 @@
+import threading
+import time
+
+import pytest
+
+from services.job_service import (PRIORITY_BULK, JobManager, JobQueueFullError, UserJobLimitError)
+
+
+class FakeSocketIO:
+    def __init__(self):
+        self.emitted = []
+
+    def emit(self, event, data, to=None):
+        self.emitted.append((event, data, to))
+
+
+def blocker():
+    """A job function that holds its worker until released"""
+    started = threading.Event()
+    release = threading.Event()
+
+    def run(job):
+        started.set()
+        release.wait(5)
+    return run, started, release
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.01)
+
+
+def test_per_user_limit_counts_queued_and_running_jobs():
+    manager = JobManager(FakeSocketIO(), workers=1, max_jobs_per_user=2)
+    run, started, release = blocker()
+    cleaned = []
+
+    manager.submit(1, None, run)
+    manager.submit(1, None, run)
+    with pytest.raises(UserJobLimitError):
+        manager.submit(1, None, run, cleanup=lambda: cleaned.append(True))
+    manager.submit(2, None, run)
+
+    assert cleaned == [True]
+    release.set()
+    wait_for(lambda: manager.stats()['completed'] == 3)
+    manager.submit(1, None, run)
+
+
+def test_interactive_jobs_run_before_queued_bulk_jobs():
+    manager = JobManager(FakeSocketIO(), workers=1, max_jobs_per_user=10)
+    run, started, release = blocker()
+    order = []
+
+    manager.submit(1, None, run)
+    assert started.wait(5)
+    manager.submit(1, None, lambda job: order.append('bulk'), priority=PRIORITY_BULK)
+    manager.submit(1, None, lambda job: order.append('paste'))
+    release.set()
+
+    wait_for(lambda: len(order) == 2)
+    assert order == ['paste', 'bulk']
+
+
+def test_bulk_jobs_only_fill_their_share_of_the_queue():
+    manager = JobManager(FakeSocketIO(), workers=1, max_queue=4, max_jobs_per_user=10, bulk_queue_share=0.5)
+    run, started, release = blocker()
+    manager.submit(1, None, run)
+    assert started.wait(5)
+
+    manager.submit(1, None, run, priority=PRIORITY_BULK)
+    manager.submit(1, None, run, priority=PRIORITY_BULK)
+    with pytest.raises(JobQueueFullError):
+        manager.submit(1, None, run, priority=PRIORITY_BULK)
+    manager.submit(1, None, run)
+    release.set()
+
+
+def test_jobs_that_waited_too_long_are_expired_not_run():
+    socketio = FakeSocketIO()
+    manager = JobManager(socketio, workers=1, max_jobs_per_user=10, max_queue_wait=0.05)
+    run, started, release = blocker()
+    ran = []
+    cleaned = []
+
+    manager.submit(1, 'sid-1', run)
+    assert started.wait(5)
+    manager.submit(1, 'sid-2', lambda job: ran.append(True), cleanup=lambda: cleaned.append(True))
+    time.sleep(0.1)
+    release.set()
+
+    wait_for(lambda: manager.stats()['expired'] == 1)
+    assert ran == [] and cleaned == [True]
+    assert any(to == 'sid-2' and '"busy"' in data for _, data, to in socketio.emitted)
+
+
+def test_bulk_jobs_leave_a_worker_for_interactive_jobs():
+    manager = JobManager(FakeSocketIO(), workers=2, max_jobs_per_user=10, interactive_workers=1)
+    run, started, release = blocker()
+    ran = []
+
+    manager.submit(1, None, run, priority=PRIORITY_BULK)
+    assert started.wait(5)
+    manager.submit(1, None, lambda job: ran.append('bulk'), priority=PRIORITY_BULK)
+    manager.submit(2, None, lambda job: ran.append('paste'))
+
+    # The second bulk job waits for the bulk worker; the paste runs on the reserved one
+    wait_for(lambda: ran == ['paste'])
+    time.sleep(0.05)
+    assert ran == ['paste'] and manager.stats()['queue_depth'] == 1
+    release.set()
+    wait_for(lambda: ran == ['paste', 'bulk'])
+
+
+def test_a_single_worker_still_runs_bulk_jobs():
+    manager = JobManager(FakeSocketIO(), workers=1, interactive_workers=1)
+    ran = []
+
+    manager.submit(1, None, lambda job: ran.append('bulk'), priority=PRIORITY_BULK)
+
+    wait_for(lambda: ran == ['bulk'])
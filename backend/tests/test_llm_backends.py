@@ -0,0 +1,106 @@
+import time
+
+import pytest
+
+from services.llm_backends import (CircuitBreaker, HTTPBackend, LLMBackend, LLMRequestRejectedError, _RetryableError)
+
+
+def backend(calls, hedge=False, p95=None):
+    """Two replicas whose _call is replaced by calls[index](texts)"""
+    http = HTTPBackend(['http://replica-0', 'http://replica-1'], deadline=5, max_retries=0, hedge=hedge)
+    http._replica_order = lambda: [0, 1]
+    http._call = lambda index, texts, timeout: calls[index](texts)
+    for _ in range(20 if p95 else 0):
+        http._latency.record(p95)
+    return http
+
+
+def fails(error):
+    def call(texts):
+        raise error
+    return call
+
+
+def answers(delay=0):
+    def call(texts):
+        time.sleep(delay)
+        return [{'name': 'Acme'} for _ in texts]
+    return call
+
+
+def test_backend_interface_is_abstract():
+    with pytest.raises(TypeError):
+        LLMBackend()
+
+
+def test_early_failure_fails_over_without_hedging():
+    http = backend([fails(_RetryableError('HTTP 503')), answers()])
+
+    assert http.extract_batch(['Acme']) == [{'name': 'Acme'}]
+
+
+def test_early_failure_fails_over_before_the_hedge_delay():
+    http = backend([fails(_RetryableError('connection refused')), answers()], hedge=True, p95=2.0)
+
+    started = time.monotonic()
+    assert http.extract_batch(['Acme']) == [{'name': 'Acme'}]
+    assert time.monotonic() - started < 1.0
+
+
+def test_slow_primary_is_hedged():
+    http = backend([answers(delay=2.0), answers()], hedge=True, p95=0.05)
+
+    started = time.monotonic()
+    assert http.extract_batch(['Acme']) == [{'name': 'Acme'}]
+    assert time.monotonic() - started < 1.0
+
+
+def test_rejected_request_is_not_sent_to_another_replica():
+    second = []
+    http = backend([fails(LLMRequestRejectedError('HTTP 400')), lambda texts: second.append(texts)], hedge=True,
+                   p95=2.0)
+
+    with pytest.raises(LLMRequestRejectedError):
+        http.extract_batch(['Acme'])
+    assert second == []
+
+
+def test_circuit_breaker_opens_and_lets_one_trial_through():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == 'open' and not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed'
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, body):
+        self.body = body
+
+    def json(self):
+        if isinstance(self.body, Exception):
+            raise self.body
+        return self.body
+
+
+@pytest.mark.parametrize('body', [ValueError('Expecting value'), ['not', 'an', 'object'], {'results': 'Acme'}])
+def test_malformed_body_fails_the_half_open_trial(body):
+    http = HTTPBackend(['http://replica-0'], deadline=5, max_retries=0, breaker_threshold=1, breaker_reset=0.05)
+    http._sessions[0].post = lambda url, json, timeout: FakeResponse(body)
+    breaker = http._breakers[0]
+    breaker.record_failure()
+    time.sleep(0.06)
+
+    with pytest.raises(_RetryableError):
+        http._call(0, ['Acme'], timeout=1)
+
+    # The trial was recorded as a failure, so the breaker re-opens instead of staying half-open forever
+    assert breaker.state == 'open' and not breaker._trial_in_flight
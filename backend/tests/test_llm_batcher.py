@@ -0,0 +1,51 @@
+import threading
+
+import pytest
+
+from services.llm_batcher import ExtractionBatcher
+
+
+class RecordingBackend:
+    def __init__(self, results=None):
+        self.batches = []
+        self.results = results
+        self.lock = threading.Lock()
+
+    def __call__(self, texts):
+        with self.lock:
+            self.batches.append(list(texts))
+        return self.results if self.results is not None else [{'name': text} for text in texts]
+
+
+def test_requests_within_the_window_share_one_call():
+    backend = RecordingBackend()
+    batcher = ExtractionBatcher(backend, window_ms=200, max_batch_size=8)
+
+    futures = [batcher.submit(text) for text in ('a', 'b', 'c')]
+
+    assert [future.result(5) for future in futures] == [{'name': 'a'}, {'name': 'b'}, {'name': 'c'}]
+    assert backend.batches == [['a', 'b', 'c']]
+    assert batcher.stats()['avg_batch_size'] == 3
+
+
+def test_batches_are_capped_by_size_and_tokens():
+    backend = RecordingBackend()
+    batcher = ExtractionBatcher(backend, window_ms=200, max_batch_size=2, max_tokens=10 ** 6)
+    for future in [batcher.submit(text) for text in ('a', 'b', 'c')]:
+        future.result(5)
+    assert sorted(len(batch) for batch in backend.batches) == [1, 2]
+
+    backend = RecordingBackend()
+    batcher = ExtractionBatcher(backend, window_ms=200, max_batch_size=8, max_tokens=1)
+    for future in [batcher.submit('word ' * 50) for _ in range(2)]:
+        future.result(5)
+    assert [len(batch) for batch in backend.batches] == [1, 1]
+
+
+def test_a_wrong_result_count_fails_every_caller():
+    batcher = ExtractionBatcher(RecordingBackend(results=[{'name': 'only one'}]), window_ms=200)
+    futures = [batcher.submit(text) for text in ('a', 'b')]
+
+    for future in futures:
+        with pytest.raises(ValueError):
+            future.result(5)
@@ -0,0 +1,182 @@
+import threading
+import time
+
+import pytest
+
+from services.extraction_cache import ExtractionCache
+from services.llm_backends import LLMBackend
+from services.llm_batcher import ExtractionBatcher
+from services.llm_service import LLMService
+from services.pre_extractor import KnownCompanyMatcher, PreExtractor
+
+TEXT = 'We are hiring graduates for our platform team'
+RESULT = {'name': 'Acme', 'tier': 'tier2', 'industry': 'Software'}
+
+
+class StreamingBackend(LLMBackend):
+    """Streams RESULT field by field; the first call can be held open"""
+
+    name = 'fake'
+    streams = True
+
+    def __init__(self):
+        self.stream_calls = 0
+        self.batch_calls = 0
+        self.release = threading.Event()
+        self.release.set()
+        self.started = threading.Event()
+
+    def extract_batch(self, texts, deadline=None):
+        self.batch_calls += 1
+        return [dict(RESULT) for _ in texts]
+
+    def extract_stream(self, text, deadline=None):
+        self.stream_calls += 1
+        self.started.set()
+        for field, value in RESULT.items():
+            self.release.wait(5)
+            yield field, value
+
+
+class BatchOnlyBackend(StreamingBackend):
+    streams = False
+
+    def extract_stream(self, text, deadline=None):
+        raise AssertionError('a backend without streaming should go through the batcher')
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.01)
+
+
+def service(backend, batcher=None):
+    batcher = batcher or ExtractionBatcher(backend.extract_batch, window_ms=1)
+    return LLMService(cache=ExtractionCache(), backend=backend, batcher=batcher, pre_extractor=PreExtractor())
+
+
+def test_finished_stream_is_cached():
+    backend = StreamingBackend()
+    llm_service = service(backend)
+
+    assert dict(llm_service.stream_company_info(TEXT)) == RESULT
+    assert llm_service.extract_company_info(TEXT) == RESULT
+    assert dict(llm_service.stream_company_info(TEXT)) == RESULT
+    assert (backend.stream_calls, backend.batch_calls) == (1, 0)
+
+
+def test_concurrent_streams_of_one_text_share_the_backend_call():
+    backend = StreamingBackend()
+    backend.release.clear()
+    llm_service = service(backend)
+    results = []
+
+    def stream():
+        results.append(dict(llm_service.stream_company_info(TEXT)))
+
+    leader = threading.Thread(target=stream)
+    leader.start()
+    assert backend.started.wait(5)
+    follower = threading.Thread(target=stream)
+    follower.start()
+    wait_for(lambda: llm_service.cache.stats()['coalesced'] == 1)
+    backend.release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert results == [RESULT, RESULT]
+    assert backend.stream_calls == 1
+    assert llm_service.cache.stats()['coalesced'] == 1
+
+
+def test_abandoned_stream_is_not_cached():
+    backend = StreamingBackend()
+    llm_service = service(backend)
+
+    stream = llm_service.stream_company_info(TEXT)
+    assert next(stream) == ('name', 'Acme')
+    stream.close()
+
+    assert llm_service.cache.stats()['in_flight'] == 0
+    assert llm_service.extract_company_info(TEXT) == RESULT
+    assert backend.batch_calls == 1
+
+
+def test_failed_stream_releases_waiters():
+    class FailingBackend(StreamingBackend):
+        def extract_stream(self, text, deadline=None):
+            raise RuntimeError('model server down')
+            yield
+
+    llm_service = service(FailingBackend())
+
+    with pytest.raises(RuntimeError):
+        list(llm_service.stream_company_info(TEXT))
+    assert llm_service.cache.stats()['in_flight'] == 0
+
+
+def test_backend_without_streaming_goes_through_the_batcher():
+    backend = BatchOnlyBackend()
+    batcher = ExtractionBatcher(backend.extract_batch, window_ms=1)
+    llm_service = service(backend, batcher)
+
+    assert dict(llm_service.stream_company_info(TEXT)) == RESULT
+    assert batcher.stats()['requests'] == 1
+
+
+# Every required field is there, but the company only appears as a mention
+MENTION = 'Globex is hiring for its client Acme\nTier 1 drive, CTC: 12 LPA\nLast date: 15/11/2026'
+
+
+class FixedBackend(LLMBackend):
+    """Answers every text with the same result"""
+
+    name = 'fixed'
+    streams = False
+
+    def __init__(self, result):
+        self.result = result
+        self.calls = 0
+
+    def extract_batch(self, texts, deadline=None):
+        self.calls += 1
+        return [dict(self.result) if self.result else {} for _ in texts]
+
+
+def known_company_service(backend):
+    batcher = ExtractionBatcher(backend.extract_batch, window_ms=1)
+    extractor = PreExtractor(KnownCompanyMatcher([(1, 'Acme')]))
+    return LLMService(cache=ExtractionCache(), backend=backend, batcher=batcher, pre_extractor=extractor)
+
+
+def test_known_company_mention_neither_skips_nor_overrides_the_llm():
+    backend = FixedBackend({'name': 'Globex', 'industry': 'Software'})
+    llm_service = known_company_service(backend)
+
+    result = llm_service.extract_company_info(MENTION)
+
+    assert backend.calls == 1
+    assert result == {'name': 'Globex', 'industry': 'Software', 'tier': 'tier1', 'ctc': 12.0,
+                      'last_date': '2026-11-15'}
+    assert llm_service.extract_company_info_many([MENTION]) == [result]
+    assert dict(llm_service.stream_company_info(MENTION))['name'] == 'Globex'
+
+
+def test_known_company_fills_in_when_the_llm_finds_no_name():
+    llm_service = known_company_service(FixedBackend(None))
+
+    assert llm_service.extract_company_info(MENTION)['name'] == 'Acme'
+    assert llm_service.extract_company_info_many([MENTION])[0]['name'] == 'Acme'
+    streamed = list(llm_service.stream_company_info(MENTION))
+    assert streamed[-1] == ('name', 'Acme') and [field for field, _ in streamed].count('name') == 1
+
+
+def test_labelled_name_still_skips_the_llm():
+    backend = FixedBackend({'name': 'Globex'})
+    llm_service = known_company_service(backend)
+
+    result = llm_service.extract_company_info('Company: Initech\n' + MENTION)
+
+    assert backend.calls == 0 and result['name'] == 'Initech'
@@ -0,0 +1,88 @@
+import metrics
+from metrics import Counter, Gauge, Histogram, Registry
+
+
+def render(*items):
+    registry = Registry()
+    for item in items:
+        registry.register(item)
+    return registry.render()
+
+
+def test_counter_renders_help_type_and_labelled_samples():
+    errors = Counter('test_errors_total', 'Errors by stage', ['stage'])
+    errors.labels(stage='llm').inc()
+    errors.labels(stage='llm').inc(2)
+    errors.labels(stage='db').inc()
+
+    assert render(errors) == (
+        '# HELP test_errors_total Errors by stage\n'
+        '# TYPE test_errors_total counter\n'
+        'test_errors_total{stage="llm"} 3.0\n'
+        'test_errors_total{stage="db"} 1.0\n'
+    )
+
+
+def test_label_values_are_escaped():
+    gauge = Gauge('test_names', 'Names', ['name'])
+    gauge.labels(name='a "b"\\c\nd').set(1)
+
+    assert 'test_names{name="a \\"b\\"\\\\c\\nd"} 1.0' in render(gauge)
+
+
+def test_histogram_buckets_are_cumulative_and_end_at_inf():
+    histogram = Histogram('test_seconds', 'Stage time', ['stage'], buckets=(0.1, 1.0))
+    for seconds in (0.05, 0.1, 0.5, 3):
+        histogram.labels(stage='llm').observe(seconds)
+
+    lines = render(histogram).splitlines()
+
+    assert lines[1] == '# TYPE test_seconds histogram'
+    assert lines[2:] == [
+        'test_seconds_bucket{stage="llm",le="0.1"} 2.0',
+        'test_seconds_bucket{stage="llm",le="1.0"} 3.0',
+        'test_seconds_bucket{stage="llm",le="+Inf"} 4.0',
+        'test_seconds_sum{stage="llm"} 3.65',
+        'test_seconds_count{stage="llm"} 4.0',
+    ]
+
+
+def test_unlabelled_metrics_render_without_braces():
+    gauge = Gauge('test_sockets', 'Sockets')
+    gauge.set(7)
+
+    assert render(gauge).splitlines()[-1] == 'test_sockets 7.0'
+
+
+def test_callbacks_are_read_at_scrape_time():
+    state = {'queued': 1}
+    gauge = Gauge('test_queue', 'Jobs by state', ['state'])
+    gauge.set_function(lambda: dict(state))
+    assert 'test_queue{state="queued"} 1.0' in render(gauge)
+
+    state['queued'] = 4
+    state['running'] = 2
+    lines = render(gauge).splitlines()
+    assert 'test_queue{state="queued"} 4.0' in lines and 'test_queue{state="running"} 2.0' in lines
+
+
+def test_a_failing_callback_drops_its_samples_not_the_scrape():
+    def broken():
+        raise RuntimeError('pool gone')
+
+    failing = Gauge('test_pool', 'Pool usage')
+    failing.set_function(broken)
+    working = Counter('test_total', 'Total')
+    working.inc()
+
+    output = render(failing, working)
+
+    assert '# TYPE test_pool gauge\n# HELP test_total Total' in output
+    assert output.endswith('test_total 1.0\n')
+
+
+def test_shared_registry_lists_the_process_metrics():
+    output = metrics.render()
+
+    assert '# TYPE placebuddy_stage_seconds histogram' in output
+    assert '# TYPE placebuddy_companies_total counter' in output
@@ -0,0 +1,86 @@
+import json
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+from database.connection import db_cursor
+from database.migrate import add_company_name_normalized, import_api_server_tables
+from database.models import UserModel
+
+
+@pytest.mark.mysql
+def test_import_api_server_tables(mysql_db):
+    existing_user = UserModel.create_user('asha', 'asha@example.com', 'x')
+    with db_cursor(commit=True) as cursor:
+        cursor.execute("INSERT INTO companies (name, name_normalized, tier) VALUES ('Acme', 'acme', 'tier2')")
+        acme_id = cursor.lastrowid
+        cursor.execute("CREATE TABLE `user` (id INT PRIMARY KEY, name VARCHAR(50), password_hash VARCHAR(256))")
+        cursor.execute("""CREATE TABLE company (id INT PRIMARY KEY, name VARCHAR(100), ctc FLOAT, tier INT,
+                          form_link TEXT, mode VARCHAR(50), last_date DATE)""")
+        cursor.execute("CREATE TABLE `read` (user_id INT, company_id INT)")
+        cursor.execute("INSERT INTO `user` VALUES (1, 'asha', %s), (2, 'ravi', 'h')",
+                       (generate_password_hash('secret'),))
+        cursor.execute("""INSERT INTO company VALUES
+                          (10, 'ACME', 12, 1, 'https://a', 'online', '2026-11-01'),
+                          (11, 'Beta Labs', 8.5, 2, 'https://b', 'offline', '2026-12-01')""")
+        cursor.execute("INSERT INTO `read` VALUES (1, 10), (2, 11)")
+
+    conn = mysql_db.raw_connection()
+    try:
+        import_api_server_tables(conn)
+    finally:
+        conn.close()
+
+    with db_cursor(dictionary=True) as cursor:
+        cursor.execute("SELECT id, username FROM users WHERE username LIKE 'asha%%' OR username = 'ravi'")
+        users = {row['username']: row['id'] for row in cursor.fetchall()}
+        cursor.execute("SELECT id, name, tier, ctc, last_date FROM companies ORDER BY id")
+        companies = cursor.fetchall()
+        cursor.execute("SELECT user_id, company_id FROM read_status")
+        marks = {(row['user_id'], row['company_id']) for row in cursor.fetchall()}
+
+    # The clashing username is kept apart from the existing account
+    assert users['asha'] == existing_user
+    assert set(users) == {'asha', 'asha-1', 'ravi'}
+    # ACME matches the existing row; Beta Labs is copied with a label tier
+    assert len(companies) == 2
+    beta = companies[1]
+    assert (beta['name'], beta['tier'], beta['ctc']) == ('Beta Labs', 'tier2', 8.5)
+    assert marks == {(users['asha-1'], acme_id), (users['ravi'], beta['id'])}
+
+
+@pytest.mark.mysql
+def test_name_normalized_backfill_merges_collisions(mysql_db):
+    first_user = UserModel.create_user('asha', 'asha@example.com', 'x')
+    second_user = UserModel.create_user('ravi', 'ravi@example.com', 'x')
+    with db_cursor(commit=True) as cursor:
+        cursor.execute("ALTER TABLE companies DROP INDEX uq_companies_name_normalized")
+        cursor.execute("INSERT INTO companies (name, created_by) VALUES ('Acme Inc', %s)", (first_user,))
+        survivor = cursor.lastrowid
+        cursor.execute("INSERT INTO companies (name, industry, created_by) VALUES ('ACME', 'Software', %s)",
+                       (second_user,))
+        duplicate = cursor.lastrowid
+        cursor.execute("INSERT INTO read_status (user_id, company_id) VALUES (%s, %s), (%s, %s)",
+                       (first_user, duplicate, second_user, duplicate))
+        cursor.execute("INSERT INTO read_status (user_id, company_id) VALUES (%s, %s)", (first_user, survivor))
+
+    conn = mysql_db.raw_connection()
+    try:
+        add_company_name_normalized(conn)
+    finally:
+        conn.close()
+
+    with db_cursor(dictionary=True) as cursor:
+        cursor.execute("SELECT id, name_normalized, industry FROM companies")
+        companies = cursor.fetchall()
+        cursor.execute("SELECT user_id, company_id FROM read_status")
+        marks = {(row['user_id'], row['company_id']) for row in cursor.fetchall()}
+        cursor.execute("SELECT company_id, survivor_id, created_by, data FROM merged_companies")
+        archived = cursor.fetchall()
+
+    assert companies == [{'id': survivor, 'name_normalized': 'acme', 'industry': 'Software'}]
+    assert marks == {(first_user, survivor), (second_user, survivor)}
+    # The other user's row is archived, not silently dropped
+    assert [(row['company_id'], row['survivor_id'], row['created_by']) for row in archived] == \
+        [(duplicate, survivor, second_user)]
+    assert json.loads(archived[0]['data'])['name'] == 'ACME'
@@ -0,0 +1,246 @@
+from contextlib import contextmanager
+
+from datetime import date
+
+import mysql.connector
+import pytest
+from mysql.connector.constants import ClientFlag
+
+from database import models, schema
+from database.models import CompanyModel, ReadStatusModel, StatsModel, UserModel
+
+
+class RecordingCursor:
+    """Stands in for a database cursor and keeps the last statement"""
+
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.query = self.params = None
+        self.rowcount = 0
+        self.statements = []
+
+    def execute(self, query, params=()):
+        self.query, self.params = ' '.join(query.split()), params
+        self.statements.append((self.query, params))
+
+    def executemany(self, query, rows):
+        self.statements.append((' '.join(query.split()), list(rows)))
+
+    def fetchall(self):
+        return self.rows
+
+
+@pytest.fixture
+def recording_cursor(monkeypatch):
+    cursor = RecordingCursor()
+
+    @contextmanager
+    def db_cursor(dictionary=False, commit=False):
+        yield cursor
+
+    monkeypatch.setattr(models, 'db_cursor', db_cursor)
+    return cursor
+
+
+def test_engine_connects_without_found_rows(monkeypatch):
+    captured = {}
+
+    def fake_connect(*args, **kwargs):
+        captured.update(kwargs)
+        raise mysql.connector.Error('no server in unit tests')
+
+    monkeypatch.setattr(mysql.connector, 'connect', fake_connect)
+    engine = schema._create_engine()
+    with pytest.raises(Exception):
+        engine.raw_connection()
+    assert not captured['client_flags'] & ClientFlag.FOUND_ROWS
+
+
+@pytest.mark.mysql
+def test_insert_or_get_reports_duplicate(mysql_db):
+    user_id = UserModel.create_user('dup-user', 'dup@example.com', 'x')
+
+    first_id, first_created = CompanyModel.insert_or_get({'name': 'Acme Corp', 'tier': 'tier1'}, user_id)
+    second_id, second_created = CompanyModel.insert_or_get({'name': 'ACME corp.', 'tier': 'tier1'}, user_id)
+
+    assert first_created is True
+    assert second_created is False
+    assert second_id == first_id
+
+
+@pytest.mark.mysql
+def test_create_companies_skips_existing(mysql_db):
+    from database.models import StatsModel
+    user_id = UserModel.create_user('batch-user', 'batch@example.com', 'x')
+    [(acme_id, _)] = CompanyModel.create_companies([{'name': 'Acme'}], user_id).values()
+    inserted = CompanyModel.create_companies([{'name': 'Acme'}, {'name': 'Beta'}], user_id)
+
+    assert inserted['acme'] == (acme_id, False)
+    assert inserted['beta'][1] is True
+    assert StatsModel.get_stats(user_id)['total'][''] == 2
+
+
+def test_keyset_cursor_round_trips():
+    cursor = CompanyModel.encode_cursor('2026-10-17T09:30:00', 42)
+
+    assert CompanyModel.decode_cursor(cursor) == ('2026-10-17T09:30:00', 42)
+
+
+@pytest.mark.parametrize('cursor', ['not base64!', 'e30=', CompanyModel.encode_cursor('2026-10-17', 'x')])
+def test_malformed_keyset_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        CompanyModel.decode_cursor(cursor)
+
+
+@pytest.mark.mysql
+def test_keyset_pages_cover_rows_with_equal_timestamps(mysql_db):
+    from database.connection import db_cursor
+    user_id = UserModel.create_user('page-user', 'page@example.com', 'x')
+    with db_cursor(commit=True) as cursor:
+        cursor.executemany(
+            "INSERT INTO companies (name, name_normalized, created_by, created_at) VALUES (%s, %s, %s, %s)",
+            [(f"Company {i}", f"company {i}", user_id, '2026-10-17 09:30:00') for i in range(5)]
+        )
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = CompanyModel.get_companies_page(user_id, cursor=cursor, page_size=2)
+        seen.extend(company['id'] for company in page)
+        if cursor is None:
+            break
+
+    assert len(seen) == 5 and seen == sorted(set(seen), reverse=True)
+
+
+def test_search_ranks_fields_by_weight(recording_cursor):
+    CompanyModel.search_companies(7, 'Cloud ai Infra', limit=10, offset=20)
+
+    # Terms under 3 characters are dropped; the last term matches as a prefix
+    boolean_query = '+cloud +infra*'
+    for field, weight in (('name', 4.0), ('industry', 2.0), ('location', 1.5), ('description', 1.0)):
+        assert f"{weight} * MATCH({field}) AGAINST (%s IN BOOLEAN MODE)" in recording_cursor.query
+    assert 'ORDER BY relevance DESC, id DESC' in recording_cursor.query
+    assert recording_cursor.params == (boolean_query,) * 4 + (7, boolean_query, 10, 20)
+
+
+def test_search_with_only_short_terms_falls_back_to_a_name_prefix(recording_cursor):
+    CompanyModel.search_companies(7, 'HP co', limit=5)
+
+    assert 'MATCH' not in recording_cursor.query
+    assert 'name_normalized LIKE %s' in recording_cursor.query
+    assert recording_cursor.params == (7, 'hp co%', 5, 0)
+
+
+def test_search_without_terms_does_not_query(recording_cursor):
+    assert CompanyModel.search_companies(7, '  --  ') == []
+    assert recording_cursor.query is None
+
+
+@pytest.mark.mysql
+def test_search_prefers_name_matches(mysql_db):
+    from database.connection import db_cursor
+    user_id = UserModel.create_user('search-user', 'search@example.com', 'x')
+    other_user = UserModel.create_user('other-user', 'other@example.com', 'x')
+    with db_cursor(commit=True) as cursor:
+        cursor.executemany(
+            "INSERT INTO companies (name, name_normalized, description, industry, created_by) "
+            "VALUES (%s, %s, %s, %s, %s)",
+            [('Quantum Labs', 'quantum labs', 'Hardware research', 'Electronics', user_id),
+             ('Acme', 'acme', 'Builds quantum sensors', 'Electronics', user_id),
+             ('Quantum Works', 'quantum works', None, None, other_user),
+             ('Qi Systems', 'qi systems', None, None, user_id)]
+        )
+
+    ranked = CompanyModel.search_companies(user_id, 'quant')
+    short = CompanyModel.search_companies(user_id, 'qi')
+
+    assert [company['name'] for company in ranked] == ['Quantum Labs', 'Acme']
+    assert ranked[0]['relevance'] > ranked[1]['relevance']
+    assert [company['name'] for company in short] == ['Qi Systems']
+
+
+def test_mark_read_only_marks_the_users_own_companies(recording_cursor):
+    recording_cursor.rowcount = 1
+    assert ReadStatusModel.mark_read(7, [1, 2]) == 1
+
+    (insert, params), (stats, deltas) = recording_cursor.statements
+    assert 'SELECT created_by, id FROM companies WHERE created_by = %s AND id IN (%s, %s)' in insert
+    assert params == (7, 1, 2)
+    # The read counter moves by the rows actually marked, not the ids asked for
+    assert deltas == [(7, 'read', '', 1)]
+
+
+def test_mark_unread_only_removes_the_users_marks(recording_cursor):
+    recording_cursor.rowcount = 2
+    assert ReadStatusModel.mark_unread(7, [1, 2, 3]) == 2
+
+    (delete, params), (_, deltas) = recording_cursor.statements
+    assert delete == 'DELETE FROM read_status WHERE user_id = %s AND company_id IN (%s, %s, %s)'
+    assert params == (7, 1, 2, 3)
+    assert deltas == [(7, 'read', '', -2)]
+
+
+def test_empty_read_status_changes_do_not_query(recording_cursor):
+    assert ReadStatusModel.mark_read(7, []) == 0
+    assert ReadStatusModel.mark_unread(7, []) == 0
+    assert recording_cursor.statements == []
+
+
+@pytest.mark.mysql
+def test_read_marks_respect_ownership(mysql_db):
+    from database.models import StatsModel
+    owner = UserModel.create_user('owner', 'owner@example.com', 'x')
+    intruder = UserModel.create_user('intruder', 'intruder@example.com', 'x')
+    company_id, _ = CompanyModel.insert_or_get({'name': 'Acme'}, owner)
+
+    assert ReadStatusModel.mark_read(intruder, [company_id]) == 0
+    assert ReadStatusModel.mark_read(owner, [company_id]) == 1
+    assert ReadStatusModel.mark_read(owner, [company_id]) == 0
+    assert ReadStatusModel.mark_unread(intruder, [company_id]) == 0
+
+    assert set(ReadStatusModel.get_read_map(owner, [company_id])) == {company_id}
+    assert ReadStatusModel.get_read_map(intruder, [company_id]) == {}
+    assert StatsModel.get_stats(owner)['read'][''] == 1
+    assert 'read' not in StatsModel.get_stats(intruder)
+
+    assert ReadStatusModel.mark_unread(owner, [company_id]) == 1
+    assert ReadStatusModel.get_read_company_ids(owner) == []
+    assert 'read' not in StatsModel.get_stats(owner)
+
+
+@pytest.mark.parametrize('industry, bucket', [(None, 'Unknown'), ('', 'Unknown'), ('Fintech', 'Fintech'),
+                                              ('x' * 150, 'x' * 100)])
+def test_company_deltas_bucket_industry_like_rebuild(industry, bucket):
+    deltas = StatsModel.company_deltas({'tier': 2, 'industry': industry}, -1, created_on=date(2026, 10, 17))
+
+    assert deltas == [('total', '', -1), ('tier', 'tier2', -1), ('industry', bucket, -1), ('day', '2026-10-17', -1)]
+
+
+def test_rebuild_buckets_empty_industry_as_unknown(recording_cursor):
+    StatsModel.rebuild_user(recording_cursor, 7)
+
+    rebuild, params = recording_cursor.statements[-1]
+    assert "LEFT(COALESCE(NULLIF(industry, ''), 'Unknown'), 100)" in rebuild
+    assert params == (7,) * 5
+
+
+@pytest.mark.mysql
+def test_incremental_counters_match_a_rebuild(mysql_db):
+    from database.connection import db_cursor
+    user_id = UserModel.create_user('stats-user', 'stats@example.com', 'x')
+    acme, _ = CompanyModel.insert_or_get({'name': 'Acme', 'tier': 'tier1', 'industry': ''}, user_id)
+    CompanyModel.create_companies([{'name': 'Beta', 'industry': 'Fintech'}, {'name': 'Gamma'}], user_id)
+    globex, _ = CompanyModel.insert_or_get({'name': 'Globex', 'tier': 2, 'industry': 'Fintech'}, user_id)
+    CompanyModel.update_company(acme, {'tier': 'tier2', 'industry': 'Software'}, user_id)
+    CompanyModel.update_company(globex, {'industry': ''}, user_id)
+    ReadStatusModel.mark_read(user_id, [acme, globex])
+    ReadStatusModel.mark_unread(user_id, [globex])
+    CompanyModel.delete_company(globex, user_id)
+
+    incremental = StatsModel.get_stats(user_id)
+    with db_cursor(commit=True) as cursor:
+        StatsModel.rebuild_user(cursor, user_id)
+
+    assert incremental == StatsModel.get_stats(user_id)
+    assert incremental['industry'] == {'Software': 1, 'Fintech': 1, 'Unknown': 1}
+    assert incremental['read'] == {'': 1}
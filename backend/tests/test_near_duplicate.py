@@ -0,0 +1,95 @@
+import threading
+import time
+
+from services import near_duplicate
+from services.near_duplicate import NearDuplicateIndex
+
+
+def wait_until_refreshed():
+    for _ in range(200):
+        if not near_duplicate._refreshing:
+            return
+        time.sleep(0.01)
+    raise AssertionError('refresh did not finish')
+
+
+def test_misspelling_scores_below_an_exact_match():
+    index = NearDuplicateIndex(min_score=0.5)
+    index.load([(1, 'Google'), (2, 'Microsoft')])
+
+    [exact] = index.query('Google LLC')
+    [typo] = index.query('Gogle')
+
+    assert (exact['company_id'], exact['score']) == (1, 1.0)
+    assert typo['company_id'] == 1 and 0.5 <= typo['score'] < 1.0
+    assert index.query('Zoho') == []
+
+
+def test_candidates_are_sorted_and_limited():
+    index = NearDuplicateIndex(min_score=0.3)
+    index.load([(1, 'Acme'), (2, 'Acme Labs'), (3, 'Acme Labs India'), (4, 'Globex')])
+
+    candidates = index.query('Acme Labs', limit=2)
+
+    assert [candidate['company_id'] for candidate in candidates] == [2, 3]
+    assert candidates[0]['score'] >= candidates[1]['score']
+
+
+def test_removed_company_is_no_longer_matched():
+    index = NearDuplicateIndex()
+    index.load([(1, 'Initech'), (2, 'Initrode')])
+
+    index.remove(1)
+    index.remove(99)
+
+    assert [candidate['company_id'] for candidate in index.query('Initech')] == []
+    assert len(index) == 1
+
+
+def test_readding_an_id_replaces_its_name():
+    index = NearDuplicateIndex()
+    index.add(1, 'Initech')
+    index.add(1, 'Globex')
+
+    assert index.query('Initech') == []
+    assert index.query('Globex')[0]['company_id'] == 1
+
+
+def test_refresh_runs_off_the_request_path_and_rebuild_drops_deleted_rows(monkeypatch):
+    rows = [(1, 'Acme'), (2, 'Globex')]
+    calls = []
+    release = threading.Event()
+
+    def get_company_names(after_id=0):
+        calls.append(after_id)
+        release.wait(5)
+        return [row for row in rows if row[0] > after_id]
+
+    monkeypatch.setattr(near_duplicate.CompanyModel, 'get_company_names', get_company_names)
+    monkeypatch.setattr(near_duplicate.config, 'NEAR_DUP_REFRESH_SECONDS', 3600, raising=False)
+    monkeypatch.setattr(near_duplicate.config, 'NEAR_DUP_REBUILD_SECONDS', 3600, raising=False)
+    monkeypatch.setattr(near_duplicate, '_index', None)
+    monkeypatch.setattr(near_duplicate, '_refreshing', False)
+
+    # The first load runs in the background; callers get an empty index meanwhile
+    assert len(near_duplicate.get_near_duplicate_index()) == 0
+    release.set()
+    wait_until_refreshed()
+    index = near_duplicate.get_near_duplicate_index()
+    assert len(index) == 2
+
+    # A refresh only pulls rows inserted since the last one
+    rows.append((3, 'Initech'))
+    monkeypatch.setattr(near_duplicate, '_last_refresh', time.monotonic() - 3601)
+    near_duplicate.get_near_duplicate_index()
+    wait_until_refreshed()
+    assert calls == [0, 2] and len(index) == 3
+
+    # A company deleted elsewhere disappears at the next rebuild
+    del rows[0]
+    monkeypatch.setattr(near_duplicate, '_last_rebuild', None)
+    near_duplicate.get_near_duplicate_index()
+    wait_until_refreshed()
+    rebuilt = near_duplicate.get_near_duplicate_index()
+    assert calls[-1] == 0
+    assert rebuilt.query('Acme') == [] and len(rebuilt) == 2
@@ -0,0 +1,24 @@
+import pytest
+
+from database.normalize import normalize_company_name
+
+
+@pytest.mark.parametrize('name, key', [
+    ('Google LLC', 'google'),
+    ('google, inc.', 'google'),
+    ('Société Générale', 'societe generale'),
+    ('AT&T', 'at and t'),
+    ('Private Limited', 'private limited'),
+])
+def test_latin_names_drop_case_accents_and_suffixes(name, key):
+    assert normalize_company_name(name) == key
+
+
+def test_names_without_latin_letters_keep_their_own_key():
+    toyota = normalize_company_name('株式会社トヨタ')
+    infosys = normalize_company_name('इन्फोसिस')
+
+    assert toyota == '株式会社トヨタ'
+    assert infosys == 'इन्फोसिस'
+    assert normalize_company_name(' 株式会社トヨタ ') == toyota
+    assert normalize_company_name(None) == ''
@@ -0,0 +1,66 @@
+import time
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+from services.password_service import PasswordHasher, PasswordHasherBusyError
+
+
+def make_hasher(**kwargs):
+    return PasswordHasher(workers=2, rounds=4, **kwargs)
+
+
+def test_verifies_legacy_werkzeug_hashes_and_upgrades_them():
+    hasher = make_hasher()
+    legacy = generate_password_hash('secret')
+
+    assert hasher.verify('secret', legacy)
+    assert not hasher.verify('wrong', legacy)
+    assert hasher.needs_rehash(legacy)
+
+
+def test_bcrypt_round_trip():
+    hasher = make_hasher()
+    hashed = hasher.hash('secret')
+
+    assert hasher.verify('secret', hashed)
+    assert not hasher.needs_rehash(hashed)
+
+
+def test_needs_rehash_only_upgrades():
+    stronger = PasswordHasher(workers=1, rounds=6).hash('secret')
+    weaker = PasswordHasher(workers=1, rounds=4).hash('secret')
+    hasher = PasswordHasher(workers=1, rounds=5)
+
+    assert not hasher.needs_rehash(stronger)
+    assert hasher.needs_rehash(weaker)
+
+
+def test_timed_out_work_keeps_its_slot_until_it_finishes():
+    hasher = PasswordHasher(workers=1, rounds=4, max_pending=1, timeout=0.05)
+
+    with pytest.raises(FuturesTimeoutError):
+        hasher._run(lambda: time.sleep(0.3))
+    # bcrypt is still running, so the single slot is still taken
+    with pytest.raises(PasswordHasherBusyError):
+        hasher._run(lambda: None)
+
+    time.sleep(0.4)
+    assert hasher._run(lambda: 'done') == 'done'
+    assert hasher.stats()['pending'] == 0
+
+
+def test_hasher_queue_and_wait_time_are_exported(monkeypatch):
+    import metrics
+    from services import password_service
+
+    hasher = make_hasher(max_pending=8)
+    monkeypatch.setattr(password_service, '_hasher', hasher)
+    hasher.verify('secret', hasher.hash('secret'))
+
+    exposition = metrics.render()
+    assert 'placebuddy_password_hasher{stat="queue_depth"} 0.0' in exposition
+    assert 'placebuddy_password_hasher{stat="capacity"} 8.0' in exposition
+    assert 'placebuddy_password_hasher_avg_ms{phase="wait"}' in exposition
+    assert 'placebuddy_password_hasher_total{result="completed"} 2.0' in exposition
@@ -0,0 +1,44 @@
+from services.posting_splitter import MIN_POSTING_CHARS, iter_file_postings, split_csv_lines, split_text_lines
+
+ACME = 'Company: Acme\nTier 1 drive, CTC 12 LPA'
+GLOBEX = 'Company: Globex\nTier 2 drive, CTC 6 LPA'
+
+
+def test_splits_at_separators_blank_runs_and_company_lines():
+    digest = f"{ACME}\n-----\n{GLOBEX}\n\n\nInitech hiring interns, stipend 20k\n{ACME}"
+
+    assert list(split_text_lines(digest.splitlines())) == [
+        ACME, GLOBEX, 'Initech hiring interns, stipend 20k', ACME
+    ]
+
+
+def test_drops_fragments_and_caps_runaway_postings():
+    assert list(split_text_lines(['ok', '', '', 'x' * MIN_POSTING_CHARS])) == ['x' * MIN_POSTING_CHARS]
+
+    # A block is cut at the first line boundary past max_chars
+    postings = list(split_text_lines(['y' * 40] * 10, max_chars=100))
+    assert [len(posting) for posting in postings] == [122, 122, 122, 40]
+
+
+def test_csv_rows_use_the_text_column_and_company():
+    lines = ['company,description,ctc\n', 'Acme,Tier 1 drive for graduates,12\n', ',,\n',
+             'Globex,Tier 2 drive for graduates,6\n']
+
+    assert list(split_csv_lines(lines)) == [
+        'Company: Acme\nTier 1 drive for graduates',
+        'Company: Globex\nTier 2 drive for graduates',
+    ]
+
+
+def test_csv_without_a_text_column_renders_header_value_lines():
+    assert list(split_csv_lines(['name,location\n', 'Acme Corporation,Pune\n'])) == [
+        'name: Acme Corporation\nlocation: Pune'
+    ]
+
+
+def test_uploaded_file_is_removed_after_reading(tmp_path):
+    path = tmp_path / 'digest.txt'
+    path.write_text(f"{ACME}\n=====\n{GLOBEX}\n", encoding='utf-8')
+
+    assert list(iter_file_postings(str(path), remove=True)) == [ACME, GLOBEX]
+    assert not path.exists()
@@ -0,0 +1,91 @@
+import threading
+import time
+
+import pytest
+
+from services import pre_extractor
+from services.pre_extractor import (KnownCompanyMatcher, PreExtractor, find_form_link, parse_ctc, parse_deadline)
+
+
+@pytest.mark.parametrize('text, name', [
+    ('Company: Acme - Tier 1 drive', 'Acme'),
+    ('Company Name: Acme Labs (Tier 2)', 'Acme Labs'),
+    ('Organisation - Globex | CTC 12 LPA', 'Globex'),
+    ('Employer: Coca-Cola India', 'Coca-Cola India'),
+    ('Company: Initech – Mass hiring', 'Initech'),
+])
+def test_name_label_stops_at_separators(text, name):
+    assert PreExtractor().extract(text)['name'] == name
+
+
+def test_extracts_templated_fields():
+    fields = PreExtractor().extract(
+        "Company: Acme\n"
+        "Tier 2 drive, CTC: 6-8 LPA\n"
+        "Mode: Online\n"
+        "Last date to apply: 15/11/2026\n"
+        "Register here: https://forms.gle/abc123"
+    )
+
+    assert fields == {'name': 'Acme', 'tier': 'tier2', 'ctc': 8.0, 'last_date': '2026-11-15',
+                      'form_link': 'https://forms.gle/abc123', 'mode': 'online'}
+
+
+@pytest.mark.parametrize('text, ctc', [
+    ('CTC: 12 LPA', 12.0),
+    ('Package of 1.2 Cr', 120.0),
+    ('Stipend 25k per month', 3.0),
+    ('Salary: 4,50,000 per annum', 4.5),
+    ('No numbers here', None),
+])
+def test_parse_ctc(text, ctc):
+    assert parse_ctc(text) == ctc
+
+
+def test_parse_deadline_and_form_link():
+    assert parse_deadline('Deadline: 3rd December, 2026') == '2026-12-03'
+    assert find_form_link('See https://example.com/about\nApply at https://example.com/jobs.') == \
+        'https://example.com/jobs'
+
+
+def test_matcher_prefers_the_most_specific_name():
+    matcher = KnownCompanyMatcher([(1, 'Tata'), (2, 'Tata Consultancy Services'), (3, 'Acme')])
+
+    assert matcher.match('Tata Consultancy Services is visiting campus') == 'Tata Consultancy Services'
+    assert matcher.match('Acmeware is hiring') is None
+    assert matcher.max_id == 3
+
+
+def test_known_company_mention_is_not_read_as_the_name():
+    extractor = PreExtractor(KnownCompanyMatcher([(1, 'Acme')]))
+    text = 'Globex is hiring for its client Acme, CTC 12 LPA'
+
+    assert 'name' not in extractor.extract(text)
+    assert extractor.match_known_company(text) == 'Acme'
+
+
+def test_matcher_refresh_does_not_block_callers(monkeypatch):
+    loading = threading.Event()
+    release = threading.Event()
+
+    def get_company_names(after_id=0):
+        loading.set()
+        release.wait(5)
+        return [(1, 'Acme')]
+
+    monkeypatch.setattr(pre_extractor.CompanyModel, 'get_company_names', get_company_names)
+    monkeypatch.setattr(pre_extractor, '_extractor', None)
+    monkeypatch.setattr(pre_extractor, '_refreshing', False)
+
+    extractor = pre_extractor.get_pre_extractor()
+    assert loading.wait(5)
+    # The query is still running; callers get the current matcher straight away
+    assert pre_extractor.get_pre_extractor() is extractor
+    assert len(extractor.matcher) == 0
+
+    release.set()
+    for _ in range(100):
+        if not pre_extractor._refreshing:
+            break
+        time.sleep(0.01)
+    assert len(extractor.matcher) == 1
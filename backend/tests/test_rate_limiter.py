@@ -0,0 +1,66 @@
+import pytest
+
+from services.rate_limiter import RateLimitedError, RateLimiter, TokenBucket
+
+
+def test_token_bucket_refills_at_its_rate():
+    bucket = TokenBucket(rate=2, burst=2)
+    now = bucket.updated
+
+    assert bucket.take(now=now) == 0
+    assert bucket.take(now=now) == 0
+    assert bucket.take(now=now) == pytest.approx(0.5)
+    assert bucket.take(now=now + 0.5) == 0
+
+
+def test_user_burst_is_enforced_per_user():
+    limiter = RateLimiter(user_rate=0.01, user_burst=2, global_rate=100, global_burst=100)
+    limiter.check(1)
+    limiter.check(1)
+
+    with pytest.raises(RateLimitedError) as error:
+        limiter.check(1)
+    assert error.value.retry_after >= 1
+    limiter.check(2)
+    assert limiter.stats()['user_limited'] == 1
+
+
+def test_global_limit_refunds_the_user_token():
+    limiter = RateLimiter(user_rate=0.01, user_burst=1, global_rate=0.01, global_burst=1)
+    limiter.check(1)
+
+    with pytest.raises(RateLimitedError):
+        limiter.check(2)
+    # User 2 was turned away by the global bucket, so their own token is intact
+    assert limiter._users[2].tokens == pytest.approx(1, abs=0.01)
+    assert limiter.stats()['global_limited'] == 1
+
+
+def test_least_recently_active_users_are_forgotten():
+    limiter = RateLimiter(max_users=2, global_burst=100)
+    for user_id in (1, 2, 1, 3):
+        limiter.check(user_id)
+
+    assert list(limiter._users) == [1, 3]
+
+
+def test_a_cost_above_the_burst_is_admitted_then_paid_off():
+    bucket = TokenBucket(rate=10, burst=5)
+    now = bucket.updated
+
+    assert bucket.take(3, now=now) == 0
+    # Not admitted until the bucket is full again, then the balance goes negative
+    assert bucket.take(20, now=now) == pytest.approx(0.3)
+    assert bucket.take(20, now=now + 0.3) == 0
+    assert bucket.take(now=now + 0.3) == pytest.approx(1.6)
+
+
+def test_batches_are_charged_per_posting_to_the_user_only():
+    limiter = RateLimiter(user_rate=0.01, user_burst=5, global_rate=0.01, global_burst=2)
+    limiter.check(1, cost=100)
+
+    # One batch does not starve everyone else of the global budget
+    limiter.check(2)
+    with pytest.raises(RateLimitedError) as error:
+        limiter.check(1)
+    assert error.value.retry_after > 1000
@@ -0,0 +1,77 @@
+import base64
+import json
+import time
+
+import jwt
+import pytest
+
+from services.token_service import InvalidTokenError, TokenService
+
+SECRET = 'test-secret-key-that-is-long-enough-for-hs256'
+USER = {'id': 5, 'username': 'asha'}
+
+
+def tamper(token, **claims):
+    """Rewrite the payload of a signed token while keeping its signature"""
+    header, payload, signature = token.split('.')
+    decoded = json.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))
+    decoded.update(claims)
+    payload = base64.urlsafe_b64encode(json.dumps(decoded).encode()).rstrip(b'=').decode()
+    return '.'.join((header, payload, signature))
+
+
+def test_valid_token_is_verified_once_then_served_from_the_cache():
+    tokens = TokenService(SECRET)
+    token = tokens.issue(USER)
+
+    assert tokens.verify(token)['user_id'] == 5
+    assert tokens.verify(token)['username'] == 'asha'
+    assert tokens.stats() == {'hits': 1, 'misses': 1, 'rejected': 0, 'cached': 1}
+
+
+@pytest.mark.parametrize('forge', [
+    lambda token: tamper(token, user_id=1),
+    lambda token: token[:-2] + ('AA' if not token.endswith('AA') else 'BB'),
+    lambda token: jwt.encode({'user_id': 1, 'username': 'admin'}, 'some-other-secret-of-sufficient-length'),
+    lambda token: jwt.encode({'user_id': 1, 'username': 'admin'}, None, algorithm='none'),
+    lambda token: 'not-a-token',
+])
+def test_tampered_or_forged_tokens_are_rejected(forge):
+    tokens = TokenService(SECRET)
+    forged = forge(tokens.issue(USER))
+
+    with pytest.raises(InvalidTokenError, match='Invalid token'):
+        tokens.verify(forged)
+    assert tokens.stats()['rejected'] == 1
+    assert tokens.stats()['cached'] == 0
+
+
+def test_missing_token_is_rejected():
+    with pytest.raises(InvalidTokenError, match='required'):
+        TokenService(SECRET).verify('')
+
+
+def test_expired_token_is_rejected():
+    tokens = TokenService(SECRET, expiration_hours=-1)
+
+    with pytest.raises(InvalidTokenError, match='expired'):
+        tokens.verify(tokens.issue(USER))
+
+
+def test_cached_token_is_dropped_when_it_expires():
+    tokens = TokenService(SECRET, expiration_hours=1 / 3600)
+    token = tokens.issue(USER)
+    tokens.verify(token)
+
+    time.sleep(2.1)
+    with pytest.raises(InvalidTokenError, match='expired'):
+        tokens.verify(token)
+    assert tokens.stats()['cached'] == 0
+
+
+def test_cache_is_bounded():
+    tokens = TokenService(SECRET, max_entries=2)
+    for user_id in range(3):
+        tokens.verify(tokens.issue({'id': user_id, 'username': f'user{user_id}'}))
+
+    assert tokens.stats()['cached'] == 2
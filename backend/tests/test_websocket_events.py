@@ -0,0 +1,143 @@
+import json
+import time
+
+import pytest
+from flask import Flask
+from flask_socketio import SocketIO
+
+from services import ingest_queue
+from services.ingest_queue import DEFAULT_BULK_TOPIC, DEFAULT_TOPIC, InMemoryBroker, PendingRequests
+from services.token_service import get_token_service
+from websocket import events
+from websocket.events import register_websocket_events
+from websocket.feed import FEED_ROOM
+
+
+@pytest.fixture
+def server():
+    app = Flask(__name__)
+    socketio = SocketIO(app, async_mode='threading')
+    job_manager = register_websocket_events(socketio)
+    return app, socketio, job_manager
+
+
+def connect(server, user_id, username):
+    app, socketio, _ = server
+    token = get_token_service().issue({'id': user_id, 'username': username, 'email': f'{username}@example.com'})
+    client = socketio.test_client(app, auth={'token': token})
+    client.get_received()
+    return client
+
+
+def send(client, message_type, data=None):
+    client.emit('message', json.dumps({'type': message_type, 'data': data or {}}))
+    return received(client)
+
+
+def received(client):
+    return [json.loads(packet['args']) for packet in client.get_received()]
+
+
+def receives_feed(server, client):
+    _, socketio, _ = server
+    socketio.emit('message', json.dumps({'type': 'company_created'}), to=FEED_ROOM)
+    return any(message['type'] == 'company_created' for message in received(client))
+
+
+def test_subscribe_feed_is_refused_for_regular_users(server):
+    client = connect(server, 7, 'user')
+
+    replies = send(client, 'subscribe_feed')
+
+    assert replies[0]['type'] == 'processing_error'
+    assert not receives_feed(server, client)
+
+
+def test_feed_admins_can_leave_and_rejoin(server):
+    client = connect(server, 1, 'admin')
+    assert receives_feed(server, client)
+
+    send(client, 'unsubscribe_feed')
+    assert not receives_feed(server, client)
+
+    send(client, 'subscribe_feed')
+    assert receives_feed(server, client)
+
+
+class StreamingLLMService:
+    """Streams the company name well before its tier and industry"""
+
+    def stream_company_info(self, text):
+        yield 'name', 'Acme'
+        yield 'location', 'Pune'
+        yield 'tier', 'tier1'
+        yield 'industry', 'Software'
+        yield 'description', 'Payments'
+
+
+class RecordingCompanyService:
+    inserted = []
+    updates = []
+
+    def process_company(self, company_data, user_id):
+        self.inserted.append(dict(company_data))
+        return {'company_id': 42, 'is_duplicate': False}
+
+    def update_company(self, company_id, updates, user_id):
+        self.updates.append(dict(updates))
+        return True
+
+    def get_company_stats(self, user_id):
+        return {'total_companies': 1, 'read_companies': 0, 'unread_companies': 1,
+                'tier_breakdown': {'tier1': 1, 'tier2': 0, 'tier3': 0}}
+
+
+def test_streamed_company_is_inserted_once_its_counter_buckets_are_known(server, monkeypatch):
+    monkeypatch.setattr(events, 'LLMService', StreamingLLMService)
+    monkeypatch.setattr(events, 'CompanyService', RecordingCompanyService)
+    monkeypatch.setattr(RecordingCompanyService, 'inserted', [])
+    monkeypatch.setattr(RecordingCompanyService, 'updates', [])
+    client = connect(server, 7, 'user')
+
+    client.emit('message', json.dumps({'type': 'process_text', 'data': {'text': 'Acme is hiring'}}))
+    deadline = time.monotonic() + 5
+    messages = []
+    while not any(message['type'] == 'processing_complete' for message in messages):
+        assert time.monotonic() < deadline, messages
+        time.sleep(0.02)
+        messages += received(client)
+
+    inserted, = RecordingCompanyService.inserted
+    assert (inserted['tier'], inserted['industry']) == ('tier1', 'Software')
+    # Only fields the counters do not bucket on may arrive after the insert
+    assert RecordingCompanyService.updates == [{'description': 'Payments'}]
+
+
+def test_broker_requests_keep_priority_and_the_per_user_limit(server, monkeypatch):
+    broker = InMemoryBroker(partitions=1)
+    monkeypatch.setattr(events, 'get_ingest_broker', lambda: broker)
+    monkeypatch.setattr(ingest_queue, '_pending', PendingRequests(max_per_user=2))
+    client = connect(server, 11, 'bulk-user')
+
+    first = send(client, 'process_text', {'text': 'Acme digest', 'priority': 'bulk'})
+    second = send(client, 'process_text', {'text': 'Globex is hiring'})
+    third = send(client, 'process_text', {'text': 'Initech is hiring'})
+
+    assert [first[0]['type'], second[0]['type'], third[0]['type']] == ['job_queued', 'job_queued', 'busy']
+    assert [record['text'] for record in broker.records(DEFAULT_BULK_TOPIC)] == ['Acme digest']
+    assert [record['text'] for record in broker.records(DEFAULT_TOPIC)] == ['Globex is hiring']
+
+
+def test_unacknowledged_broker_send_is_reported(server, monkeypatch):
+    class FailingBroker(InMemoryBroker):
+        def send(self, topic, key, value):
+            raise TimeoutError('not acknowledged')
+
+    monkeypatch.setattr(events, 'get_ingest_broker', lambda: FailingBroker())
+    monkeypatch.setattr(ingest_queue, '_pending', PendingRequests(max_per_user=1))
+    client = connect(server, 12, 'unlucky-user')
+
+    replies = send(client, 'process_text', {'text': 'Acme is hiring'})
+
+    assert [reply['type'] for reply in replies] == ['processing_error']
+    assert ingest_queue.get_pending_requests().count(12) == 0
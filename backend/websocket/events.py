@@ -1,22 +1,81 @@
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from flask import request
-from flask_socketio import emit, disconnect
+from flask_socketio import emit, disconnect, join_room, leave_room, ConnectionRefusedError
 from database.models import CompanyModel
 from services.llm_service import LLMService
 from services.company_service import CompanyService
+from services.job_service import JobManager, PRIORITY_BULK, PRIORITY_INTERACTIVE
+from services.rate_limiter import AdmissionError, get_rate_limiter
+from services.ingest_queue import get_ingest_broker, get_pending_requests, make_request, request_topic
+from services.batch_service import run_batch_job
+from services.posting_splitter import split_text_lines
+from services.token_service import InvalidTokenError, get_token_service
+from websocket.pubsub import user_room
+from websocket.feed import FEED_ROOM, company_row, compact_counters, init_feed_publisher
+from config import config
+import metrics
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+ACTIVE_SOCKETS = metrics.gauge('placebuddy_active_sockets', 'Authenticated sockets connected to this instance')
+JOB_QUEUE = metrics.gauge('placebuddy_job_queue', 'process_text jobs by state', ['state'])
+JOBS = metrics.counter('placebuddy_jobs_total', 'Finished process_text jobs by outcome', ['status'])
+ADMISSIONS = metrics.counter('placebuddy_admissions_total', 'process_text requests by admission result', ['result'])
+
+# The per-user counters are bucketed on tier and industry, so a streamed company
+# is inserted once these are known (or the stream ends) and never re-bucketed
+INSERT_FIELDS = ('name', 'tier', 'industry')
+
 def register_websocket_events(socketio):
-    """Register all WebSocket events for native WebSocket and SocketIO compatibility"""
+    """Register all WebSocket events and return the JobManager that runs process_text jobs"""
+    job_manager = JobManager(
+        socketio,
+        workers=getattr(config, 'JOB_WORKERS', 4),
+        max_queue=getattr(config, 'JOB_QUEUE_SIZE', 100),
+        max_jobs_per_user=getattr(config, 'JOB_MAX_PER_USER', 3),
+        max_queue_wait=getattr(config, 'JOB_MAX_QUEUE_WAIT', 30),
+        bulk_queue_share=getattr(config, 'JOB_BULK_QUEUE_SHARE', 0.5),
+        interactive_workers=getattr(config, 'JOB_INTERACTIVE_WORKERS', 1)
+    )
+    feed = init_feed_publisher(socketio)
+    # Company inserts overlap with the rest of the extraction stream
+    write_pool = ThreadPoolExecutor(max_workers=getattr(config, 'JOB_WORKERS', 4), thread_name_prefix='company-write')
+    feed_admins = set(getattr(config, 'FEED_ADMINS', []))
+    
+    # Verified token claims per socket, checked once at connect time
+    socket_users = {}
+
+    ACTIVE_SOCKETS.set_function(lambda: len(socket_users))
+    JOB_QUEUE.set_function(lambda: {
+        state: job_manager.stats()[key] for state, key in (('queued', 'queue_depth'), ('running', 'running'))
+    })
+    JOBS.set_function(lambda: {
+        status: job_manager.stats()[status] for status in ('completed', 'failed', 'rejected', 'expired')
+    })
+    ADMISSIONS.set_function(lambda: {
+        result: count for result, count in get_rate_limiter().stats().items() if result != 'tracked_users'
+    })
     
     @socketio.on('connect')
-    def handle_connect():
-        logger.info(f"Client connected: {request.sid}")
+    def handle_connect(auth=None):
+        token = (auth or {}).get('token') or request.args.get('token')
+        try:
+            claims = get_token_service().verify(token)
+        except InvalidTokenError as e:
+            logger.warning(f"Rejected socket {request.sid}: {e}")
+            raise ConnectionRefusedError(str(e))
+        
+        socket_users[request.sid] = claims
+        # Every tab/device of the user joins the same room, on any instance
+        join_room(user_room(claims['user_id']))
+        if claims.get('username') in feed_admins:
+            join_room(FEED_ROOM)
+        logger.info(f"Client connected: {request.sid} (user {claims['user_id']})")
         # Send connection confirmation
         emit('message', json.dumps({
             'type': 'status',
@@ -25,6 +84,7 @@ def register_websocket_events(socketio):
 
     @socketio.on('disconnect')
     def handle_disconnect():
+        socket_users.pop(request.sid, None)
         logger.info(f"Client disconnected: {request.sid}")
 
     @socketio.on('message')
@@ -32,10 +92,11 @@ def register_websocket_events(socketio):
         """Handle native WebSocket messages"""
         try:
             # Parse JSON message
-            if isinstance(data, str):
-                message = json.loads(data)
-            else:
-                message = data
+            with metrics.STAGE_SECONDS.labels(stage='parse').time():
+                if isinstance(data, str):
+                    message = json.loads(data)
+                else:
+                    message = data
                 
             message_type = message.get('type')
             message_data = message.get('data', {})
@@ -44,84 +105,215 @@ def register_websocket_events(socketio):
             
             if message_type == 'process_text':
                 handle_process_text(message_data)
+            elif message_type == 'process_batch':
+                handle_process_batch(message_data)
+            elif message_type == 'subscribe_feed':
+                handle_subscribe_feed()
+            elif message_type == 'unsubscribe_feed':
+                leave_room(FEED_ROOM)
             else:
                 logger.warning(f"Unknown message type: {message_type}")
                 
         except json.JSONDecodeError as e:
+            metrics.ERRORS.labels(stage='parse').inc()
             logger.error(f"Invalid JSON received: {e}")
             emit('message', json.dumps({
                 'type': 'processing_error',
                 'error': 'Invalid message format'
             }))
         except Exception as e:
+            metrics.ERRORS.labels(stage='message').inc()
             logger.error(f"Error handling message: {e}")
             emit('message', json.dumps({
                 'type': 'processing_error',
                 'error': 'Server error occurred'
             }))
 
+    def handle_subscribe_feed():
+        """Let a feed admin rejoin the global feed; nobody else may see other users' companies"""
+        if socket_users.get(request.sid, {}).get('username') not in feed_admins:
+            logger.warning(f"Refused feed subscription from {request.sid}")
+            emit('message', json.dumps({
+                'type': 'processing_error',
+                'error': 'Not allowed to subscribe to the company feed'
+            }))
+            return
+        join_room(FEED_ROOM)
+        emit('message', json.dumps({'type': 'status', 'message': 'Subscribed to company feed'}))
+
     def handle_process_text(data):
-        """Process text input using LLM and save to database"""
-        try:
-            text = data.get('text', '').strip()
-            user_id = data.get('user_id')
-            timestamp = data.get('timestamp')
-            
-            if not text:
-                emit('message', json.dumps({
-                    'type': 'processing_error',
-                    'error': 'No text provided'
-                }))
-                return
-                
-            if not user_id:
-                emit('message', json.dumps({
-                    'type': 'processing_error',
-                    'error': 'User ID required'
-                }))
-                return
-            
-            # Send processing status
+        """Validate a process_text request and queue it on the job pool"""
+        text = data.get('text', '').strip()
+        # The user comes from the token verified at connect, never from the message
+        user_id = socket_users.get(request.sid, {}).get('user_id')
+
+        if not text:
             emit('message', json.dumps({
-                'type': 'status',
-                'message': 'Extracting company information...'
+                'type': 'processing_error',
+                'error': 'No text provided'
             }))
-            
-            # Extract company information using LLM service
-            llm_service = LLMService()
-            company_data = llm_service.extract_company_info(text)
-            
-            if not company_data:
+            return
+
+        if not user_id:
+            emit('message', json.dumps({
+                'type': 'processing_error',
+                'error': 'Not authenticated'
+            }))
+            return
+
+        # Bulk imports yield to interactive pastes
+        priority = PRIORITY_BULK if data.get('priority') == 'bulk' else PRIORITY_INTERACTIVE
+
+        try:
+            get_rate_limiter().check(user_id)
+        except AdmissionError as e:
+            emit_busy(e)
+            return
+
+        broker = get_ingest_broker()
+        if broker is not None:
+            # Hand off to the ingest consumers; the result comes back via the user's room
+            ingest_request = make_request(user_id, text, request.sid, priority=priority)
+            pending = get_pending_requests()
+            try:
+                pending.acquire(user_id, ingest_request['request_id'])
+            except AdmissionError as e:
+                emit_busy(e)
+                return
+            try:
+                broker.send(request_topic(ingest_request), user_id, ingest_request)
+            except Exception as e:
+                # Not acknowledged by the broker, so nothing will answer this request
+                pending.release(user_id, ingest_request['request_id'])
+                logger.error(f"Could not queue process_text request: {str(e)}")
                 emit('message', json.dumps({
                     'type': 'processing_error',
-                    'error': 'Could not extract company information from text'
+                    'error': 'Could not queue request, please try again'
                 }))
                 return
-            
-            # Process company data using company service
-            company_service = CompanyService()
-            result = company_service.process_company(company_data, user_id)
-            
-            # Send success response
             emit('message', json.dumps({
-                'type': 'processing_complete',
-                'success': True,
-                'result': {
-                    'company_id': result['company_id'],
-                    'company_name': company_data.get('name'),
-                    'tier': company_data.get('tier'),
-                    'is_duplicate': result.get('is_duplicate', False),
-                    'created_at': datetime.now().isoformat()
-                },
-                'originalText': text
+                'type': 'job_queued',
+                'job_id': ingest_request['request_id'],
+                'message': 'Request queued for processing'
             }))
-            
-            logger.info(f"Successfully processed company: {company_data.get('name')}")
-            
-        except Exception as e:
-            logger.error(f"Error processing text: {str(e)}")
+            return
+
+        try:
+            job = job_manager.submit(user_id, request.sid, process_text_job, text, user_id, priority=priority)
+        except AdmissionError as e:
+            emit_busy(e)
+            return
+
+        # Reply right away; progress is pushed from the worker
+        emit('message', json.dumps({
+            'type': 'job_queued',
+            'job_id': job.id,
+            'message': 'Request queued for processing'
+        }))
+
+    def handle_process_batch(data):
+        """Queue a digest (one text to split) or a list of postings as one bulk job"""
+        user_id = socket_users.get(request.sid, {}).get('user_id')
+        texts = data.get('texts')
+        if isinstance(texts, list):
+            postings = [text.strip() for text in texts if isinstance(text, str) and text.strip()]
+        else:
+            postings = split_text_lines((data.get('text') or '').splitlines())
+
+        if not user_id:
             emit('message', json.dumps({
                 'type': 'processing_error',
-                'error': f'Processing failed: {str(e)}'
+                'error': 'Not authenticated'
             }))
+            return
+
+        try:
+            # Each posting is an extraction, so a batch costs as much as that many pastes
+            get_rate_limiter().check(user_id, cost=max(len(postings), 1))
+            job = job_manager.submit(user_id, request.sid, run_batch_job, job_manager, postings, user_id, feed,
+                                     priority=PRIORITY_BULK)
+        except AdmissionError as e:
+            emit_busy(e)
+            return
+
+        emit('message', json.dumps({
+            'type': 'job_queued',
+            'job_id': job.id,
+            'message': 'Batch queued for processing'
+        }))
+
+    def emit_busy(error):
+        """Tell the client its request was not accepted and when to try again"""
+        emit('message', json.dumps({
+            'type': 'busy',
+            'error': str(error),
+            'retry_after': error.retry_after
+        }))
+
+    def process_text_job(job, text, user_id):
+        """Process text input using LLM and save to database (runs on a job worker)"""
+        # Send processing status
+        job_manager.notify(job, {
+            'type': 'status',
+            'message': 'Extracting company information...'
+        })
+
+        # Stream fields to the client as they are extracted
+        llm_service = LLMService()
+        company_service = CompanyService()
+        company_data = {}
+        inserted_data = None
+        write = None
+        for field, value in llm_service.stream_company_info(text):
+            company_data[field] = value
+            job_manager.notify(job, {
+                'type': 'extraction_partial',
+                'field': field,
+                'value': value
+            })
+            if write is None and all(company_data.get(name) for name in INSERT_FIELDS):
+                # Dedup key and counter buckets are known: insert while the rest streams in
+                inserted_data = dict(company_data)
+                write = write_pool.submit(company_service.process_company, inserted_data, user_id)
+
+        if write is None and company_data.get('name'):
+            # The model never produced a tier or industry; the defaults apply
+            inserted_data = dict(company_data)
+            write = write_pool.submit(company_service.process_company, inserted_data, user_id)
+
+        if write is None:
+            job_manager.notify(job, {
+                'type': 'processing_error',
+                'error': 'Could not extract company information from text'
+            })
+            return
+
+        result = write.result()
+        late_fields = {field: value for field, value in company_data.items() if inserted_data.get(field) != value}
+        if late_fields and not result.get('is_duplicate'):
+            # Fill in what arrived after the insert started
+            company_service.update_company(result['company_id'], late_fields, user_id)
+
+        # Send success response
+        job_manager.notify(job, {
+            'type': 'processing_complete',
+            'success': True,
+            'result': {
+                'company_id': result['company_id'],
+                'company_name': company_data.get('name'),
+                'tier': company_data.get('tier'),
+                'is_duplicate': result.get('is_duplicate', False),
+                'similar_companies': result.get('similar_companies', []),
+                'created_at': datetime.now().isoformat()
+            },
+            'originalText': text
+        })
+
+        # Other tabs of the user and feed subscribers learn about it as a delta
+        if not result.get('is_duplicate'):
+            counters = compact_counters(company_service.get_company_stats(user_id))
+            feed.company_created(user_id, company_row(result['company_id'], company_data), counters)
+
+        logger.info(f"Successfully processed company: {company_data.get('name')}")
 
+    return job_manager
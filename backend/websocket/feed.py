@@ -0,0 +1,125 @@
+"""
+Push-based company feed.
+
+Instead of replying only to the socket that sent a request, changes are
+broadcast as small delta events:
+
+- ``user:<id>`` rooms get ``company_created`` (the new row plus the user's
+  updated counters) and ``counters_updated`` (after read/unread changes), so
+  every tab and device of the user stays in sync.
+- The global ``feed`` room gets ``company_created`` with just the row and
+  its owner. It carries every user's companies, so only admins listed in
+  FEED_ADMINS may be in it: they join on connect and can leave and rejoin
+  with ``unsubscribe_feed`` / ``subscribe_feed``.
+
+Dashboards apply the deltas to their local state rather than refetching
+lists or /stats.
+"""
+import json
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+from metrics import ERRORS, STAGE_SECONDS
+from websocket.pubsub import Emitter, user_room
+from config import config
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+FEED_ROOM = 'feed'
+
+ROW_FIELDS = ('name', 'tier', 'industry', 'location', 'website', 'funding_stage')
+
+
+def company_row(company_id: int, company_data: Dict, created_at: Optional[str] = None) -> Dict:
+    """Compact company row in the shape of GET /api/companies items"""
+    row = {'id': company_id}
+    row.update({field: company_data.get(field) for field in ROW_FIELDS})
+    row['tier'] = row['tier'] or 'tier3'
+    row['created_at'] = created_at or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    row['is_read'] = False
+    return row
+
+
+def compact_counters(stats: Dict) -> Dict:
+    """The counters a dashboard header needs, taken from CompanyService.get_company_stats"""
+    return {
+        'total': stats['total_companies'],
+        'read': stats['read_companies'],
+        'unread': stats['unread_companies'],
+        'tier': stats['tier_breakdown']
+    }
+
+
+class FeedPublisher:
+    """
+    Broadcasts company deltas through anything with
+    ``emit(event, data, to=...)``: the app's SocketIO, or an Emitter in
+    processes that have no Socket.IO server.
+    """
+
+    def __init__(self, target):
+        self.target = target
+
+    def company_created(self, user_id: int, company: Dict, counters: Optional[Dict] = None):
+        self._send(user_room(user_id), {
+            'type': 'company_created',
+            'company': company,
+            'counters': counters
+        })
+        self._send(FEED_ROOM, {
+            'type': 'company_created',
+            'company': company,
+            'created_by': user_id
+        })
+
+    def counters_updated(self, user_id: int, counters: Dict, company_ids=None, is_read=None):
+        self._send(user_room(user_id), {
+            'type': 'counters_updated',
+            'counters': counters,
+            'company_ids': company_ids or [],
+            'is_read': is_read
+        })
+
+    def send_to_user(self, user_id: int, payload: Dict):
+        """Deliver any message to every socket of a user (e.g. results of queued work)"""
+        self._send(user_room(user_id), payload)
+
+    def _send(self, room, payload):
+        # A failed broadcast must never fail the write that triggered it
+        try:
+            with STAGE_SECONDS.labels(stage='emit').time():
+                self.target.emit('message', json.dumps(payload), to=room)
+        except Exception as e:
+            ERRORS.labels(stage='emit').inc()
+            logger.error(f"Error broadcasting {payload['type']} to {room}: {str(e)}")
+
+
+_publisher = None
+_publisher_lock = threading.Lock()
+
+
+def init_feed_publisher(target) -> FeedPublisher:
+    """Publish through the given SocketIO (called when the server registers its events)"""
+    global _publisher
+    with _publisher_lock:
+        _publisher = FeedPublisher(target)
+    return _publisher
+
+
+def get_feed_publisher() -> Optional[FeedPublisher]:
+    """
+    Get the process-wide publisher. Processes without a Socket.IO server fall
+    back to an Emitter on SOCKETIO_MESSAGE_QUEUE; without one there is no feed.
+    """
+    global _publisher
+    if _publisher is None:
+        url = getattr(config, 'SOCKETIO_MESSAGE_QUEUE', None)
+        if not url:
+            return None
+        with _publisher_lock:
+            if _publisher is None:
+                _publisher = FeedPublisher(Emitter(url))
+    return _publisher
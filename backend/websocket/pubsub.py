@@ -0,0 +1,103 @@
+"""
+Cross-instance delivery for Socket.IO emits.
+
+With SOCKETIO_MESSAGE_QUEUE set, every server instance (and any worker
+process) publishes emits to a shared pub/sub channel and each instance
+delivers them to the clients connected to it. Supported URLs:
+
+    redis://host:6379/0      Redis pub/sub
+    kafka://host:9092        Kafka topic
+    amqp://user@host//       RabbitMQ (via kombu)
+    memory://                in-process broker for tests and single-process runs
+"""
+import logging
+import queue
+import threading
+from collections import defaultdict
+
+import socketio
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHANNEL = 'placebuddy-socketio'
+
+
+def user_room(user_id):
+    """Room joined by every socket of a user, on whichever instance it lives"""
+    return f"user:{user_id}"
+
+
+class LocalBroker:
+    """In-process pub/sub: every subscriber of a channel gets every message"""
+
+    def __init__(self):
+        self._subscribers = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel):
+        inbox = queue.Queue()
+        with self._lock:
+            self._subscribers[channel].append(inbox)
+        return inbox
+
+    def publish(self, channel, message):
+        with self._lock:
+            inboxes = list(self._subscribers[channel])
+        for inbox in inboxes:
+            inbox.put(message)
+
+
+local_broker = LocalBroker()
+
+
+class LocalPubSubManager(socketio.PubSubManager):
+    """
+    Client manager backed by LocalBroker. Several Socket.IO servers in one
+    process (e.g. a test simulating multiple instances) behave as if they
+    shared Redis.
+    """
+
+    name = 'local'
+
+    def __init__(self, url='memory://', channel=DEFAULT_CHANNEL, write_only=False, logger=None,
+                 broker=None):
+        self.broker = broker or local_broker
+        # Subscribe up front so nothing published before the listener starts is lost
+        self._inbox = None if write_only else self.broker.subscribe(channel)
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+
+    def _publish(self, data):
+        self.broker.publish(self.channel, data)
+
+    def _listen(self):
+        while True:
+            yield self._inbox.get()
+
+
+def create_client_manager(url, channel=DEFAULT_CHANNEL, write_only=False):
+    """Build the python-socketio client manager for a message queue URL (None if no URL)"""
+    if not url:
+        return None
+    if url.startswith('memory://'):
+        return LocalPubSubManager(url, channel=channel, write_only=write_only)
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return socketio.RedisManager(url, channel=channel, write_only=write_only)
+    if url.startswith('kafka://'):
+        return socketio.KafkaManager(url, channel=channel, write_only=write_only)
+    return socketio.KombuManager(url, channel=channel, write_only=write_only)
+
+
+class Emitter:
+    """
+    Emit-only handle for processes without a Socket.IO server (ingest
+    workers, scripts). Messages go through the message queue to whichever
+    instance holds the target socket or room.
+    """
+
+    def __init__(self, url, channel=DEFAULT_CHANNEL):
+        self.manager = create_client_manager(url, channel=channel, write_only=True)
+        if self.manager is None:
+            raise ValueError("An Emitter needs SOCKETIO_MESSAGE_QUEUE to be set")
+
+    def emit(self, event, data, to=None, namespace='/'):
+        self.manager.emit(event, data, namespace=namespace, room=to)
@@ -8,12 +8,13 @@ const Dashboard = ({ user, setUser }) => {
   const [connectionStatus, setConnectionStatus] = useState('disconnected');
   const [statusMessage, setStatusMessage] = useState('');
   const [submissions, setSubmissions] = useState([]);
+  const [counters, setCounters] = useState(null);
   const socketRef = useRef(null);
 
   // Initialize Socket.IO connection
   useEffect(() => {
     // Connect to the Socket.IO server
-    const socket = io('http://localhost:5000');
+    const socket = io('http://localhost:5000', { auth: { token: user?.token } });
     socketRef.current = socket;
 
     socket.on('connect', () => {
@@ -38,8 +39,11 @@ const Dashboard = ({ user, setUser }) => {
       const message = JSON.parse(data);
       console.log('Received message:', message);
 
-      if (message.type === 'status') {
+      if (message.type === 'status' || message.type === 'job_queued') {
         setStatusMessage(message.message);
+      } else if (message.type === 'extraction_partial') {
+        // Fields arrive one by one while the extraction is still running
+        setStatusMessage(`Found ${message.field}: ${message.value}`);
       } else if (message.type === 'processing_complete') {
         setIsProcessing(false);
         setStatusMessage('Text processed successfully!');
@@ -58,9 +62,39 @@ const Dashboard = ({ user, setUser }) => {
           ...prev
         ]);
         setTextInput(''); // Clear input on success
+      } else if (message.type === 'batch_item') {
+        // One message per posting of a batch or upload, in completion order
+        const item = message.result;
+        setSubmissions(prev => [
+          {
+            id: `${message.job_id}-${item.index}`,
+            text: item.status === 'failed' ? item.error : `Posting #${item.index + 1}`,
+            result: item.status === 'failed' ? null : {
+              company_name: item.company_name,
+              tier: item.tier,
+              is_duplicate: item.status === 'duplicate',
+            },
+            timestamp: new Date(item.created_at || Date.now()),
+            status: item.status === 'failed' ? 'error' : 'success'
+          },
+          ...prev
+        ]);
+      } else if (message.type === 'batch_complete') {
+        const { total, created, duplicates, failed } = message.summary;
+        setIsProcessing(false);
+        setStatusMessage(`Batch done: ${total} postings, ${created} new, ${duplicates} duplicates, ${failed} failed`);
+        setTextInput('');
       } else if (message.type === 'processing_error') {
         setIsProcessing(false);
         setStatusMessage(`Error: ${message.error}`);
+      } else if (message.type === 'busy') {
+        setIsProcessing(false);
+        setStatusMessage(`${message.error}. Try again in ${message.retry_after}s.`);
+      } else if (message.type === 'company_created' || message.type === 'counters_updated') {
+        // Pushed to every tab of this user; apply the delta instead of refetching
+        if (message.counters) {
+          setCounters(message.counters);
+        }
       }
     });
 
@@ -101,7 +135,6 @@ const Dashboard = ({ user, setUser }) => {
       type: 'process_text',
       data: {
         text: textInput,
-        user_id: user?.id || user?.username,
         timestamp: new Date().toISOString()
       }
     }));
@@ -142,6 +175,11 @@ const Dashboard = ({ user, setUser }) => {
                 {connectionStatus}
               </span>
             </div>
+            {counters && (
+              <span className="text-sm text-gray-500">
+                {counters.total} companies · {counters.unread} unread
+              </span>
+            )}
             <span className="text-gray-600">Welcome, {user?.username}!</span>
             <button
               onClick={handleLogout}
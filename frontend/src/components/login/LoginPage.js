@@ -41,7 +41,7 @@ const LoginPage = ({ setUser, showRegister, setShowRegister }) => {
         setShowRegister(false);
         setFormData({ username: '', email: '', password: '' });
       } else {
-        setUser(response.data.user);
+        setUser({ ...response.data.user, token: response.data.token });
         // In production: localStorage.setItem('token', response.data.token);
       }
 